@@ -0,0 +1,175 @@
+"""A Django cache backend that is shared by all worker processes on the same host.
+
+The local-memory cache is separate for each uwsgi worker, so every worker would compute
+the same data again. This backend stores the values in an SQLite database instead,
+so all processes (and restarts) share the same cache, without running an external service
+such as Redis or memcached. The least recently used entries are removed once the cache
+exceeds its maximum size or number of entries.
+
+Configure it in ``CACHES``::
+
+    CACHES = {
+        "default": {
+            "BACKEND": "dso_api.cache.SQLiteCache",
+            "LOCATION": "/tmp/dso-api/cache.sqlite3",
+            "TIMEOUT": 3600,
+            "OPTIONS": {"MAX_SIZE": 256 * 1024**2, "MAX_ENTRIES": 100_000},
+        }
+    }
+"""
+
+import logging
+import pickle
+from time import time
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from dso_api.sqlitestore import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed);
+CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO stats VALUES ('size', 0), ('entries', 0);
+CREATE TRIGGER IF NOT EXISTS cache_insert AFTER INSERT ON cache BEGIN
+    UPDATE stats SET value = value + new.size WHERE name = 'size';
+    UPDATE stats SET value = value + 1 WHERE name = 'entries';
+END;
+CREATE TRIGGER IF NOT EXISTS cache_delete AFTER DELETE ON cache BEGIN
+    UPDATE stats SET value = value - old.size WHERE name = 'size';
+    UPDATE stats SET value = value - 1 WHERE name = 'entries';
+END;
+"""
+
+
+class SQLiteCache(BaseCache):
+    """Cache backend that stores the pickled values in an SQLite database.
+
+    The database is shared between processes (see :class:`~dso_api.sqlitestore.SQLiteStore`).
+    Besides the standard ``MAX_ENTRIES`` option, the ``MAX_SIZE`` option limits the
+    total size of the stored values in bytes. A single value may take up to
+    ``MAX_VALUE_SIZE`` bytes (default: a tenth of the maximum size), larger values are
+    not stored.
+    """
+
+    def __init__(self, location: str, params: dict):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self.max_size = int(options.get("MAX_SIZE", 256 * 1024**2))
+        self.max_value_size = int(options.get("MAX_VALUE_SIZE", self.max_size // 10))
+        # The default of 300 entries is meant for the local-memory cache.
+        self._max_entries = int(options.get("MAX_ENTRIES", 100_000))
+        self.store = SQLiteStore(
+            location,
+            SCHEMA,
+            table="cache",
+            max_size=self.max_size,
+            max_entries=self._max_entries,
+            expired="expires <= ?",
+        )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None) -> bool:
+        key = self.make_and_validate_key(key, version=version)
+        return self._store(key, value, timeout, replace=False)
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self.store.connection.execute(
+            "SELECT value, expires, accessed FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+
+        if row is None or (row[1] is not None and row[1] <= time()):
+            return default
+
+        self.store.mark_accessed(key, row[2])
+        return pickle.loads(row[0])  # noqa: S301
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None) -> None:
+        key = self.make_and_validate_key(key, version=version)
+        self._store(key, value, timeout, replace=True)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None) -> bool:
+        key = self.make_and_validate_key(key, version=version)
+        with self.store.transaction() as connection:
+            cursor = connection.execute(
+                "UPDATE cache SET expires = ?, accessed = ?"
+                " WHERE key = ? AND (expires IS NULL OR expires > ?)",
+                (self.get_backend_timeout(timeout), time(), key, time()),
+            )
+        return cursor.rowcount > 0
+
+    def delete(self, key, version=None) -> bool:
+        key = self.make_and_validate_key(key, version=version)
+        with self.store.transaction() as connection:
+            cursor = connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+        return cursor.rowcount > 0
+
+    def has_key(self, key, version=None) -> bool:
+        key = self.make_and_validate_key(key, version=version)
+        row = self.store.connection.execute(
+            "SELECT 1 FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)",
+            (key, time()),
+        ).fetchone()
+        return row is not None
+
+    def clear(self) -> None:
+        with self.store.transaction() as connection:
+            connection.execute("DELETE FROM cache")
+
+    def close(self, **kwargs):
+        # The connections are kept open between requests, like the tile cache does.
+        pass
+
+    def get_stats(self) -> dict:
+        """Provide the statistics of the cache, combined for all processes."""
+        stats = self.store.get_stats()
+        return {
+            "entries": stats["entries"],
+            "size": stats["size"],
+            "max_size": self.max_size,
+        }
+
+    def get_backend_timeout(self, timeout=DEFAULT_TIMEOUT) -> float | None:
+        """Provide the absolute expiry time, ``None`` means it never expires."""
+        if timeout == DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        return None if timeout is None else time() + timeout
+
+    def _store(self, key: str, value, timeout, replace: bool) -> bool:
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.max_value_size:
+            logger.debug("Not caching %s, value of %d bytes is too large", key, len(data))
+            return False
+
+        now = time()
+        expires = self.get_backend_timeout(timeout)
+        with self.store.transaction() as connection:
+            if replace:
+                connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+            else:
+                # Only replace an entry that is expired.
+                connection.execute("DELETE FROM cache WHERE key = ? AND expires <= ?", (key, now))
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO cache VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), expires, now),
+            )
+
+        self.store.evict()
+        return cursor.rowcount > 0
+
+
+def check_cache() -> dict:
+    """Health check that reports the statistics of the shared cache."""
+    cache = caches["default"]
+    if not isinstance(cache, SQLiteCache):
+        return {"backend": type(cache).__name__}
+    return {"backend": type(cache).__name__, **cache.get_stats()}
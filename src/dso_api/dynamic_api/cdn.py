@@ -0,0 +1,66 @@
+"""Caching of public API responses by browsers and the CDN.
+
+Most tables are open data, and only change when a new import is done.
+When ``API_PUBLIC_MAX_AGE`` is set, the responses of anonymous requests on tables
+without authorization are marked as ``Cache-Control: public``, so the CDN can serve them.
+All other responses are still marked as uncacheable.
+
+Each public response has a ``Surrogate-Key`` header with the dataset, the table,
+and the version of the dataset (e.g. ``gebieden gebieden/buurten gebieden@v1/buurten``).
+After an import, the CDN is told to purge the keys of the changed tables
+(see the ``cdn_purge_keys`` management command).
+"""
+
+from django.conf import settings
+from django.http import HttpRequest
+from django.http.response import HttpResponseBase
+from django.utils.cache import add_never_cache_headers, patch_cache_control, patch_vary_headers
+from schematools.contrib.django.models import DynamicModel
+
+from dso_api.dynamic_api.constants import DEFAULT
+from dso_api.dynamic_api.filters.parser import QueryFilterEngine
+
+#: The request headers that change the response of a public table.
+VARY_HEADERS = ("Accept", "Accept-Crs", "Authorization")
+
+
+def get_surrogate_keys(dataset_id: str, table_id: str | None = None, version=DEFAULT) -> list[str]:
+    """Tell which surrogate keys a response has, or which keys purge a table."""
+    if table_id is None:
+        return [dataset_id]
+
+    keys = [dataset_id, f"{dataset_id}/{table_id}"]
+    if version != DEFAULT:
+        keys.append(f"{dataset_id}@{version}/{table_id}")
+    return keys
+
+
+def is_public_request(request: HttpRequest, model: type[DynamicModel]) -> bool:
+    """Tell whether the response is the same for everyone, so the CDN may store it."""
+    if not settings.API_PUBLIC_MAX_AGE or request.method not in ("GET", "HEAD"):
+        return False
+
+    # The CDN doesn't know which filters are passed as DSO-... headers.
+    if "Authorization" in request.headers or any(
+        name.startswith(QueryFilterEngine.HEADER_PARAMS_PREFIX) for name in request.headers
+    ):
+        return False
+
+    table_schema = model.table_schema()
+    return not ((table_schema.auth | table_schema.dataset.auth) - {"OPENBAAR"})
+
+
+def add_cdn_cache_headers(
+    response: HttpResponseBase, request: HttpRequest, model: type[DynamicModel], version=DEFAULT
+) -> None:
+    """Mark the response as public with its surrogate keys, or as uncacheable."""
+    if response.status_code != 200 or not is_public_request(request, model):
+        add_never_cache_headers(response)
+        return
+
+    table_schema = model.table_schema()
+    patch_cache_control(response, public=True, max_age=settings.API_PUBLIC_MAX_AGE)
+    patch_vary_headers(response, VARY_HEADERS)
+    response.headers["Surrogate-Key"] = " ".join(
+        get_surrogate_keys(table_schema.dataset.id, table_schema.id, version)
+    )
@@ -0,0 +1,211 @@
+"""Precomputed documents (the OpenAPI specifications and documentation pages).
+
+Generating an OpenAPI document walks over all views, serializers and filters of a dataset,
+which is expensive (and much more so for the combined document of all datasets).
+Likewise, a documentation page renders the Markdown and all tables, fields and filters.
+These documents only change when the schemas are reloaded, so each document is generated once,
+and kept in the memory of the process. The documents are also stored in the Django cache,
+so the other worker processes use them when a shared cache is configured
+(see :mod:`dso_api.cache`).
+The documents are served with an ETag, and gzip-compressed when the client accepts that.
+
+The ``generate_openapi`` and ``generate_docs`` management commands write the documents to
+the ``OPENAPI_DOCUMENTS_PATH`` and ``DOC_PAGES_PATH`` directories
+(e.g. while building the container image), so the processes read them from disk
+instead of generating them on their first request.
+The file names contain a hash of the schemas, so documents of older schemas are not used.
+"""
+
+import gzip
+import hashlib
+import logging
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpRequest, HttpResponse
+from django.urls import resolve
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from rest_framework.test import APIRequestFactory
+from schematools.contrib.django.models import Dataset
+from schematools.contrib.django.signals import dynamic_models_removed
+
+from dso_api.middleware import AuthMiddleware, get_accepted_encoding
+
+logger = logging.getLogger(__name__)
+
+#: The server URL in documents that have a URL per host (e.g. in DEBUG mode).
+#: This is replaced with the actual host for each request.
+SERVER_PLACEHOLDER = "http://openapi-server.invalid"
+
+#: Identifies a document: the name of the document and the format (e.g. json/yaml/html).
+DocumentKey = tuple[str, str]
+
+
+class Document:
+    """A rendered document, ready to be served."""
+
+    def __init__(self, content: bytes, content_type: str, schema_token: str):
+        self.content = content
+        self.content_type = content_type
+        self.schema_token = schema_token
+        self.etag = f'"{hashlib.sha1(content, usedforsecurity=False).hexdigest()[:24]}"'
+        # Documents with a per-host server URL are patched for each request,
+        # the others are served pre-compressed.
+        self.has_placeholder = SERVER_PLACEHOLDER.encode() in content
+        self.gzip_content = None if self.has_placeholder else gzip.compress(content, mtime=0)
+
+    def get_response(self, request: HttpRequest) -> HttpResponse:
+        """Provide the response, or a "304 Not Modified" when the client has this version."""
+        content = self.content
+        etag = self.etag
+        if self.has_placeholder:
+            base_url = f"{request.scheme}://{request.get_host()}"
+            content = content.replace(SERVER_PLACEHOLDER.encode(), base_url.encode())
+            etag = f'"{hashlib.sha1(content, usedforsecurity=False).hexdigest()[:24]}"'
+
+        encoding = (
+            get_accepted_encoding(request, ["gzip"]) if self.gzip_content is not None else None
+        )
+        if encoding:
+            # Like the compression middleware, a compressed document only has a weak ETag.
+            content = self.gzip_content
+            etag = f"W/{etag}"
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(content, content_type=self.content_type)
+            if encoding:
+                response.headers["Content-Encoding"] = encoding
+        response.headers["ETag"] = etag
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
+
+
+class DocumentStore:
+    """The generated documents of one kind, in memory and (optionally) on disk.
+
+    :param setting_name: The setting that holds the directory of pre-generated documents.
+    """
+
+    def __init__(self, setting_name: str):
+        self.setting_name = setting_name
+        self._documents: dict[DocumentKey, Document] = {}
+
+    def __len__(self):
+        return len(self._documents)
+
+    def get(
+        self, key: DocumentKey, content_type: str, get_schema_token: Callable[[], str]
+    ) -> Document | None:
+        """Provide the document from memory, from disk when it was generated in advance,
+        or from the Django cache when another process generated it.
+
+        :param get_schema_token: Tells which hash the file of the current schemas has.
+            This is only called when the document is not in memory.
+        """
+        try:
+            return self._documents[key]
+        except KeyError:
+            pass
+
+        schema_token = get_schema_token()
+        content = self._read_file(key, schema_token)
+        if content is None:
+            # Another worker process could have generated the document already.
+            content = cache.get(self._get_cache_key(key, schema_token))
+            if content is None:
+                return None
+
+        document = Document(content, content_type, schema_token)
+        self._documents[key] = document
+        return document
+
+    def set(self, key: DocumentKey, document: Document) -> None:
+        """Keep the generated document for the next requests.
+        The document is also shared with the other processes through the Django cache.
+        """
+        self._documents[key] = document
+        cache.set(self._get_cache_key(key, document.schema_token), document.content)
+
+    def write(self, path: str | Path) -> list[Path]:
+        """Write all generated documents to the directory.
+
+        :returns: The written files.
+        """
+        files = []
+        for key, document in self._documents.items():
+            file = _get_document_file(path, key, document.schema_token)
+            file.parent.mkdir(parents=True, exist_ok=True)
+            file.write_bytes(document.content)
+            files.append(file)
+        return files
+
+    def clear(self):
+        self._documents.clear()
+
+    def _read_file(self, key: DocumentKey, schema_token: str) -> bytes | None:
+        """Read the document that was written in advance."""
+        path = getattr(settings, self.setting_name)
+        if not path:
+            return None
+
+        file = _get_document_file(path, key, schema_token)
+        try:
+            content = file.read_bytes()
+        except FileNotFoundError:
+            return None
+
+        logger.debug("Read document %s", file)
+        return content
+
+    def _get_cache_key(self, key: DocumentKey, schema_token: str) -> str:
+        name = _get_document_file("", key, schema_token).name
+        digest = hashlib.sha1(name.encode(), usedforsecurity=False).hexdigest()
+        return f"dso_api.documents.{self.setting_name}.{digest}"
+
+
+#: The OpenAPI documents of the datasets, and the combined document.
+openapi_documents = DocumentStore("OPENAPI_DOCUMENTS_PATH")
+
+#: The documentation pages (``/v1/docs/...``).
+doc_pages = DocumentStore("DOC_PAGES_PATH")
+
+
+def get_schema_token(datasets: Iterable[Dataset]) -> str:
+    """Provide a hash of the schemas that the documents are generated from."""
+    digest = hashlib.sha1(settings.DATAPUNT_API_URL.encode(), usedforsecurity=False)
+    for dataset in datasets:
+        digest.update(dataset.schema_data.encode())
+    return digest.hexdigest()[:16]
+
+
+def generate_document(path: str) -> HttpResponse:
+    """Request the document, as if an anonymous user requested it.
+    This is used to generate the documents in advance.
+    """
+    server_url = urlparse(settings.DATAPUNT_API_URL)
+    request = APIRequestFactory().get(
+        path, HTTP_HOST=server_url.netloc, secure=server_url.scheme == "https"
+    )
+    request.get_token_scopes = []
+    AuthMiddleware(lambda request: None)(request)  # sets user_scopes and the database role.
+
+    match = resolve(path)
+    return match.func(request, *match.args, **match.kwargs)
+
+
+def clear_documents():
+    openapi_documents.clear()
+    doc_pages.clear()
+
+
+# When models are removed, clear the cache.
+dynamic_models_removed.connect(lambda **kwargs: clear_documents())
+
+
+def _get_document_file(path: str | Path, key: DocumentKey, schema_token: str) -> Path:
+    name, response_format = key
+    return Path(path, f"{name}.{schema_token}.{response_format}")
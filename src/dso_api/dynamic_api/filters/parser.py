@@ -182,6 +182,17 @@ class QueryFilterEngine:
     @classmethod
     def from_request(cls, request) -> QueryFilterEngine:
         """Construct the parser from the request data."""
+        return cls(
+            user_scopes=request.user_scopes,
+            query=request.GET,
+            dso_headers=cls.get_dso_headers(request),
+            input_crs=getattr(request, "accept_crs", None),
+            request_date=get_request_date(request),
+        )
+
+    @classmethod
+    def get_dso_headers(cls, request) -> MultiValueDict:
+        """Collect the filters that are passed as ``DSO-...`` headers, as query parameters."""
         dso_headers = MultiValueDict()
 
         for key, value in request.headers.items():
@@ -207,13 +218,7 @@ class QueryFilterEngine:
 
             dso_headers.setlist(new_key, [value])
 
-        return cls(
-            user_scopes=request.user_scopes,
-            query=request.GET,
-            dso_headers=dso_headers,
-            input_crs=getattr(request, "accept_crs", None),
-            request_date=get_request_date(request),
-        )
+        return dso_headers
 
     def __init__(
         self,
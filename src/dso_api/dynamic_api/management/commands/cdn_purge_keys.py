@@ -0,0 +1,48 @@
+from argparse import ArgumentParser
+from typing import Any
+
+from django.core.management import BaseCommand, CommandError
+from schematools.contrib.django.models import Dataset
+from schematools.naming import to_snake_case
+
+from dso_api.dynamic_api.cdn import get_surrogate_keys
+
+
+class Command(BaseCommand):
+    """Tell which surrogate keys the CDN should purge after an import."""
+
+    help = (  # noqa: A003
+        "Print the surrogate keys of the imported tables (one per line),"
+        " so the CDN can purge the cached responses of those tables."
+    )
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        """Hook to add arguments."""
+        parser.add_argument("dataset", help="The dataset that was imported.")
+        parser.add_argument(
+            "tables",
+            nargs="*",
+            help="The tables that were imported (default: the whole dataset).",
+        )
+
+    def handle(self, *args: str, **options: Any) -> None:
+        """Main function of this command."""
+        try:
+            dataset = Dataset.objects.get(name=to_snake_case(options["dataset"]))
+        except Dataset.DoesNotExist:
+            raise CommandError(f"Dataset not found: {options['dataset']}") from None
+
+        schema = dataset.schema
+        if not options["tables"]:
+            keys = get_surrogate_keys(schema.id)
+        else:
+            table_ids = {table.id for table in schema.get_tables()}
+            if unknown := set(options["tables"]) - table_ids:
+                names = ", ".join(sorted(unknown))
+                raise CommandError(f"Tables not found in {schema.id}: {names}")
+
+            # The dataset/table key is found on the responses of all versions.
+            keys = [get_surrogate_keys(schema.id, table_id)[1] for table_id in options["tables"]]
+
+        for key in keys:
+            self.stdout.write(key)
@@ -0,0 +1,72 @@
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.urls import NoReverseMatch, reverse
+
+from dso_api.dynamic_api.datasets import get_active_datasets
+from dso_api.dynamic_api.documents import doc_pages, generate_document
+
+GENERIC_DOCS_DIR = Path(settings.BASE_DIR, "templates/dso_api/dynamic_api/docs")
+
+
+class Command(BaseCommand):
+    """Generate the documentation pages in advance."""
+
+    help = (  # noqa: A003
+        "Render the documentation pages of all datasets (and the generic pages),"
+        " and write them to a directory that the application reads them from."
+    )
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        """Hook to add arguments."""
+        parser.add_argument(
+            "--output-dir",
+            default=settings.DOC_PAGES_PATH,
+            help="Directory to write the pages to (default: DOC_PAGES_PATH).",
+        )
+
+    def handle(self, *args: str, **options: Any) -> None:
+        """Main function of this command."""
+        output_dir = options["output_dir"]
+        if not output_dir:
+            raise CommandError("No --output-dir given, and DOC_PAGES_PATH is not set.")
+
+        index_path = reverse("dynamic_api:docs-index")
+        prefix = index_path.removesuffix("/docs/index.html")
+        paths = [index_path, f"{prefix}/docs/searchindex.json"]
+        paths.extend(
+            reverse(
+                "dynamic_api:docs-generic",
+                kwargs={"category": file.parent.name, "topic": file.stem},
+            )
+            for file in sorted(GENERIC_DOCS_DIR.glob("*/*.md"))
+        )
+
+        for dataset in get_active_datasets().db_enabled():
+            dataset_id = dataset.schema.id
+            try:
+                paths.append(
+                    reverse("dynamic_api:docs-dataset", kwargs={"dataset_name": dataset_id})
+                )
+            except NoReverseMatch as e:
+                self.stderr.write(f"Skipped dataset {dataset_id}: {e}")
+                continue
+
+            paths.extend(
+                reverse(
+                    "dynamic_api:docs-dataset-version",
+                    kwargs={"dataset_name": dataset_id, "dataset_version": vmajor},
+                )
+                for vmajor in dataset.schema.versions
+            )
+
+        for path in paths:
+            response = generate_document(path)
+            if response.status_code != 200:
+                raise CommandError(f"Failed to generate {path}: HTTP {response.status_code}")
+
+        for file in doc_pages.write(output_dir):
+            self.stdout.write(f"Written {file}")
@@ -0,0 +1,49 @@
+from argparse import ArgumentParser
+from typing import Any
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.urls import reverse
+
+from dso_api.dynamic_api.documents import generate_document, openapi_documents
+from dso_api.dynamic_api.urls import router
+
+
+class Command(BaseCommand):
+    """Generate the OpenAPI documents in advance."""
+
+    help = (  # noqa: A003
+        "Generate the OpenAPI documents of all datasets (and the combined document),"
+        " and write them to a directory that the application reads them from."
+    )
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        """Hook to add arguments."""
+        parser.add_argument(
+            "--output-dir",
+            default=settings.OPENAPI_DOCUMENTS_PATH,
+            help="Directory to write the documents to (default: OPENAPI_DOCUMENTS_PATH).",
+        )
+
+    def handle(self, *args: str, **options: Any) -> None:
+        """Main function of this command."""
+        output_dir = options["output_dir"]
+        if not output_dir:
+            raise CommandError("No --output-dir given, and OPENAPI_DOCUMENTS_PATH is not set.")
+
+        # The paths with a trailing slash give the same document as those without it.
+        combined_paths = [reverse("dynamic_api:schema-json"), reverse("dynamic_api:schema-yaml")]
+        prefix = combined_paths[0].removesuffix("/openapi.json")
+        paths = [
+            f"{prefix}{pattern.pattern}"
+            for pattern in router._openapi_urls
+            if not str(pattern.pattern).endswith("/")
+        ]
+
+        for path in paths + combined_paths:
+            response = generate_document(path)
+            if response.status_code != 200:
+                raise CommandError(f"Failed to generate {path}: HTTP {response.status_code}")
+
+        for file in openapi_documents.write(output_dir):
+            self.stdout.write(f"Written {file}")
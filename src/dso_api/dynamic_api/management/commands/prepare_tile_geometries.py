@@ -0,0 +1,75 @@
+from argparse import ArgumentParser
+from typing import Any
+
+from django.core.management import BaseCommand, CommandError
+
+from dso_api.dynamic_api.constants import DEFAULT
+from dso_api.dynamic_api.tilegeometry import add_projected_columns, drop_projected_columns
+from dso_api.dynamic_api.urls import router
+from dso_api.dynamic_api.views.mvt import get_zoom_rules
+from dso_api.dynamic_api.views.mvt_base import get_pixel_size
+
+
+class Command(BaseCommand):
+    """Add precomputed Web Mercator geometry columns for the vector tiles."""
+
+    help = (  # noqa: A003
+        "Add generated columns with the geometry in Web Mercator (EPSG:3857) to the tables"
+        " of a dataset, so vector tiles are rendered without reprojecting each row."
+    )
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        """Hook to add arguments."""
+        parser.add_argument("dataset", help="Name of the dataset")
+        parser.add_argument(
+            "--dataset-version", default=DEFAULT, help="Version of the dataset (default: latest)"
+        )
+        parser.add_argument(
+            "--table",
+            dest="tables",
+            action="append",
+            help="Name of the table (default: all tables with geometry)",
+        )
+        parser.add_argument(
+            "--no-generalize",
+            dest="generalize",
+            action="store_false",
+            help="Don't add the simplified geometries for the zoom rules of the table.",
+        )
+        parser.add_argument(
+            "--drop", action="store_true", help="Remove the columns instead of adding them."
+        )
+
+    def handle(self, *args: str, **options: Any) -> None:
+        """Main function of this command."""
+        dataset_name = options["dataset"]
+        try:
+            models = router.all_models[dataset_name][options["dataset_version"]]
+        except KeyError:
+            raise CommandError(f"Invalid dataset: {dataset_name}") from None
+
+        tables = options["tables"]
+        for table_name, model in sorted(models.items()):
+            schema = model.table_schema()
+            if (tables and table_name not in tables) or not any(
+                field.is_geo for field in schema.fields
+            ):
+                continue
+
+            main_geo = schema.main_geometry_field
+            geom_column = model._meta.get_field(main_geo.python_name).column
+            if options["drop"]:
+                columns = drop_projected_columns(model, geom_column)
+                verb = "Removed"
+            else:
+                # The variant of each zoom rule is simplified for its highest zoom level;
+                # the lower zoom levels of the rule simplify that a bit further.
+                tolerances = {
+                    rule.max_zoom: rule.simplify * get_pixel_size(rule.max_zoom)
+                    for rule in get_zoom_rules(schema)
+                    if rule.simplify and options["generalize"]
+                }
+                columns = add_projected_columns(model, geom_column, tolerances)
+                verb = "Added"
+
+            self.stdout.write(f"{table_name}: {verb} {', '.join(columns) or 'no'} columns")
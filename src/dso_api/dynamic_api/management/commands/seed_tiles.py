@@ -0,0 +1,309 @@
+import json
+import multiprocessing
+import os
+import sqlite3
+from argparse import ArgumentParser
+from collections import defaultdict
+from pathlib import Path
+from typing import Any
+
+import mercantile
+from django.core.exceptions import PermissionDenied
+from django.core.management import BaseCommand, CommandError
+from django.db import connections
+from rest_framework.test import APIRequestFactory
+from vectortiles.backends.postgis.functions import MakeEnvelope
+
+from dso_api.dynamic_api.constants import DEFAULT
+from dso_api.dynamic_api.filters.values import AMSTERDAM_BOUNDS, DAM_SQUARE
+from dso_api.dynamic_api.pmtiles import write_pmtiles, zxy_to_tile_id
+from dso_api.dynamic_api.tilecache import TileCache, compress_tile, get_tile_cache
+from dso_api.dynamic_api.urls import router
+from dso_api.dynamic_api.views.mvt import DatasetMVTView, DatasetTileJSONView
+from dso_api.middleware import AuthMiddleware
+
+#: The number of tiles (horizontally and vertically) that a worker process renders at once.
+BLOCK_SIZE = 8
+
+STAGING_SCHEMA = """
+CREATE TABLE IF NOT EXISTS params (value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS blocks (z INTEGER, x INTEGER, y INTEGER, PRIMARY KEY (z, x, y));
+CREATE TABLE IF NOT EXISTS tiles (tile_id INTEGER PRIMARY KEY, data BLOB NOT NULL);
+"""
+
+_renderer = None  # The TileRenderer of a worker process.
+
+
+class Command(BaseCommand):
+    """Render the vector tiles of a dataset in advance."""
+
+    help = (  # noqa: A003
+        "Render the vector tiles of a dataset within the Amsterdam area,"
+        " and store them in the tile cache or a PMTiles archive."
+    )
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        """Hook to add arguments."""
+        parser.add_argument("dataset", help="Name of the dataset")
+        parser.add_argument(
+            "--dataset-version", default=DEFAULT, help="Version of the dataset (default: latest)"
+        )
+        parser.add_argument(
+            "--table",
+            dest="tables",
+            action="append",
+            help="Name of the table to render (default: all tables with geometry)",
+        )
+        parser.add_argument("--min-zoom", type=int, default=DatasetTileJSONView.min_zoom)
+        parser.add_argument("--max-zoom", type=int, default=DatasetTileJSONView.max_zoom)
+        parser.add_argument(
+            "--processes",
+            "-j",
+            type=int,
+            default=os.cpu_count(),
+            help="Number of worker processes (default: number of CPUs)",
+        )
+        parser.add_argument(
+            "--pmtiles",
+            metavar="FILE",
+            help=(
+                "Write all tables as layers in a single PMTiles archive,"
+                " instead of writing the tiles into the tile cache (MVT_CACHE_PATH)."
+            ),
+        )
+
+    def handle(self, *args: str, **options: Any) -> None:
+        """Main function of this command."""
+        table_names = self.get_table_names(
+            options["dataset"], options["dataset_version"], options["tables"]
+        )
+        zooms = range(options["min_zoom"], options["max_zoom"] + 1)
+        renderer_args = (options["dataset"], options["dataset_version"], table_names)
+
+        if options["pmtiles"]:
+            self.write_pmtiles(
+                Path(options["pmtiles"]), renderer_args, zooms, options["processes"]
+            )
+        else:
+            if get_tile_cache() is None:
+                raise CommandError("The tile cache is not configured, see MVT_CACHE_PATH.")
+            self.write_cache(renderer_args, zooms, options["processes"])
+
+    def get_table_names(self, dataset_name, dataset_version, tables: list[str] | None):
+        """Find the tables that anonymous users can read as vector tiles."""
+        try:
+            models = router.all_models[dataset_name][dataset_version]
+        except KeyError:
+            raise CommandError(f"Invalid dataset: {dataset_name}") from None
+
+        table_names = []
+        for table_name, model in sorted(models.items()):
+            if (tables and table_name not in tables) or not any(
+                field.is_geo for field in model.table_schema().fields
+            ):
+                continue
+            try:
+                _create_view(dataset_name, dataset_version, table_name)
+            except PermissionDenied:
+                self.stderr.write(f"Skipping {table_name}: not available for anonymous users")
+                continue
+            table_names.append(table_name)
+
+        if not table_names:
+            raise CommandError(f"Dataset {dataset_name} has no tables to render.")
+        return table_names
+
+    def write_cache(self, renderer_args: tuple, zooms: range, processes: int) -> None:
+        """Render the tiles into the tile cache.
+        Tiles that are still cached are skipped, so an interrupted run can be resumed.
+        """
+        totals = defaultdict(int)
+        for _block, counts, _tiles in self.render_blocks(
+            renderer_args, _get_blocks(zooms), processes, use_cache=True
+        ):
+            for name, value in counts.items():
+                totals[name] += value
+
+        self.stdout.write(
+            "Tiles rendered: {rendered}, empty: {empty}, already cached: {cached}".format_map(
+                totals
+            )
+        )
+
+    def write_pmtiles(self, path: Path, renderer_args: tuple, zooms: range, processes: int):
+        """Render all tables as layers of a single PMTiles archive.
+        The tiles are collected in a staging database first, which allows resuming the run.
+        """
+        staging_path = path.with_name(f"{path.name}.seeding")
+        staging = sqlite3.connect(staging_path)
+        staging.executescript(STAGING_SCHEMA)
+        params = json.dumps([*renderer_args, list(zooms)])
+        if (row := staging.execute("SELECT value FROM params").fetchone()) is None:
+            with staging:
+                staging.execute("INSERT INTO params VALUES (?)", (params,))
+        elif row[0] != params:
+            raise CommandError(
+                f"{staging_path} was created with different arguments, remove it to start over."
+            )
+
+        done = set(staging.execute("SELECT z, x, y FROM blocks"))
+        blocks = [block for block in _get_blocks(zooms) if block[0] not in done]
+        if done:
+            self.stdout.write(f"Resuming, {len(done)} blocks were already rendered.")
+
+        for block, _counts, tiles in self.render_blocks(
+            renderer_args, blocks, processes, use_cache=False
+        ):
+            with staging:
+                staging.executemany("INSERT OR REPLACE INTO tiles VALUES (?, ?)", tiles)
+                staging.execute("INSERT INTO blocks VALUES (?, ?, ?)", block)
+
+        temp_path = path.with_name(f"{path.name}.tmp")
+        with temp_path.open("wb") as file:
+            write_pmtiles(
+                file,
+                staging.execute("SELECT tile_id, data FROM tiles ORDER BY tile_id"),
+                metadata=_get_metadata(*renderer_args),
+                min_zoom=zooms.start,
+                max_zoom=zooms.stop - 1,
+                bounds=AMSTERDAM_BOUNDS,
+                center=DAM_SQUARE,
+            )
+        (count,) = staging.execute("SELECT count(*) FROM tiles").fetchone()
+        staging.close()
+        temp_path.replace(path)
+        staging_path.unlink()
+        self.stdout.write(f"Written {count} tiles to {path}")
+
+    def render_blocks(self, renderer_args: tuple, blocks: list, processes: int, use_cache: bool):
+        """Render the blocks of tiles, using multiple processes when possible."""
+        if processes <= 1:
+            _init_worker(renderer_args, use_cache)
+            yield from map(_render_block, blocks)
+            return
+
+        # The worker processes are forked, so they share the loaded dynamic models.
+        # Database connections can't be shared, so these are closed first.
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        with context.Pool(processes, _init_worker, (renderer_args, use_cache)) as pool:
+            yield from pool.imap_unordered(_render_block, blocks)
+
+
+class TileRenderer:
+    """Rendering the tiles of all tables, with the same field access as anonymous users."""
+
+    def __init__(self, dataset_name, dataset_version, table_names, tile_cache: TileCache | None):
+        self.views = [
+            _create_view(dataset_name, dataset_version, table_name) for table_name in table_names
+        ]
+        self.tile_cache = tile_cache
+
+    def render_block(self, z: int, tiles: list[mercantile.Tile]) -> tuple[dict, list]:
+        """Render a block of tiles. Empty tiles are skipped.
+
+        :returns: The statistics, and (when not using the cache) the compressed tiles.
+        """
+        counts = {"rendered": 0, "empty": 0, "cached": 0}
+        compressed = []
+        views = [view for view in self.views if self._has_features(view, z, tiles)]
+        for tile in tiles:
+            if self.tile_cache is not None:
+                counts["empty"] += len(self.views) - len(views)
+                for view in views:
+                    counts[self._write_cache(view, tile)] += 1
+            elif data := b"".join(self._render(view, tile) for view in views):
+                compressed.append((zxy_to_tile_id(tile.z, tile.x, tile.y), compress_tile(data)))
+                counts["rendered"] += 1
+            else:
+                counts["empty"] += 1
+
+        return counts, compressed
+
+    def _write_cache(self, view: DatasetMVTView, tile: mercantile.Tile) -> str:
+        # The fields of the layer (which are part of the key) depend on the zoom level.
+        view.zoom = tile.z
+        key = view.get_tile_cache_key(tile.z, tile.x, tile.y)
+        if self.tile_cache.has(key):
+            return "cached"
+
+        data = self._render(view, tile)
+        if not data:
+            return "empty"
+        self.tile_cache.set(key, compress_tile(data))
+        return "rendered"
+
+    def _render(self, view: DatasetMVTView, tile: mercantile.Tile) -> bytes:
+        view.zoom = tile.z
+        (layer,) = view.get_layers()
+        if self.tile_cache is None:
+            # Each table becomes a separate layer in the combined tile.
+            layer.id = view.kwargs["table_name"]
+        return b"".join(layer.get_tile(tile.x, tile.y, tile.z))
+
+    def _has_features(self, view: DatasetMVTView, z: int, tiles: list[mercantile.Tile]):
+        """Quickly tell whether the block has any features, so empty areas are skipped."""
+        bounds = [mercantile.xy_bounds(tile) for tile in tiles]
+        envelope = MakeEnvelope(
+            min(b.left for b in bounds),
+            min(b.bottom for b in bounds),
+            max(b.right for b in bounds),
+            max(b.top for b in bounds),
+            3857,
+        )
+        geom_field = view._main_geo.python_name
+        return view.model.objects.filter(**{f"{geom_field}__intersects": envelope}).exists()
+
+
+def _get_blocks(zooms: range) -> list[tuple[tuple[int, int, int], list[mercantile.Tile]]]:
+    """Divide the tiles within the Amsterdam bounds in blocks that a worker renders at once."""
+    blocks = defaultdict(list)
+    for tile in mercantile.tiles(*AMSTERDAM_BOUNDS, zooms):
+        blocks[(tile.z, tile.x // BLOCK_SIZE, tile.y // BLOCK_SIZE)].append(tile)
+    return list(blocks.items())
+
+
+def _init_worker(renderer_args: tuple, use_cache: bool) -> None:
+    global _renderer
+    # The cache connection of the parent process can't be used after forking.
+    get_tile_cache.cache_clear()
+    _renderer = TileRenderer(*renderer_args, tile_cache=get_tile_cache() if use_cache else None)
+
+
+def _render_block(block: tuple) -> tuple[tuple, dict, list]:
+    key, tiles = block
+    return (key, *_renderer.render_block(key[0], tiles))
+
+
+def _create_view(dataset_name, dataset_version, table_name) -> DatasetMVTView:
+    """Create the MVT view, as if an anonymous user made the request."""
+    request = APIRequestFactory().get("/")
+    request.get_token_scopes = []
+    AuthMiddleware(lambda request: None)(request)  # sets user_scopes and the database role.
+
+    view = DatasetMVTView()
+    view.setup(
+        request,
+        dataset_name=dataset_name,
+        dataset_version=dataset_version,
+        table_name=table_name,
+    )
+    return view
+
+
+def _get_metadata(dataset_name, dataset_version, table_names) -> dict:
+    """Provide the TileJSON metadata for the PMTiles archive."""
+    view = DatasetTileJSONView()
+    view.setup(
+        APIRequestFactory().get("/"), dataset_name=dataset_name, dataset_version=dataset_version
+    )
+    return {
+        "name": view.name,
+        "description": view.description,
+        "attribution": view.attribution,
+        "vector_layers": [
+            layer.get_tilejson_vector_layer()
+            for layer in view.get_layers()
+            if layer.id in table_names
+        ],
+    }
@@ -0,0 +1,53 @@
+from argparse import ArgumentParser
+from typing import Any
+
+from django.core.management import BaseCommand, CommandError
+
+from dso_api.dynamic_api.constants import DEFAULT
+from dso_api.dynamic_api.tilecache import add_version_trigger, drop_version_trigger
+from dso_api.dynamic_api.urls import router
+
+
+class Command(BaseCommand):
+    """Add the triggers that count the writes to the tables of a dataset."""
+
+    help = (  # noqa: A003
+        "Add a trigger to the tables of a dataset that counts the writes, so read replicas"
+        " also notice updated rows (e.g. to discard cached tiles and responses)."
+    )
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        """Hook to add arguments."""
+        parser.add_argument("dataset", help="Name of the dataset")
+        parser.add_argument(
+            "--dataset-version", default=DEFAULT, help="Version of the dataset (default: latest)"
+        )
+        parser.add_argument(
+            "--table",
+            dest="tables",
+            action="append",
+            help="Name of the table (default: all tables)",
+        )
+        parser.add_argument(
+            "--drop", action="store_true", help="Remove the triggers instead of adding them."
+        )
+
+    def handle(self, *args: str, **options: Any) -> None:
+        """Main function of this command."""
+        dataset_name = options["dataset"]
+        try:
+            models = router.all_models[dataset_name][options["dataset_version"]]
+        except KeyError:
+            raise CommandError(f"Invalid dataset: {dataset_name}") from None
+
+        tables = options["tables"]
+        for table_name, model in sorted(models.items()):
+            if tables and table_name not in tables:
+                continue
+
+            if options["drop"]:
+                drop_version_trigger(model)
+                self.stdout.write(f"{table_name}: Removed the version trigger")
+            else:
+                add_version_trigger(model)
+                self.stdout.write(f"{table_name}: Added the version trigger")
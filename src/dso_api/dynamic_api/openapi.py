@@ -16,11 +16,9 @@ from django.conf import settings
 from django.http import JsonResponse
 from django.shortcuts import redirect
 from django.urls import URLPattern, URLResolver, get_resolver, get_urlconf
-from django.utils.decorators import method_decorator
+from django.utils.cache import patch_vary_headers
 from django.utils.functional import lazy
 from django.utils.http import url_has_allowed_host_and_scheme
-from django.views.decorators.cache import cache_page
-from django.views.decorators.vary import vary_on_headers
 from rest_framework import permissions, renderers
 from rest_framework.response import Response
 from rest_framework.schemas import get_schema_view
@@ -35,10 +33,14 @@ from rest_framework_dso.openapi import DSOSchemaGenerator
 from rest_framework_dso.renderers import BrowsableAPIRenderer, HALJSONRenderer
 
 from .datasets import get_active_datasets
+from .documents import SERVER_PLACEHOLDER, Document, get_schema_token, openapi_documents
 from .utils import get_status_description
 
 logger = logging.getLogger(__name__)
 
+#: The description of the server URL that is determined by the requested host.
+DYNAMIC_SERVER_DESCRIPTION = "Dynamically determined server URL for this dataset"
+
 __all__ = (
     "get_openapi_view",
     "DynamicApiSchemaGenerator",
@@ -119,12 +121,7 @@ class DynamicApiSchemaGenerator(DSOSchemaGenerator):
         # if request.path == '/v1/openapi.json/' or request.path == '/v1/openapi.yaml/':
         #     return schema
 
-        # modify request.path to ensure it ends with a slash and removes
-        # openapi.json and openapi.yaml
-        cleaned_path = request.path.replace("/openapi.json", "").replace("/openapi.yaml", "")
-        if not cleaned_path.endswith("/") and cleaned_path != "/v1":
-            cleaned_path += "/"
-
+        cleaned_path = get_base_path(request.path)
         current_doc_dir = os.path.dirname(cleaned_path)
 
         # Ensure 'servers' field reflects this base path if not already set correctly
@@ -134,7 +131,7 @@ class DynamicApiSchemaGenerator(DSOSchemaGenerator):
             schema["servers"] = [
                 {
                     "url": final_server_url,
-                    "description": "Dynamically determined server URL for this dataset",
+                    "description": DYNAMIC_SERVER_DESCRIPTION,
                 }
             ]
 
@@ -161,6 +158,16 @@ class DynamicApiSchemaGenerator(DSOSchemaGenerator):
         return schema
 
 
+def get_base_path(path: str) -> str:
+    """Tell which path the OpenAPI document describes.
+    This makes sure the path ends with a slash, and removes openapi.json and openapi.yaml.
+    """
+    cleaned_path = path.replace("/openapi.json", "").replace("/openapi.yaml", "")
+    if not cleaned_path.endswith("/") and cleaned_path != "/v1":
+        cleaned_path += "/"
+    return cleaned_path
+
+
 def get_openapi_view(dataset, version: str | None = None, response_format: str = "json"):
 
     if not isinstance(dataset, Dataset):
@@ -256,13 +263,24 @@ def get_openapi_view(dataset, version: str | None = None, response_format: str =
     }
 
     # Wrap the view in a "decorator" that shows the Swagger interface for browsers.
-    return _html_on_browser(openapi_view, dataset_schema, response_format)
-
-
-CACHE_DURATION = 60 * 60 * 24 * 7  # Seconds.
+    return _html_on_browser(
+        openapi_view,
+        dataset_schema,
+        response_format,
+        document_name=f"{dataset.path}@{version or 'default'}",
+        content_type=renderer_class.media_type,
+        schema_token=get_schema_token([dataset]),
+    )
 
 
-def _html_on_browser(openapi_view, dataset_schema, response_format: str = "json"):
+def _html_on_browser(
+    openapi_view,
+    dataset_schema,
+    response_format: str = "json",
+    document_name: str = "",
+    content_type: str = "",
+    schema_token: str = "",
+):
     """A 'decorator' that shows the browsable interface on browser requests.
     This is a separate function to reduce the closure context data.
     """
@@ -270,6 +288,31 @@ def _html_on_browser(openapi_view, dataset_schema, response_format: str = "json"
     # to request the OpenAPI JSON and avoids any possible browser-interaction.
     browsable_view = OpenAPIBrowserView
 
+    def _document_view(request, *args, **kwargs):
+        # The paths in the document are relative to the requested path,
+        # so /v1/dataset and /v1/dataset/v1/openapi.json are different documents.
+        name = f"{document_name}{get_base_path(request.path)}".replace("/", "_")
+        key = (name, response_format)
+        document = openapi_documents.get(key, content_type, lambda: schema_token)
+        if document is None:
+            response = openapi_view(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+
+            if "servers" in response.data:
+                # The server URL can depend on the host, which is filled in for each request.
+                response.data = {
+                    **response.data,
+                    "servers": _get_server_placeholders(request, response.data["servers"]),
+                }
+            response.render()
+            document = Document(response.content, content_type, schema_token)
+            openapi_documents.set(key, document)
+
+        response = document.get_response(request)
+        patch_vary_headers(response, ("Accept",))
+        return response
+
     @wraps(openapi_view)
     def _switching_view(request, *args, **kwargs):
         is_browser = "text/html" in request.headers.get("Accept", "")
@@ -286,9 +329,7 @@ def _html_on_browser(openapi_view, dataset_schema, response_format: str = "json"
 
         # Handle file downloads for openapi.json and openapi.yaml
         if path.endswith(("openapi.json", "openapi.yaml")):
-            view = vary_on_headers("Accept", "format")(openapi_view)
-            view = cache_page(CACHE_DURATION)(view)
-            response = view(request)
+            response = _document_view(request)
 
             # Set content disposition for download
             filename = "openapi.json" if path.endswith(".json") else "openapi.yaml"
@@ -297,11 +338,7 @@ def _html_on_browser(openapi_view, dataset_schema, response_format: str = "json"
 
         if not is_browser or format == "json" or format == "yaml":
             # Not a browser, give the JSON/YAML view
-            # Add accept and format to the Vary header so cache is
-            # triggered on the json response only
-            view = vary_on_headers("Accept", "format")(openapi_view)
-            view = cache_page(CACHE_DURATION)(view)
-            return view(request, *args, **kwargs)
+            return _document_view(request, *args, **kwargs)
         else:
             # Browser that accepts HTML, showing the browsable view.
             # Using the view so the addressbar path remains the same.
@@ -315,6 +352,19 @@ def _html_on_browser(openapi_view, dataset_schema, response_format: str = "json"
     return _switching_view
 
 
+def _get_server_placeholders(request, servers: list[dict]) -> list[dict]:
+    """Replace the host in the dynamically determined server URL with a placeholder."""
+    base_url = f"{request.scheme}://{request.get_host()}"
+    return [
+        (
+            {**server, "url": server["url"].replace(base_url, SERVER_PLACEHOLDER, 1)}
+            if server.get("description") == DYNAMIC_SERVER_DESCRIPTION
+            else server
+        )
+        for server in servers
+    ]
+
+
 def get_dataset_patterns(dataset_id: str) -> list[URLPattern | URLResolver]:
     """Find the URL patterns for a specific dataset.
 
@@ -370,7 +420,6 @@ class CombinedSchemaView(APIView):
     """
 
     permission_classes = (permissions.AllowAny,)
-    cache_timeout = getattr(settings, "OPENAPI_CACHE_TIMEOUT", 300)
     format = None  # Will be set via as_view()
     renderer_classes = None  # Will be determined dynamically
 
@@ -395,44 +444,56 @@ class CombinedSchemaView(APIView):
         patterns = _get_patterns(matcher=combined_matcher)
         return DynamicApiSchemaGenerator(patterns=patterns)
 
-    @method_decorator(cache_page(cache_timeout))
-    @method_decorator(vary_on_headers("Accept"))
     def get(self, request, *args, **kwargs):
-        """Generate and return the combined OpenAPI schema"""
-        try:
-            generator = self.get_schema_generator(request)
-            schema = generator.get_schema(request=request, public=True)
-
-            if schema:
-                schema.update(
-                    {
-                        "info": {
-                            "title": "DSO-API",
-                            "version": "v1",
-                            "description": "OpenAPI specification for all active datasets.",
-                        },
-                        "servers": [
-                            {
-                                "url": f"{settings.DATAPUNT_API_URL}v1/",
-                                "description": "DSO-API",
-                            }
-                        ],
-                    }
+        """Return the combined OpenAPI schema, which is generated only once."""
+        key = ("openapi", self.format)
+        content_type = f"application/{self.format}"
+        document = openapi_documents.get(key, content_type, self.get_schema_token)
+        if document is None:
+            try:
+                schema = self.get_schema(request)
+            except (ValueError, TypeError, AttributeError, KeyError) as e:
+                logger.exception("Failed to generate OpenAPI specification: %s", e)
+                return JsonResponse(
+                    {"error": "Failed to generate OpenAPI specification"}, status=500
                 )
 
-            # Use the appropriate renderer based on format
-            if self.format == "yaml":
-                response = Response(schema or {}, content_type="application/yaml")
-            else:
-                response = Response(schema or {}, content_type="application/json")
+            document = Document(
+                self.renderer_classes[0]().render(schema),
+                content_type,
+                self.get_schema_token(),
+            )
+            openapi_documents.set(key, document)
 
-            if request.path.endswith((".json", ".yaml")):
-                ext = "json" if request.path.endswith(".json") else "yaml"
-                response["Content-Disposition"] = f'attachment; filename="openapi.{ext}"'
-                response["X-Content-Type-Options"] = "nosniff"
+        response = document.get_response(request)
+        if request.path.endswith((".json", ".yaml")):
+            response["Content-Disposition"] = f'attachment; filename="openapi.{self.format}"'
+            response["X-Content-Type-Options"] = "nosniff"
+        return response
 
-            return response
+    def get_schema_token(self) -> str:
+        """Tell which version of the schemas the document is generated from."""
+        return get_schema_token(get_active_datasets().order_by("name"))
+
+    def get_schema(self, request) -> dict:
+        """Generate the combined OpenAPI schema"""
+        generator = self.get_schema_generator(request)
+        schema = generator.get_schema(request=request, public=True)
 
-        except (ValueError, TypeError, AttributeError, KeyError) as e:
-            logger.exception("Failed to generate OpenAPI specification: %s", e)
-            return JsonResponse({"error": "Failed to generate OpenAPI specification"}, status=500)
+        if schema:
+            schema.update(
+                {
+                    "info": {
+                        "title": "DSO-API",
+                        "version": "v1",
+                        "description": "OpenAPI specification for all active datasets.",
+                    },
+                    "servers": [
+                        {
+                            "url": f"{settings.DATAPUNT_API_URL}v1/",
+                            "description": "DSO-API",
+                        }
+                    ],
+                }
+            )
+        return schema or {}
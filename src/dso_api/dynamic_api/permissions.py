@@ -44,6 +44,21 @@ def check_filter_field_access(field_name: str, field: DatasetFieldSchema, user_s
                 raise PermissionDenied(f"Access denied to filter on: {field_name}")
 
 
+def get_profile_query_params(request, dataset_id: str) -> frozenset[str]:
+    """Tell which query parameters of the request could activate a profile for the dataset.
+    Only these parameters (from the ``mandatoryFilterSets``) change which fields are visible,
+    so any other parameters can be left out of a cache key.
+    """
+    names = {
+        name
+        for profile_dataset in request.user_scopes.get_active_profile_datasets(dataset_id)
+        for profile_table in profile_dataset.tables.values()
+        for filter_set in profile_table.mandatory_filtersets
+        for name in filter_set
+    }
+    return frozenset(name for name, value in request.GET.items() if value and name in names)
+
+
 def _get_table_fields_perm(expanded_field: EmbeddedFieldMatch, user_scopes: UserScopes) -> bool:
     """Do the user_scopes have access for the indicated expanded_field."""
     serializer = expanded_field.embedded_serializer
@@ -0,0 +1,204 @@
+"""Writing vector tiles into a PMTiles archive.
+
+A PMTiles archive is a single file that holds all tiles of a tile pyramid, together with
+a directory to find them. Clients (e.g. MapLibre with the pmtiles plugin) read the tiles
+using HTTP range requests, so the archive can be served by any static file host or CDN.
+
+See https://github.com/protomaps/PMTiles/blob/main/spec/v3/spec.md for the format.
+"""
+
+import gzip
+import hashlib
+import json
+import shutil
+import struct
+from collections.abc import Iterable
+from dataclasses import dataclass
+from enum import IntEnum
+from tempfile import TemporaryFile
+from typing import BinaryIO
+
+HEADER = struct.Struct("<7sB11QBBBBBBiiiiBii")
+MAGIC = b"PMTiles"
+VERSION = 3
+#: The header and root directory are fetched by clients in a single request of this size.
+ROOT_SIZE = 16384
+
+
+class Compression(IntEnum):
+    UNKNOWN = 0
+    NONE = 1
+    GZIP = 2
+    BROTLI = 3
+    ZSTD = 4
+
+
+class TileType(IntEnum):
+    UNKNOWN = 0
+    MVT = 1
+
+
+@dataclass
+class Entry:
+    """A directory entry, which points to the tile data or a leaf directory."""
+
+    tile_id: int
+    offset: int
+    length: int
+    run_length: int
+
+
+def zxy_to_tile_id(z: int, x: int, y: int) -> int:
+    """Give the position of the tile on the Hilbert curve of all zoom levels."""
+    tile_id = ((1 << (z * 2)) - 1) // 3  # number of tiles in all lower zoom levels.
+    n = 1 << z
+    s = n >> 1
+    while s > 0:
+        rx = 1 if x & s else 0
+        ry = 1 if y & s else 0
+        tile_id += s * s * ((3 * rx) ^ ry)
+        if ry == 0:
+            if rx == 1:
+                x = n - 1 - x
+                y = n - 1 - y
+            x, y = y, x
+        s >>= 1
+    return tile_id
+
+
+def write_pmtiles(
+    file: BinaryIO,
+    tiles: Iterable[tuple[int, bytes]],
+    *,
+    metadata: dict,
+    min_zoom: int,
+    max_zoom: int,
+    bounds: list[float],
+    center: list[float],
+    tile_compression: Compression = Compression.GZIP,
+) -> None:
+    """Write the tiles into a PMTiles archive.
+
+    :param file: The output file.
+    :param tiles: The ``(tile_id, data)`` pairs, ordered by tile id.
+    :param metadata: The JSON metadata, e.g. the ``vector_layers`` of the TileJSON format.
+    :param bounds: The bounds as ``[west, south, east, north]``.
+    :param center: The center as ``[longitude, latitude, zoom]``.
+    :param tile_compression: How the tile data is compressed.
+    """
+    with TemporaryFile() as tile_data:
+        entries, counts = _write_tile_data(tile_data, tiles)
+        root, leaves = _build_directories(entries)
+        metadata = gzip.compress(json.dumps(metadata).encode(), mtime=0)
+
+        root_offset = HEADER.size
+        metadata_offset = root_offset + len(root)
+        leaves_offset = metadata_offset + len(metadata)
+        data_offset = leaves_offset + len(leaves)
+        file.write(
+            HEADER.pack(
+                MAGIC,
+                VERSION,
+                root_offset,
+                len(root),
+                metadata_offset,
+                len(metadata),
+                leaves_offset,
+                len(leaves),
+                data_offset,
+                tile_data.tell(),
+                *counts,
+                1,  # clustered: tile data is ordered by tile id.
+                Compression.GZIP,
+                tile_compression,
+                TileType.MVT,
+                min_zoom,
+                max_zoom,
+                *(round(coord * 10_000_000) for coord in bounds),
+                round(center[2]),
+                round(center[0] * 10_000_000),
+                round(center[1] * 10_000_000),
+            )
+        )
+        file.write(root)
+        file.write(metadata)
+        file.write(leaves)
+        tile_data.seek(0)
+        shutil.copyfileobj(tile_data, file)
+
+
+def _write_tile_data(
+    output: BinaryIO, tiles: Iterable[tuple[int, bytes]]
+) -> tuple[list[Entry], tuple[int, int, int]]:
+    """Write the tile data, while collecting the directory entries.
+    Tiles with the same contents (e.g. empty water or full polygon areas) are stored once.
+    """
+    entries = []
+    offsets = {}
+    addressed = 0
+    for tile_id, data in tiles:
+        addressed += 1
+        digest = hashlib.sha256(data).digest()
+        offset = offsets.get(digest)
+        if offset is None:
+            offset = offsets[digest] = output.tell()
+            output.write(data)
+
+        last = entries[-1] if entries else None
+        if last and last.offset == offset and last.tile_id + last.run_length == tile_id:
+            last.run_length += 1
+        else:
+            entries.append(Entry(tile_id, offset, len(data), run_length=1))
+
+    return entries, (addressed, len(entries), len(offsets))
+
+
+def _build_directories(entries: list[Entry]) -> tuple[bytes, bytes]:
+    """Create the root directory, and leaf directories when the root becomes too large."""
+    root = _serialize_directory(entries)
+    if len(root) <= ROOT_SIZE - HEADER.size:
+        return root, b""
+
+    leaf_size = 4096
+    while True:
+        root_entries = []
+        leaves = bytearray()
+        for start in range(0, len(entries), leaf_size):
+            leaf = _serialize_directory(entries[start : start + leaf_size])
+            root_entries.append(Entry(entries[start].tile_id, len(leaves), len(leaf), 0))
+            leaves += leaf
+
+        root = _serialize_directory(root_entries)
+        if len(root) <= ROOT_SIZE - HEADER.size:
+            return root, bytes(leaves)
+        leaf_size = int(leaf_size * 1.2)
+
+
+def _serialize_directory(entries: list[Entry]) -> bytes:
+    """Write the directory entries as column-oriented varints."""
+    data = bytearray()
+    _write_varint(data, len(entries))
+    last_id = 0
+    for entry in entries:
+        _write_varint(data, entry.tile_id - last_id)
+        last_id = entry.tile_id
+    for entry in entries:
+        _write_varint(data, entry.run_length)
+    for entry in entries:
+        _write_varint(data, entry.length)
+    previous = None
+    for entry in entries:
+        if previous and entry.offset == previous.offset + previous.length:
+            _write_varint(data, 0)  # directly follows the previous tile.
+        else:
+            _write_varint(data, entry.offset + 1)
+        previous = entry
+
+    return gzip.compress(data, mtime=0)
+
+
+def _write_varint(data: bytearray, value: int) -> None:
+    while value >= 0x80:
+        data.append((value & 0x7F) | 0x80)
+        value >>= 7
+    data.append(value)
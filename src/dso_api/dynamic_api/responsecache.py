@@ -0,0 +1,152 @@
+"""A cache of the API responses for popular queries.
+
+Map viewers and dashboards request the same listings over and over again
+(e.g. the same filter on ``gebieden/buurten``), which would query the database every time.
+For the tables in the ``API_RESPONSE_CACHE`` setting, the rendered responses are stored
+in the Django cache (which all worker processes share with :class:`dso_api.cache.SQLiteCache`).
+The cached responses are served after the permission checks of the view,
+so each request is still authorized and written to the audit log.
+
+The cache key includes everything that changes the response: the scheme and host
+(as the links are absolute URLs), the path, the query parameters
+(including the filters that are given as ``DSO-...`` headers), the ``Accept`` and
+``Accept-Crs`` headers, the scopes and database role of the user, and the data version
+of the table (see :func:`~dso_api.dynamic_api.tilecache.get_table_version`).
+Hence, a change of the table data makes the cached responses of that table unreachable.
+Embedded objects of other tables are only refreshed after the timeout of the table.
+
+Responses that are larger than ``API_RESPONSE_CACHE_MAX_SIZE`` are not stored;
+streaming responses are collected while they're sent to the client,
+and skipped once they exceed that size.
+"""
+
+import hashlib
+import logging
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+from django.http import HttpRequest, HttpResponse, HttpResponseBase
+from django.utils.timezone import now
+from schematools.contrib.django.models import DynamicModel
+
+from dso_api.dynamic_api.filters.parser import QueryFilterEngine
+from dso_api.dynamic_api.tilecache import get_table_version
+from dso_api.dynamic_api.utils import get_database_role
+
+logger = logging.getLogger(__name__)
+
+#: The headers that are set for each request, instead of being stored.
+UNCACHED_HEADERS = {"cache-control", "expires"}
+
+
+class CachedHttpResponse(HttpResponse):
+    """A response that is served from the cache (it's already finalized by the view)."""
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """A response as it's stored in the cache."""
+
+    status: int
+    headers: tuple[tuple[str, str], ...]
+    content: bytes
+
+    def get_response(self) -> CachedHttpResponse:
+        """Recreate the response."""
+        response = CachedHttpResponse(self.content, status=self.status)
+        for name, value in self.headers:
+            response.headers[name] = value
+        return response
+
+
+def get_response_cache_timeout(model: type[DynamicModel]) -> int | None:
+    """Tell how long the responses of a table are cached (``None`` means not at all)."""
+    table_schema = model.table_schema()
+    return settings.API_RESPONSE_CACHE.get(f"{table_schema.dataset.id}.{table_schema.id}")
+
+
+def get_response_cache_key(request: HttpRequest, model: type[DynamicModel]) -> str:
+    """Tell how the response for this request is stored in the cache."""
+    using = router.db_for_read(model)
+    scopes = getattr(request, "get_token_scopes", None) or ()
+    parts = (
+        # The HAL links in the response are absolute URLs.
+        request.build_absolute_uri("/"),
+        request.path,
+        sorted(request.GET.lists()),
+        sorted(QueryFilterEngine.get_dso_headers(request).lists()),
+        request.headers.get("Accept", ""),
+        request.headers.get("Accept-Crs", ""),
+        sorted(set(scopes)),
+        # The database role of the end-user could restrict which rows are visible.
+        get_database_role(using) if settings.DATABASE_SET_ROLE else "",
+        # Temporal tables are filtered on the current date by default.
+        now().date().isoformat(),
+        get_table_version(model, using=using),
+    )
+    digest = hashlib.sha1(repr(parts).encode(), usedforsecurity=False).hexdigest()
+    return f"dso_api.responses.{model._meta.db_table}.{digest}"
+
+
+def get_cached_response(key: str) -> CachedHttpResponse | None:
+    """Provide the cached response, or ``None`` when it's not cached."""
+    cached = cache.get(key)
+    return cached.get_response() if cached is not None else None
+
+
+def cache_response(response: HttpResponseBase, key: str, timeout: int) -> None:
+    """Store the response once it's rendered.
+    A streaming response is stored after it's completely sent to the client.
+    """
+    # The headers are copied before any middleware adds its headers (e.g. Content-Encoding).
+    if response.streaming:
+        response.streaming_content = _collect_stream(
+            response.streaming_content,
+            key,
+            timeout,
+            status=response.status_code,
+            headers=tuple(response.items()),
+        )
+    elif hasattr(response, "add_post_render_callback"):
+        # The content type of a REST Framework response is only known once it's rendered.
+        response.add_post_render_callback(partial(_store_response, key=key, timeout=timeout))
+    else:
+        _store_response(response, key, timeout)
+
+
+def _collect_stream(
+    stream: Iterable[bytes], key: str, timeout: int, status: int, headers
+) -> Iterator[bytes]:
+    """Pass the streaming content through, and store it once it's completely read."""
+    max_size = settings.API_RESPONSE_CACHE_MAX_SIZE
+    chunks = []
+    size = 0
+    for chunk in stream:
+        if chunks is not None:
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > max_size:
+                chunks = None  # Stop collecting, still stream the rest.
+        yield chunk
+
+    if chunks is not None:
+        _store(key, timeout, status, headers, b"".join(chunks))
+
+
+def _store_response(response: HttpResponseBase, key: str, timeout: int) -> None:
+    _store(key, timeout, response.status_code, tuple(response.items()), response.content)
+
+
+def _store(key: str, timeout: int, status: int, headers, content: bytes) -> None:
+    if len(content) > settings.API_RESPONSE_CACHE_MAX_SIZE:
+        logger.debug("Not caching %s, response of %d bytes is too large", key, len(content))
+        return
+
+    headers = tuple(
+        (name, value) for name, value in headers if name.lower() not in UNCACHED_HEADERS
+    )
+    cache.set(key, CachedResponse(status, headers, content), timeout=timeout)
@@ -47,6 +47,7 @@ from .serializers import clear_serializer_factory_cache
 from .utils import get_view_name
 from .views import (
     APIIndexView,
+    DatasetCompositeMVTView,
     DatasetDocView,
     DatasetMVTSingleView,
     DatasetMVTView,
@@ -516,6 +517,24 @@ class DynamicRouter(NestedDefaultRouter):
                     kwargs={"dataset_name": dataset_id, "dataset_version": DEFAULT},
                 )
             ),
+            results.append(
+                path(
+                    f"/mvt/{dataset.path}/<int:z>/<int:x>/<int:y>.pbf",
+                    DatasetCompositeMVTView.as_view(),
+                    name="mvt-pbf-dataset",
+                    kwargs={"dataset_name": dataset_id, "dataset_version": DEFAULT},
+                )
+            )
+            # These come before the table tiles, which would also match the version as table name.
+            results.extend(
+                path(
+                    f"/mvt/{dataset.path}/{vmajor}/<int:z>/<int:x>/<int:y>.pbf",
+                    DatasetCompositeMVTView.as_view(),
+                    name="mvt-pbf-dataset-version",
+                    kwargs={"dataset_name": dataset_id, "dataset_version": vmajor},
+                )
+                for vmajor in dataset.schema.versions
+            )
             results.append(
                 path(
                     f"/mvt/{dataset.path}/<table_name>/<int:z>/<int:x>/<int:y>.pbf",
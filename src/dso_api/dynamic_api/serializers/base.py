@@ -360,6 +360,19 @@ class DynamicSerializer(FieldAccessMixin, DSOModelSerializer):
 
         return representation
 
+    def supports_sql_export(self) -> bool:
+        """Tell whether the database can render the fields directly.
+        This is not possible when row level authorization applies, and for temporal
+        relations as a plain foreign key join doesn't select the correct temporal slice.
+        """
+        if self.table_schema.rla:
+            return False
+        elif self.parent is not None and not isinstance(self.parent, serializers.ListSerializer):
+            # Embedded object
+            return not self.Meta.model.is_temporal()
+        else:
+            return True
+
     @cached_property
     def expanded_fields(self) -> list[EmbeddedFieldMatch]:
         """Filter unauthorized fields from the matched expands."""
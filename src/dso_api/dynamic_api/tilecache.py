@@ -0,0 +1,387 @@
+"""A persistent cache for the rendered vector tiles.
+
+Rendering a tile with ``ST_AsMVT()`` is expensive, while the same tiles are requested
+over and over again by map viewers. The rendered tiles are stored gzip-compressed
+in an SQLite database, so all worker processes (and restarts) share the same cache.
+
+Each tile is stored with the data version of its table (see :func:`get_table_version`).
+When the data of a table changes, all tiles of that table are discarded on the next request.
+Tables that are updated in place can count their writes with a trigger
+(see the ``track_table_versions`` command), so read replicas also notice those changes.
+The least recently used tiles are removed once the cache exceeds its maximum size.
+
+The cache is configured with the ``MVT_CACHE_PATH``, ``MVT_CACHE_MAX_SIZE``,
+``MVT_CACHE_MAX_TILE_SIZE`` and ``MVT_CACHE_TIMEOUT`` settings.
+"""
+
+import hashlib
+import logging
+import threading
+import zlib
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, replace
+from functools import cache
+from pathlib import Path
+from time import time
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import DEFAULT_DB_ALIAS, connections, router
+from django.db.models import Model
+from django.dispatch import receiver
+from schematools.contrib.django.signals import dynamic_models_removed
+
+from dso_api.sqlitestore import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tiles (
+    key TEXT PRIMARY KEY,
+    table_id TEXT NOT NULL,
+    data_version TEXT NOT NULL,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tiles_table_id ON tiles (table_id, data_version);
+CREATE INDEX IF NOT EXISTS tiles_accessed ON tiles (accessed);
+CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO stats VALUES ('size', 0), ('hits', 0), ('misses', 0);
+CREATE TRIGGER IF NOT EXISTS tiles_insert AFTER INSERT ON tiles BEGIN
+    UPDATE stats SET value = value + new.size WHERE name = 'size';
+END;
+CREATE TRIGGER IF NOT EXISTS tiles_delete AFTER DELETE ON tiles BEGIN
+    UPDATE stats SET value = value - old.size WHERE name = 'size';
+END;
+"""
+
+# The data version changes on every table swap, truncate, vacuum full or write.
+# The writes are counted by the version trigger of the table (see add_version_trigger()),
+# which is replicated like the data itself. For tables without this trigger, the statistics
+# counters are used. These are only updated on the primary server, and are reported by
+# PostgreSQL with a small delay after the transaction commits.
+TABLE_VERSION_SQL = """
+SELECT
+    c.oid,
+    t.tgrelid IS NOT NULL,
+    concat_ws(
+        ':',
+        c.oid,
+        pg_relation_filenode(c.oid),
+        pg_relation_size(c.oid),
+        CASE WHEN t.tgrelid IS NOT NULL THEN ({counter})::text ELSE concat_ws(
+            ':',
+            pg_stat_get_tuples_inserted(c.oid) + pg_stat_get_xact_tuples_inserted(c.oid),
+            pg_stat_get_tuples_updated(c.oid) + pg_stat_get_xact_tuples_updated(c.oid),
+            pg_stat_get_tuples_deleted(c.oid) + pg_stat_get_xact_tuples_deleted(c.oid)
+        ) END
+    )
+FROM pg_class c
+LEFT JOIN pg_trigger t ON t.tgrelid = c.oid AND t.tgname = 'dso_table_version'
+WHERE c.oid = ANY(%s::regclass[])
+ORDER BY c.oid
+"""
+
+COUNTER_SQL = "SELECT v.version FROM dso_table_versions v WHERE v.table_oid = c.oid"
+
+# The trigger function runs as its owner, so the importing users don't need extra grants.
+VERSION_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS dso_table_versions (
+    table_oid oid PRIMARY KEY,
+    version bigint NOT NULL
+);
+GRANT SELECT ON dso_table_versions TO PUBLIC;
+CREATE OR REPLACE FUNCTION dso_count_table_version() RETURNS trigger
+LANGUAGE plpgsql SECURITY DEFINER SET search_path = public AS $$
+BEGIN
+    INSERT INTO dso_table_versions VALUES (TG_RELID, 1)
+    ON CONFLICT (table_oid) DO UPDATE SET version = dso_table_versions.version + 1;
+    RETURN NULL;
+END;
+$$;
+"""
+
+VERSION_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS dso_table_version ON {table};
+CREATE TRIGGER dso_table_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+FOR EACH STATEMENT EXECUTE FUNCTION dso_count_table_version();
+"""
+
+#: How often the hit/miss counters of this process are added to the shared statistics.
+STATS_INTERVAL = 10
+
+
+def get_table_version(*models: type[Model], using: str | None = None) -> str:
+    """Tell which version of the table data is currently in the database.
+    The returned value changes whenever one of the tables is modified.
+    """
+    using = using or router.db_for_read(models[0])
+    tables = [connections[using].ops.quote_name(model._meta.db_table) for model in models]
+    rows = _read_table_versions(using, tables)
+    if using != DEFAULT_DB_ALIAS and not all(tracked for _oid, tracked, _version in rows):
+        # Without the version trigger, a replica can't tell whether rows were updated,
+        # as the statistics counters are only updated on the primary server.
+        rows = _read_table_versions(DEFAULT_DB_ALIAS, tables)
+    return ",".join(version for _oid, _tracked, version in rows)
+
+
+def _read_table_versions(using: str, tables: list[str]) -> list[tuple[int, bool, str]]:
+    counter = COUNTER_SQL if has_version_table(using) else "NULL"
+    with connections[using].cursor() as cursor:
+        cursor.execute(TABLE_VERSION_SQL.format(counter=counter), [tables])
+        return cursor.fetchall()
+
+
+@cache
+def has_version_table(using: str) -> bool:
+    """Tell whether the database has the table with the counters of the version triggers."""
+    with connections[using].cursor() as cursor:
+        cursor.execute("SELECT to_regclass('dso_table_versions') IS NOT NULL")
+        return cursor.fetchone()[0]
+
+
+def add_version_trigger(model: type[Model]) -> None:
+    """Let the writes to the table be counted in a table, which replicas also see.
+    Note the trigger is lost when a table is replaced during a data import.
+    """
+    connection = connections[router.db_for_write(model)]
+    with connection.cursor() as cursor:
+        cursor.execute(VERSION_TABLE_SQL)
+        cursor.execute(
+            VERSION_TRIGGER_SQL.format(table=connection.ops.quote_name(model._meta.db_table))
+        )
+    has_version_table.cache_clear()
+
+
+def drop_version_trigger(model: type[Model]) -> None:
+    """Remove the version trigger of the table."""
+    connection = connections[router.db_for_write(model)]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DROP TRIGGER IF EXISTS dso_table_version"
+            f" ON {connection.ops.quote_name(model._meta.db_table)}"
+        )
+
+
+# When models are removed (e.g. reloaded), check again whether the triggers are installed.
+dynamic_models_removed.connect(lambda **kwargs: has_version_table.cache_clear())
+
+
+@dataclass(frozen=True)
+class TileKey:
+    """The identification of a cached tile."""
+
+    #: The table that the tile data is read from, e.g. the ``db_table`` of the model.
+    #: Tiles that combine multiple tables use the joined table names.
+    table_id: str
+    #: The path of the tile (e.g. dataset/version/table/z/x/y).
+    path: str
+    #: Distinguishes the tile contents for different users (e.g. a hash of the fields).
+    variant: str
+    #: The data version of the table; tiles of an older version are no longer used.
+    data_version: str
+
+    def __str__(self):
+        return f"{self.path}/{self.variant}"
+
+    def for_tile(self, z, x, y) -> TileKey:
+        """Provide the key of another tile, with the same table, variant and data version.
+        This expects the path to end with the z/x/y numbers of the tile.
+        """
+        base_path = self.path.rsplit("/", 3)[0]
+        return replace(self, path=f"{base_path}/{z}/{x}/{y}")
+
+
+def get_version_token(data_version: str) -> str:
+    """Provide a short token of the data version, to include in the tile URLs."""
+    return hashlib.sha1(data_version.encode(), usedforsecurity=False).hexdigest()[:12]
+
+
+def get_tile_etag(key: TileKey) -> str:
+    """Provide the ETag of a tile.
+    The tile only changes when the data version or the variant changes,
+    so the ETag is known without rendering the tile.
+    """
+    value = f"{key}|{key.data_version}".encode()
+    return f'"{hashlib.sha1(value, usedforsecurity=False).hexdigest()[:24]}"'
+
+
+class TileCache:
+    """Storage of gzip-compressed tiles in an SQLite database.
+
+    The database is shared between processes (see :class:`~dso_api.sqlitestore.SQLiteStore`).
+    An empty tile is stored as empty value, so a "204 No Content" can also be cached.
+    """
+
+    def __init__(
+        self, path: str | Path, max_size: int, max_tile_size: int | None = None, timeout=None
+    ):
+        self.max_size = max_size
+        self.max_tile_size = max_tile_size or max_size // 10
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._unsaved_stats = {"hits": 0, "misses": 0}
+        self._stats_saved = time()
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.store = SQLiteStore(path, SCHEMA, table="tiles", max_size=max_size)
+
+    def get(self, key: TileKey) -> bytes | None:
+        """Retrieve the gzip-compressed tile, or ``None`` when it's not cached.
+        An empty tile is returned as ``b""``.
+        """
+        self._check_version(key)
+        row = self.store.connection.execute(
+            "SELECT data, created, accessed FROM tiles WHERE key = ? AND data_version = ?",
+            (str(key), key.data_version),
+        ).fetchone()
+
+        if row is None or (self.timeout and row[1] < time() - self.timeout):
+            self._count("misses")
+            return None
+
+        self.store.mark_accessed(str(key), row[2])
+        self._count("hits")
+        return row[0]
+
+    def has(self, key: TileKey) -> bool:
+        """Tell whether the tile is cached, without counting this as a hit or miss."""
+        self._check_version(key)
+        row = self.store.connection.execute(
+            "SELECT created FROM tiles WHERE key = ? AND data_version = ?",
+            (str(key), key.data_version),
+        ).fetchone()
+        return row is not None and not (self.timeout and row[0] < time() - self.timeout)
+
+    def set(self, key: TileKey, data: bytes) -> None:
+        """Store the gzip-compressed tile."""
+        if len(data) > self.max_tile_size:
+            return
+
+        now = time()
+        with self.store.transaction() as connection:
+            connection.execute("DELETE FROM tiles WHERE key = ?", (str(key),))
+            connection.execute(
+                "INSERT INTO tiles VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (str(key), key.table_id, key.data_version, data, len(data), now, now),
+            )
+        self.store.evict()
+
+    def write(self, key: TileKey, stream: Iterable[bytes]) -> Iterator[bytes]:
+        """Pass the streaming tile content through, and store it once it's completely read.
+        When the tile is too large to be stored, nothing is written to the cache.
+        """
+        compressor = _gzip_compressor()
+        compressed = []
+        size = 0
+        for chunk in stream:
+            if compressed is not None:
+                compressed.append(compressor.compress(chunk))
+                size += len(chunk)
+                if size > self.max_tile_size:
+                    compressed = None  # Stop collecting, still stream the rest.
+            yield chunk
+
+        if compressed is not None:
+            compressed.append(compressor.flush())
+            self.set(key, b"".join(compressed) if size else b"")
+
+    def invalidate(self, table_id: str) -> None:
+        """Remove all tiles of a table."""
+        with self.store.transaction() as connection:
+            connection.execute("DELETE FROM tiles WHERE table_id = ?", (table_id,))
+        self._versions.pop(table_id, None)
+
+    def clear(self) -> None:
+        """Remove all tiles."""
+        with self.store.transaction() as connection:
+            connection.execute("DELETE FROM tiles")
+        self._versions.clear()
+
+    def get_stats(self) -> dict:
+        """Provide the statistics of the cache, combined for all processes."""
+        self._save_stats()
+        stats = self.store.get_stats()
+        (count,) = self.store.connection.execute("SELECT count(*) FROM tiles").fetchone()
+        total = stats["hits"] + stats["misses"]
+        return {
+            "hits": stats["hits"],
+            "misses": stats["misses"],
+            "hit_ratio": round(stats["hits"] / total, 3) if total else None,
+            "tiles": count,
+            "size": stats["size"],
+            "max_size": self.max_size,
+        }
+
+    def _check_version(self, key: TileKey) -> None:
+        """Remove the tiles of the table when a new data version is seen."""
+        if self._versions.get(key.table_id) == key.data_version:
+            return
+
+        with self.store.transaction() as connection:
+            connection.execute(
+                "DELETE FROM tiles WHERE table_id = ? AND data_version != ?",
+                (key.table_id, key.data_version),
+            )
+        self._versions[key.table_id] = key.data_version
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+            self._unsaved_stats[name] += 1
+        if self._stats_saved < time() - STATS_INTERVAL:
+            self._save_stats()
+
+    def _save_stats(self) -> None:
+        with self._lock:
+            stats = self._unsaved_stats
+            self._unsaved_stats = {"hits": 0, "misses": 0}
+            self._stats_saved = time()
+
+        with self.store.transaction() as connection:
+            connection.executemany(
+                "UPDATE stats SET value = value + ? WHERE name = ?",
+                [(value, name) for name, value in stats.items()],
+            )
+
+
+def compress_tile(data: bytes) -> bytes:
+    """Compress the tile in the same way as the cache stores it."""
+    compressor = _gzip_compressor()
+    return compressor.compress(data) + compressor.flush()
+
+
+def _gzip_compressor():
+    return zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+@cache
+def get_tile_cache() -> TileCache | None:
+    """Provide the tile cache, or ``None`` when it's not configured."""
+    if not settings.MVT_CACHE_PATH:
+        return None
+
+    return TileCache(
+        settings.MVT_CACHE_PATH,
+        max_size=settings.MVT_CACHE_MAX_SIZE,
+        max_tile_size=settings.MVT_CACHE_MAX_TILE_SIZE,
+        timeout=settings.MVT_CACHE_TIMEOUT,
+    )
+
+
+@receiver(setting_changed)
+def _setting_changed(sender, setting, **kwargs):
+    """Make sure a new cache is created when the settings are changed (e.g. in tests)."""
+    if setting.startswith("MVT_CACHE_"):
+        get_tile_cache.cache_clear()
+
+
+def check_tile_cache() -> dict:
+    """Health check that reports the tile cache statistics (e.g. the hit/miss counters)."""
+    tile_cache = get_tile_cache()
+    if tile_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **tile_cache.get_stats()}
@@ -0,0 +1,124 @@
+"""Precomputed Web Mercator geometries for the vector tiles.
+
+Vector tiles are rendered in Web Mercator (EPSG:3857), while the tables store their
+geometries in the Dutch RD coordinate system (EPSG:28992). Instead of reprojecting each
+row while rendering a tile, the ``prepare_tile_geometries`` command adds generated columns
+with the projected geometry, and (optionally) pre-generalized variants per zoom band.
+PostgreSQL keeps these columns up-to-date on every write, and each has its own GiST index.
+
+The vector tile layers use these columns when they exist in the table:
+
+* ``{column}_3857``: the projected geometry.
+* ``{column}_3857_z{max_zoom}``: the projected geometry, simplified for the zoom rule
+  that applies up to ``max_zoom``.
+
+Note these columns are lost when a table is replaced during a data import,
+so the command should run again after such import.
+"""
+
+import logging
+import re
+
+from django.db import connections, router
+from django.db.backends.utils import truncate_name
+from django.db.models import Model
+
+logger = logging.getLogger(__name__)
+
+#: The coordinate system of the vector tiles.
+TILE_SRID = 3857
+
+COLUMNS_SQL = """
+SELECT attname FROM pg_attribute
+WHERE attrelid = to_regclass(%s) AND attnum > 0 AND NOT attisdropped AND attname LIKE %s
+"""
+
+
+def get_column_name(geom_column: str, max_zoom: int | None = None) -> str:
+    """Tell how the projected column of a geometry is named."""
+    name = f"{geom_column}_{TILE_SRID}"
+    return name if max_zoom is None else f"{name}_z{max_zoom}"
+
+
+def get_projected_columns(
+    model: type[Model], geom_column: str, using: str | None = None
+) -> dict[int | None, str]:
+    """Find which projected columns the table has.
+
+    :returns: The column names by the ``max_zoom`` of their zoom rule,
+        the fully detailed projection has ``None`` as key.
+    """
+    using = using or router.db_for_read(model)
+    connection = connections[using]
+    base_name = get_column_name(geom_column)
+    pattern = re.compile(rf"{re.escape(base_name)}(?:_z(\d+))?")
+    with connection.cursor() as cursor:
+        # This is a quick lookup in the system catalog.
+        # Its result isn't cached, as table swaps during imports remove the columns.
+        cursor.execute(
+            COLUMNS_SQL,
+            [connection.ops.quote_name(model._meta.db_table), f"{base_name}%"],
+        )
+        columns = {}
+        for (name,) in cursor:
+            if match := pattern.fullmatch(name):
+                max_zoom = match.group(1)
+                columns[int(max_zoom) if max_zoom else None] = name
+        return columns
+
+
+def add_projected_columns(
+    model: type[Model], geom_column: str, tolerances: dict[int, float]
+) -> list[str]:
+    """Add the generated columns with the projected geometry, and their indexes.
+
+    :param tolerances: The simplification tolerance (in meters) by the zoom band
+        (the ``max_zoom`` of the zoom rule) to add a pre-generalized column for.
+    :returns: The names of the added columns.
+    """
+    connection = connections[router.db_for_write(model)]
+    quote_name = connection.ops.quote_name
+    db_table = model._meta.db_table
+    existing = get_projected_columns(model, geom_column, using=connection.alias)
+    projected = f"ST_Transform({quote_name(geom_column)}, {TILE_SRID})"
+
+    expressions = {None: projected}
+    for max_zoom, tolerance in tolerances.items():
+        expressions[max_zoom] = f"ST_Simplify({projected}, {float(tolerance)}, true)"
+
+    added = []
+    with connection.cursor() as cursor:
+        for max_zoom, expression in expressions.items():
+            if max_zoom in existing:
+                continue
+
+            column = get_column_name(geom_column, max_zoom)
+            index = truncate_name(f"{db_table}_{column}_idx", connection.ops.max_name_length())
+            logger.info("Adding column %s.%s", db_table, column)
+            cursor.execute(
+                f"ALTER TABLE {quote_name(db_table)} ADD COLUMN {quote_name(column)}"
+                f" geometry(Geometry, {TILE_SRID}) GENERATED ALWAYS AS ({expression}) STORED"
+            )
+            cursor.execute(
+                f"CREATE INDEX {quote_name(index)}"
+                f" ON {quote_name(db_table)} USING gist ({quote_name(column)})"
+            )
+            added.append(column)
+
+    return added
+
+
+def drop_projected_columns(model: type[Model], geom_column: str) -> list[str]:
+    """Remove the projected columns of the geometry (their indexes are removed with them).
+
+    :returns: The names of the removed columns.
+    """
+    connection = connections[router.db_for_write(model)]
+    quote_name = connection.ops.quote_name
+    db_table = model._meta.db_table
+    columns = list(get_projected_columns(model, geom_column, using=connection.alias).values())
+    with connection.cursor() as cursor:
+        for column in columns:
+            logger.info("Removing column %s.%s", db_table, column)
+            cursor.execute(f"ALTER TABLE {quote_name(db_table)} DROP COLUMN {quote_name(column)}")
+    return columns
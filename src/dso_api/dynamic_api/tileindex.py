@@ -0,0 +1,173 @@
+"""An index of the tiles where a table has features.
+
+Many datasets only cover a part of the city, while map viewers request all tiles within
+their view. The index tells which tiles can't have features, so those requests are answered
+without querying the table. It holds the extent of the table, and the tiles at
+:data:`INDEX_ZOOM` that the bounding boxes of its features overlap.
+
+The index is built once per data version of the tables (see :func:`get_table_version`),
+and kept in the memory of each process. It's also stored in the Django cache, so the other
+worker processes use it when a shared cache is configured (see :mod:`dso_api.cache`).
+Building the index reads the whole table, so only one request builds it;
+the other requests don't wait for it, and query the tables without using the index.
+"""
+
+import logging
+import math
+import threading
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+from django.core.cache import cache
+from django.db import connections, router
+from django.db.models import Model
+from schematools.contrib.django.signals import dynamic_models_removed
+
+logger = logging.getLogger(__name__)
+
+#: The zoom level of the tiles in the index.
+#: At this level, a tile covers about 1.5km in Amsterdam.
+INDEX_ZOOM = 14
+
+#: The width of the world in Web Mercator (EPSG:3857) meters.
+WORLD_SIZE = 2 * math.pi * 6378137
+
+# Each feature adds the tiles that its bounding box overlaps (or touches).
+# The coordinates are counted from the top-left corner of the world, like tile numbers.
+TILES_SQL = """
+SELECT DISTINCT x, y FROM (
+    SELECT
+        floor((ST_XMin(box) + %(half)s - %(margin)s) / %(size)s)::int AS x0,
+        floor((ST_XMax(box) + %(half)s + %(margin)s) / %(size)s)::int AS x1,
+        floor((%(half)s - ST_YMax(box) - %(margin)s) / %(size)s)::int AS y0,
+        floor((%(half)s - ST_YMin(box) + %(margin)s) / %(size)s)::int AS y1
+    FROM (SELECT Box2D(ST_Transform({column}, 3857)) AS box FROM {table}) AS features
+    WHERE box IS NOT NULL
+) AS ranges, generate_series(x0, x1) AS x, generate_series(y0, y1) AS y
+"""
+
+EXTENT_SQL = """
+SELECT ST_XMin(extent), ST_YMin(extent), ST_XMax(extent), ST_YMax(extent)
+FROM (SELECT ST_Extent(ST_Transform({column}, 4326)) AS extent FROM {table}) AS features
+"""
+
+#: How long other processes skip the index while one process builds it (in seconds).
+BUILD_TIMEOUT = 600
+
+
+@dataclass(frozen=True)
+class TileIndex:
+    """Which tiles at :data:`INDEX_ZOOM` have features."""
+
+    #: The extent of the features in WGS84 (lon/lat), or ``None`` when there are none.
+    bounds: tuple[float, float, float, float] | None
+    #: The (x, y) numbers of the tiles that may contain features.
+    tiles: frozenset[tuple[int, int]]
+
+    def may_have_features(self, z: int, x: int, y: int) -> bool:
+        """Tell whether the tile could have features, so it's worth querying."""
+        if z >= INDEX_ZOOM:
+            shift = z - INDEX_ZOOM
+            return (x >> shift, y >> shift) in self.tiles
+
+        # The tile covers a square of tiles at the index level.
+        shift = INDEX_ZOOM - z
+        return any((tx >> shift, ty >> shift) == (x, y) for tx, ty in self.tiles)
+
+
+#: The index of the tables, with the data version it was built for.
+_cache: dict[str, tuple[str, TileIndex]] = {}
+#: The indexes that a thread of this process is building.
+_building: set[str] = set()
+_lock = threading.Lock()
+
+
+def get_tile_index(
+    models: Sequence[tuple[type[Model], str]],
+    data_version: str,
+    using: str | None = None,
+    variant: str = "",
+) -> TileIndex | None:
+    """Provide the index of the tiles where the tables have features.
+
+    :param models: The models to index, with the name of their geometry column.
+    :param data_version: The data version of the tables, the index is rebuilt when it changes.
+    :param variant: Distinguishes the index for users that see different rows
+        (e.g. the database role).
+    :returns: The index, or ``None`` while another request builds the index.
+    """
+    key = _get_index_key(models, variant)
+    cached = _cache.get(key)
+    if cached is not None and cached[0] == data_version:
+        return cached[1]
+
+    # Another worker process could have built the index already.
+    cache_key = f"dso_api.tileindex.{key}.{data_version}"
+    tile_index = cache.get(cache_key)
+    if tile_index is None:
+        with _lock:
+            if key in _building:
+                return None
+            _building.add(key)
+
+        try:
+            if not cache.add(f"{cache_key}.building", True, timeout=BUILD_TIMEOUT):
+                return None  # Another process is building it.
+            try:
+                tile_index = _build_tile_index(models, using)
+                cache.set(cache_key, tile_index)
+            finally:
+                cache.delete(f"{cache_key}.building")
+        finally:
+            with _lock:
+                _building.discard(key)
+
+    _cache[key] = (data_version, tile_index)
+    return tile_index
+
+
+def clear_tile_index_cache():
+    _cache.clear()
+    _building.clear()
+
+
+# When models are removed, clear the cache.
+dynamic_models_removed.connect(lambda **kwargs: clear_tile_index_cache())
+
+
+def _get_index_key(models: Sequence[tuple[type[Model], str]], variant: str) -> str:
+    return "+".join(model._meta.db_table for model, _column in models) + f"|{variant}"
+
+
+def _build_tile_index(models: Sequence[tuple[type[Model], str]], using: str | None) -> TileIndex:
+    using = using or router.db_for_read(models[0][0])
+    connection = connections[using]
+    size = WORLD_SIZE / (1 << INDEX_ZOOM)
+    tiles = set()
+    extents = []
+    with connection.cursor() as cursor:
+        for model, column in models:
+            names = {
+                "table": connection.ops.quote_name(model._meta.db_table),
+                "column": connection.ops.quote_name(column),
+            }
+            cursor.execute(
+                TILES_SQL.format(**names), {"half": WORLD_SIZE / 2, "size": size, "margin": 0.01}
+            )
+            tiles.update(cursor.fetchall())
+            cursor.execute(EXTENT_SQL.format(**names))
+            if (extent := cursor.fetchone())[0] is not None:
+                extents.append(extent)
+
+    logger.debug("Indexed %d tiles of %s", len(tiles), [m._meta.db_table for m, _ in models])
+    bounds = (
+        (
+            min(e[0] for e in extents),
+            min(e[1] for e in extents),
+            max(e[2] for e in extents),
+            max(e[3] for e in extents),
+        )
+        if extents
+        else None
+    )
+    return TileIndex(bounds=bounds, tiles=frozenset(tiles))
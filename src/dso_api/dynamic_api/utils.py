@@ -3,7 +3,7 @@ from collections.abc import Iterable
 from datetime import datetime
 from functools import lru_cache
 
-from django.db import models
+from django.db import connections, models
 from django.db.models import Model
 from django.db.models.fields.related import RelatedField
 from django.db.models.fields.reverse_related import ForeignObjectRel
@@ -210,3 +210,10 @@ def get_status_description(status: str, end_support_date: datetime.date | None =
     if status == "superseded":
         status_description += f": einde support {end_support_date.strftime('%d-%m-%Y')}"
     return status_description
+
+
+def get_database_role(using: str) -> str:
+    """Tell which database role is used for the current request."""
+    with connections[using].cursor() as cursor:
+        cursor.execute("SELECT current_user")
+        return cursor.fetchone()[0]
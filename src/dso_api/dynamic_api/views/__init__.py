@@ -3,13 +3,20 @@
 from .api import DynamicApiViewSet, viewset_factory
 from .doc import DatasetDocView, DocsIndexView
 from .index import APIIndexView
-from .mvt import DatasetMVTIndexView, DatasetMVTSingleView, DatasetMVTView, DatasetTileJSONView
+from .mvt import (
+    DatasetCompositeMVTView,
+    DatasetMVTIndexView,
+    DatasetMVTSingleView,
+    DatasetMVTView,
+    DatasetTileJSONView,
+)
 from .oauth import oauth2_redirect
 from .wfs import DatasetWFSIndexView, DatasetWFSView
 
 __all__ = (
     "DynamicApiViewSet",
     "APIIndexView",
+    "DatasetCompositeMVTView",
     "DatasetDocView",
     "DatasetMVTView",
     "DatasetMVTIndexView",
@@ -16,16 +16,22 @@ from functools import cached_property
 
 from django.db import models
 from django.db.utils import DatabaseError, InternalError, ProgrammingError
-from django.utils.decorators import method_decorator
 from django.utils.translation import gettext as _
-from django.views.decorators.cache import never_cache
 from rest_framework import viewsets
 from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 from schematools.contrib.django.models import DynamicModel
 
 from dso_api.dynamic_api import filters, permissions, serializers
+from dso_api.dynamic_api.cdn import add_cdn_cache_headers
 from dso_api.dynamic_api.constants import DEFAULT
 from dso_api.dynamic_api.nesting import NestedViewSetMixin
+from dso_api.dynamic_api.responsecache import (
+    CachedHttpResponse,
+    cache_response,
+    get_cached_response,
+    get_response_cache_key,
+    get_response_cache_timeout,
+)
 from dso_api.dynamic_api.temporal import TemporalTableQuery
 from dso_api.dynamic_api.utils import limit_queryset_for_scopes
 from rest_framework_dso.serializers import DSOQueryParamSerializer
@@ -34,7 +40,6 @@ from rest_framework_dso.views import DSOViewMixin
 logger = logging.getLogger(__name__)
 
 
-@method_decorator(never_cache, name="dispatch")
 class DynamicApiViewSet(NestedViewSetMixin, DSOViewMixin, viewsets.ReadOnlyModelViewSet):
     """Viewset for an API, that is DSO-compatible and dynamically generated.
     Each dynamically generated model in this server will receive a viewset.
@@ -47,6 +52,8 @@ class DynamicApiViewSet(NestedViewSetMixin, DSOViewMixin, viewsets.ReadOnlyModel
     dataset_id = None
     #: The table ID is filled in by the factory
     table_id = None
+    #: The dataset version is filled in by the factory
+    dataset_version = DEFAULT
     #: The model is filled in by the factory
     model: type[DynamicModel] = None
 
@@ -67,7 +74,32 @@ class DynamicApiViewSet(NestedViewSetMixin, DSOViewMixin, viewsets.ReadOnlyModel
     # The 'bronhouder' of the associated dataset
     authorization_grantor: str = None
 
+    #: The key of the response in the response cache, when it's enabled for this table.
+    response_cache_key: str | None = None
+
+    def dispatch(self, request, *args, **kwargs):
+        """Tell whether browsers and the CDN may cache the response."""
+        response = super().dispatch(request, *args, **kwargs)
+        add_cdn_cache_headers(response, request, self.model, version=self.dataset_version)
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Store the finalized response in the response cache, when it's enabled."""
+        if isinstance(response, CachedHttpResponse):
+            # The stored response was already finalized.
+            return response
+
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.response_cache_key is not None and response.status_code == 200:
+            cache_response(
+                response, self.response_cache_key, get_response_cache_timeout(self.model)
+            )
+        return response
+
     def list(self, request, *args, **kwargs):
+        if (response := self.get_cached_response(request)) is not None:
+            return response
+
         try:
             return super().list(request, *args, **kwargs)
         except (ProgrammingError, InternalError) as e:
@@ -75,12 +107,25 @@ class DynamicApiViewSet(NestedViewSetMixin, DSOViewMixin, viewsets.ReadOnlyModel
             raise
 
     def retrieve(self, request, *args, **kwargs):
+        if (response := self.get_cached_response(request)) is not None:
+            return response
+
         try:
             return super().retrieve(request, *args, **kwargs)
         except ProgrammingError as e:
             self._handle_db_error(e)
             raise
 
+    def get_cached_response(self, request) -> CachedHttpResponse | None:
+        """Serve popular queries from the response cache, when it's enabled for this table.
+        This is called by the handlers, so the permission checks of initial() still apply.
+        """
+        if request.method != "GET" or not get_response_cache_timeout(self.model):
+            return None
+
+        self.response_cache_key = get_response_cache_key(request, self.model)
+        return get_cached_response(self.response_cache_key)
+
     def _handle_db_error(self, e: DatabaseError) -> None:
         """Make sure database permission errors and invalid coordinate
         errors are gratefully handled. These are a common source of
@@ -237,6 +282,7 @@ def viewset_factory(model: type[DynamicModel], version: str) -> type[DynamicApiV
         "serializer_class": serializer_class,
         "dataset_id": model._dataset_schema["id"],
         "table_id": model.table_schema()["id"],
+        "dataset_version": version,
         "authorization_grantor": model.get_dataset_schema().get("authorizationGrantor"),
     }
     return type(f"{table_schema.python_name}ViewSet", (DynamicApiViewSet,), attrs)
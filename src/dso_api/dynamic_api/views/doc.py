@@ -8,6 +8,7 @@ import logging
 import operator
 import re
 from collections.abc import Iterable
+from functools import wraps
 from typing import Any, NamedTuple
 from urllib.parse import urljoin
 
@@ -19,7 +20,6 @@ from django.template.loader import render_to_string
 from django.urls import NoReverseMatch, reverse
 from django.utils.decorators import method_decorator
 from django.utils.safestring import mark_safe
-from django.views.decorators.cache import cache_page
 from django.views.generic import TemplateView
 from markdown import Markdown
 from markdown.extensions.codehilite import CodeHiliteExtension
@@ -37,6 +37,13 @@ from schematools.types import (
 )
 
 from dso_api.dynamic_api.constants import DEFAULT
+from dso_api.dynamic_api.datasets import get_active_datasets
+from dso_api.dynamic_api.documents import (
+    SERVER_PLACEHOLDER,
+    Document,
+    doc_pages,
+    get_schema_token,
+)
 from dso_api.dynamic_api.filters.parser import QueryFilterEngine
 
 logger = logging.getLogger(__name__)
@@ -49,7 +56,43 @@ markdown = Markdown(
     ]
 )
 
-cache_doc_page = cache_page(timeout=36000)  # seconds
+DOC_CONTENT_TYPES = {
+    "html": "text/html; charset=utf-8",
+    "json": "application/json",
+}
+
+
+def doc_page(view_func):
+    """Serve the documentation page from memory (or disk), and only render it once.
+
+    The pages only change when the schemas are reloaded,
+    see :mod:`dso_api.dynamic_api.documents`.
+    """
+
+    @wraps(view_func)
+    def _doc_page_view(request, *args, **kwargs):
+        name, response_format = request.path.strip("/").rsplit(".", 1)
+        key = (name.replace("/", "_"), response_format)
+        content_type = DOC_CONTENT_TYPES[response_format]
+        document = doc_pages.get(key, content_type, _get_docs_schema_token)
+        if document is None:
+            response = view_func(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            if hasattr(response, "render"):
+                response.render()
+
+            document = Document(response.content, content_type, _get_docs_schema_token())
+            doc_pages.set(key, document)
+
+        return document.get_response(request)
+
+    return _doc_page_view
+
+
+def _get_docs_schema_token() -> str:
+    """Tell which version of the schemas the pages are generated from."""
+    return get_schema_token(get_active_datasets().order_by("name"))
 
 
 def search(request: HttpRequest) -> HttpResponse:
@@ -58,7 +101,7 @@ def search(request: HttpRequest) -> HttpResponse:
     return HttpResponse(render_to_string(template, context={"query": query}))
 
 
-@cache_doc_page
+@doc_page
 def search_index(_request) -> HttpResponse:
     index = {}
     for ds in Dataset.objects.api_enabled().db_enabled():
@@ -82,7 +125,7 @@ def search_index(_request) -> HttpResponse:
     return JsonResponse(index)
 
 
-@method_decorator(cache_doc_page, name="get")
+@method_decorator(doc_page, name="get")
 class GenericDocs(TemplateView):
     """Documentation pages from ``/v1/docs/generic/...``."""
 
@@ -95,7 +138,8 @@ class GenericDocs(TemplateView):
     def get_context_data(self, **kwargs):
         category = self.kwargs["category"]
         topic = self.kwargs["topic"]
-        uri = self.request.build_absolute_uri(reverse("dynamic_api:api-root"))
+        # The host is filled in when the page is served.
+        uri = SERVER_PLACEHOLDER + reverse("dynamic_api:api-root")
         template = f"dso_api/dynamic_api/docs/{category}/{topic}.md"
         try:
             md = render_to_string(template, context={"uri": uri})
@@ -121,7 +165,7 @@ class GenericDocs(TemplateView):
         }
 
 
-@method_decorator(cache_doc_page, name="dispatch")
+@method_decorator(doc_page, name="dispatch")
 class DocsIndexView(TemplateView):
     """The ``/v1/docs/index.html`` page."""
 
@@ -156,7 +200,7 @@ class DocsIndexView(TemplateView):
         return context
 
 
-@method_decorator(cache_doc_page, name="dispatch")
+@method_decorator(doc_page, name="dispatch")
 class DatasetDocView(TemplateView):
     """REST API-specific documentation for a single dataset (``/v1/docs/datasets/...```)."""
 
@@ -1,14 +1,19 @@
 """Mapbox Vector Tiles (MVT) views of geographic datasets."""
 
+import hashlib
 import logging
 import time
 from urllib.parse import unquote
 
+from django.conf import settings
 from django.core.exceptions import PermissionDenied
+from django.db import router as db_router
 from django.db.models import F, Model
 from django.http import Http404
 from django.urls.base import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.views.generic import TemplateView
+from schematools.contrib.django.signals import dynamic_models_removed
 from schematools.naming import toCamelCase
 from schematools.permissions import UserScopes
 from schematools.types import DatasetTableSchema
@@ -19,13 +24,58 @@ from vectortiles.views import TileJSONView
 from dso_api.dynamic_api.constants import DEFAULT
 from dso_api.dynamic_api.datasets import get_active_datasets
 from dso_api.dynamic_api.filters.values import AMSTERDAM_BOUNDS, DAM_SQUARE
-from dso_api.dynamic_api.permissions import CheckModelPermissionsMixin
-from dso_api.dynamic_api.views.mvt_base import StreamingMVTView, StreamingVectorLayer
+from dso_api.dynamic_api.permissions import CheckModelPermissionsMixin, get_profile_query_params
+from dso_api.dynamic_api.tilecache import TileKey, get_table_version, get_version_token
+from dso_api.dynamic_api.tileindex import TileIndex, get_tile_index
+from dso_api.dynamic_api.utils import get_database_role
+from dso_api.dynamic_api.views.mvt_base import StreamingMVTView, StreamingVectorLayer, ZoomRule
 
 from .index import APIIndexView
 
 logger = logging.getLogger(__name__)
 
+#: The maximum number of layer field definitions that are kept in memory.
+LAYER_FIELDS_CACHE_SIZE = 1000
+
+#: The fields and annotations of a layer, by model, zoom range and the scopes of the user.
+_layer_fields_cache: dict[tuple, tuple[tuple[str, ...], dict[str, F]]] = {}
+
+
+def clear_mvt_layer_cache():
+    _layer_fields_cache.clear()
+
+
+# When models are removed, clear the cache.
+dynamic_models_removed.connect(lambda **kwargs: clear_mvt_layer_cache())
+
+
+def get_zoom_rules(schema: DatasetTableSchema) -> list[ZoomRule]:
+    """Find how the features of a table are generalized at lower zoom levels.
+    The ``MVT_ZOOM_RULES`` setting overrides the ``zoom.rules`` of the table schema.
+    """
+    rules = settings.MVT_ZOOM_RULES.get(f"{schema.dataset.id}.{schema.id}")
+    if rules is None:
+        rules = schema.get("zoom", {}).get("rules", [])
+    return [ZoomRule.from_dict(rule) for rule in rules]
+
+
+def get_geometry_tile_index(
+    models: list[type[Model]], data_version: str | None = None
+) -> TileIndex | None:
+    """Provide the index of the tiles where the main geometry of the tables has features,
+    or ``None`` while another request builds the index.
+    """
+    using = db_router.db_for_read(models[0])
+    if data_version is None:
+        data_version = get_table_version(*models, using=using)
+    # The database role of the end-user could restrict which rows are visible.
+    variant = get_database_role(using) if settings.DATABASE_SET_ROLE else ""
+    columns = [
+        (model, model._meta.get_field(model.table_schema().main_geometry_field.python_name).column)
+        for model in models
+    ]
+    return get_tile_index(columns, data_version, using=using, variant=variant)
+
 
 class DatasetMVTIndexView(APIIndexView):
     """Overview of available MVT endpoints."""
@@ -123,6 +173,10 @@ class DatasetMVTView(CheckModelPermissionsMixin, StreamingMVTView):
 
     def setup(self, request, *args, **kwargs):
         super().setup(request, *args, **kwargs)
+        self.layer_models = self.get_layer_models()
+
+    def get_layer_models(self) -> dict[str, type[Model]]:
+        """Tell which models are rendered, by layer name. This also checks the permissions."""
         from dso_api.dynamic_api.urls import router
 
         dataset_name = self.kwargs["dataset_name"]
@@ -137,6 +191,7 @@ class DatasetMVTView(CheckModelPermissionsMixin, StreamingMVTView):
         self._main_geo = model.table_schema().main_geometry_field
         self.model = model
         self.check_model_permissions([self.model])
+        return {"default": model}
 
     def get(self, request, *args, **kwargs):
         self.zoom = kwargs["z"]
@@ -144,30 +199,101 @@ class DatasetMVTView(CheckModelPermissionsMixin, StreamingMVTView):
 
     def get_layers(self) -> list[StreamingVectorLayer]:
         """Provide all layer definitions for this rendering."""
-        layer = self._create_layer()
-        return [layer]
+        return [
+            self._create_layer(model, layer_id) for layer_id, model in self.layer_models.items()
+        ]
 
-    def _create_layer(self) -> StreamingVectorLayer:
+    def get_tile_cache_key(self, z, x, y) -> TileKey | None:
+        """Tiles are cached per table, zoom level and the fields that the user may see."""
+        models = list(self.layer_models.values())
+        databases = {db_router.db_for_read(model) for model in models}
+        if len(databases) > 1:
+            return None
+        (using,) = databases
+
+        variant = ";".join(
+            f"{layer.id}:{','.join(layer.tile_fields)}|{layer.get_zoom_rule(z)}"
+            for layer in self.get_layers()
+        )
+        if settings.DATABASE_SET_ROLE:
+            # The database role of the end-user could restrict which rows are visible.
+            variant += f"|{get_database_role(using)}"
+
+        return TileKey(
+            table_id="+".join(model._meta.db_table for model in models),
+            path="/".join(
+                filter(
+                    None,
+                    (
+                        self.kwargs["dataset_name"],
+                        self.kwargs["dataset_version"],
+                        self.kwargs.get("table_name"),
+                        f"{z}/{x}/{y}",
+                    ),
+                )
+            ),
+            variant=hashlib.sha1(variant.encode(), usedforsecurity=False).hexdigest()[:16],
+            data_version=get_table_version(*models, using=using),
+        )
+
+    def may_have_features(self, z, x, y, tile_key: TileKey | None) -> bool:
+        """Tiles outside the area where the tables have features are not queried."""
+        if tile_key is None:
+            return True
+        tile_index = get_geometry_tile_index(
+            list(self.layer_models.values()), data_version=tile_key.data_version
+        )
+        return tile_index is None or tile_index.may_have_features(z, x, y)
+
+    def _create_layer(self, model: type[Model], layer_id: str) -> StreamingVectorLayer:
         """Creates the layer used for getting the tiles.
 
         Adds queryset and tile_fields to the layer.
         Annotates the queryset with some camelCased aliases.
-        Determines the fields to include based on zoom.
         """
+        schema: DatasetTableSchema = model.table_schema()
+        tile_fields, annotations = self._get_layer_fields(model, schema)
+        queryset = model.objects.all()
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+
+        return StreamingVectorLayer(
+            id=layer_id,
+            model=model,
+            geom_field=schema.main_geometry_field.python_name,
+            queryset=queryset,
+            tile_fields=tile_fields,
+            zoom_rules=get_zoom_rules(schema),
+        )
+
+    def _get_layer_fields(
+        self, model: type[Model], schema: DatasetTableSchema
+    ) -> tuple[tuple[str, ...], dict[str, F]]:
+        """Determines the fields to include based on zoom and the scopes of the user.
+        The result only depends on these, so it's cached for the next tiles.
+        """
+        in_zoom_range = schema.min_zoom <= self.zoom <= schema.max_zoom
+        key = (
+            model,
+            in_zoom_range,
+            frozenset(getattr(self.request, "get_token_scopes", None) or ()),
+            # Profiles may grant access based on the query parameters.
+            get_profile_query_params(self.request, schema.dataset.id),
+        )
+        try:
+            return _layer_fields_cache[key]
+        except KeyError:
+            pass
 
-        schema: DatasetTableSchema = self.model.table_schema()
+        main_geo = schema.main_geometry_field
         user_scopes: UserScopes = self.request.user_scopes
-        queryset = self.model.objects.all()
 
         # We always include the identifier fields
         identifiers = schema.identifier_fields
         tile_fields = tuple(id.name for id in identifiers)
+        annotations = {}
         for field in schema.get_fields(include_subfields=True):
-            if (
-                not user_scopes.has_field_access(field)
-                or self.zoom < schema.min_zoom
-                or self.zoom > schema.max_zoom
-            ):
+            if not in_zoom_range or not user_scopes.has_field_access(field):
                 # 403 or not within zoom range to include the field.
                 continue
 
@@ -184,32 +310,67 @@ class DatasetMVTView(CheckModelPermissionsMixin, StreamingMVTView):
                 continue
 
             # We exclude the main geometry and `schema` fields.
-            if (
-                field_name not in tile_fields
-                and field_name != "schema"
-                and field != self._main_geo
-            ):
+            if field_name not in tile_fields and field_name != "schema" and field != main_geo:
                 tile_fields += (field_name,)
 
                 if field_name != field.db_name and field_name.lower() != field_name:
                     # Annotate camelCased field names so they can be found.
-                    queryset = queryset.annotate(**{field_name: F(field.db_name)})
+                    annotations[field_name] = F(field.db_name)
 
-        return StreamingVectorLayer(
-            id="default",
-            model=self.model,
-            geom_field=self._main_geo.python_name,
-            queryset=queryset,
-            tile_fields=tile_fields,
-        )
+        if len(_layer_fields_cache) >= LAYER_FIELDS_CACHE_SIZE:
+            # Remove the oldest entry.
+            _layer_fields_cache.pop(next(iter(_layer_fields_cache), None), None)
+        _layer_fields_cache[key] = (tile_fields, annotations)
+        return tile_fields, annotations
 
     def check_model_permissions(self, models) -> None:
         """Override CheckPermissionsMixin to add extra checks"""
         super().check_model_permissions(models)
 
         # Check whether the geometry field can be accessed, otherwise reading MVT is pointless.
-        if not self.request.user_scopes.has_field_access(self._main_geo):
+        for model in models:
+            if not self.request.user_scopes.has_field_access(
+                model.table_schema().main_geometry_field
+            ):
+                raise PermissionDenied()
+
+
+class DatasetCompositeMVTView(DatasetMVTView):
+    """An MVT view that combines all geo tables of a dataset in a single tile.
+    Each table becomes a layer that is named after the table,
+    and tables that the user may not read are left out.
+    """
+
+    def get_layer_models(self) -> dict[str, type[Model]]:
+        from dso_api.dynamic_api.urls import router
+
+        dataset_name = self.kwargs["dataset_name"]
+        dataset_version = self.kwargs["dataset_version"]
+
+        try:
+            models = router.all_models[dataset_name][dataset_version]
+        except KeyError:
+            raise Http404(f"Invalid dataset: {dataset_name}") from None
+
+        geo_models = {
+            table_name: model
+            for table_name, model in sorted(models.items())
+            if any(field.is_geo for field in model.table_schema().fields)
+        }
+        if not geo_models:
+            raise Http404(f"Dataset {dataset_name} does not have tables with geometry")
+
+        layer_models = {}
+        for table_name, model in geo_models.items():
+            try:
+                self.check_model_permissions([model])
+            except PermissionDenied:
+                continue
+            layer_models[table_name] = model
+
+        if not layer_models:
             raise PermissionDenied()
+        return layer_models
 
 
 class DatasetTileJSONView(TileJSONView):
@@ -252,6 +413,12 @@ class DatasetTileJSONView(TileJSONView):
         self.description = schema.description
         self.name = schema.title
 
+        # The bounds cover the features of all tables, when these are in the same database.
+        if len({db_router.db_for_read(model) for model in self.models}) == 1:
+            tile_index = get_geometry_tile_index(self.models)
+            if tile_index is not None and tile_index.bounds is not None:
+                self.bounds = list(tile_index.bounds)
+
     def get_layers(self) -> list[BaseVectorLayerMixin]:
         "Override to get all the layer metadata out of the models."
         layers = []
@@ -292,6 +459,9 @@ class DatasetTileJSONView(TileJSONView):
         urls = []
         for model in self.models:
             url = unquote(self.request.build_absolute_uri(model.__name__ + "/" + self.tile_url))
+            if settings.MVT_VERSIONED_URLS:
+                # The URL changes with the data, so the tiles can be cached indefinitely.
+                url += f"?v={get_version_token(get_table_version(model))}"
             urls.append(url)
         return sorted(urls)
 
@@ -306,4 +476,8 @@ class DatasetTileJSONView(TileJSONView):
             len(result.content),
             (time.perf_counter_ns() - t0) * 1e-9,
         )
-        return result
+
+        etag = hashlib.sha1(result.content, usedforsecurity=False).hexdigest()[:24]
+        result.headers["ETag"] = f'"{etag}"'
+        patch_cache_control(result, max_age=settings.MVT_MAX_AGE, public=True)
+        return get_conditional_response(request, etag=result.headers["ETag"], response=result)
@@ -1,14 +1,122 @@
-from collections.abc import Generator
-from itertools import chain
+import hashlib
+import math
+import struct
+import zlib
+from collections.abc import Buffer, Generator, Iterable, Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass
+from itertools import chain, groupby, product
+from operator import attrgetter
 
-from django.contrib.gis.db.models.functions import Transform
+from django.conf import settings
+from django.contrib.gis.db.models import Collect, GeometryField
+from django.contrib.gis.db.models.functions import (
+    Centroid,
+    GeomOutputGeoFunc,
+    SnapToGrid,
+    Transform,
+)
 from django.db import connections
+from django.db.models import Count, FloatField, Func, IntegerField, Q, QuerySet, Window
+from django.db.models.expressions import RawSQL
+from django.db.models.lookups import GreaterThan
 from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
 from django.views import View
 from vectortiles.backends import BaseVectorLayerMixin
 from vectortiles.backends.postgis.functions import AsMVTGeom, MakeEnvelope
 from vectortiles.mixins import BaseVectorTileView
 
+from dso_api.dynamic_api.tilecache import (
+    TileCache,
+    TileKey,
+    compress_tile,
+    get_tile_cache,
+    get_tile_etag,
+    get_version_token,
+)
+from dso_api.dynamic_api.tilegeometry import TILE_SRID, get_projected_columns
+from dso_api.middleware import get_accepted_encoding
+
+#: The size of the chunks that the tile is streamed in.
+TILE_CHUNK_SIZE = 65536
+
+#: The headers of the binary COPY format: the file header, the tuple header and field header.
+BINARY_COPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+_COPY_HEADER = struct.Struct("!11sii")
+_COPY_TUPLE = struct.Struct("!h")
+_COPY_FIELD = struct.Struct("!i")
+
+#: The width of the world in Web Mercator (EPSG:3857) meters.
+WORLD_SIZE = 2 * math.pi * 6378137
+#: The tile size in screen pixels, which the zoom rules are expressed in.
+TILE_PIXELS = 256
+
+
+class Simplify(GeomOutputGeoFunc):
+    """Simplify the geometry, but keep features that collapse (these are filtered separately)."""
+
+    function = "ST_Simplify"
+
+
+class Area(Func):
+    function = "ST_Area"
+    output_field = FloatField()
+
+
+class Length(Func):
+    function = "ST_Length"
+    output_field = FloatField()
+
+
+class Dimension(Func):
+    function = "ST_Dimension"
+    output_field = IntegerField()
+
+
+@dataclass(frozen=True)
+class ZoomRule:
+    """How features are generalized up to a zoom level.
+
+    The sizes are expressed in screen pixels of a 256px tile, so the same rule
+    translates to a larger tolerance (in meters) at each lower zoom level.
+    """
+
+    #: The highest zoom level where this rule applies.
+    max_zoom: int
+    #: The simplification tolerance of the geometry.
+    simplify: float = 0
+    #: Polygons with a smaller area (in square pixels) are left out.
+    min_area: float = 0
+    #: Lines that are shorter are left out.
+    min_length: float = 0
+    #: The maximum number of features in a tile; the largest features are kept,
+    #: and all features get a ``truncated`` property to tell some were left out.
+    limit: int | None = None
+    #: The grid size (in pixels) to cluster features in; each cluster has a ``count``.
+    cluster: float = 0
+
+    @classmethod
+    def from_dict(cls, data: dict) -> ZoomRule:
+        """Read the rule from the (camelCased) configuration."""
+        return cls(
+            max_zoom=data["maxZoom"],
+            simplify=data.get("simplify", 0),
+            min_area=data.get("minArea", 0),
+            min_length=data.get("minLength", 0),
+            limit=data.get("limit"),
+            cluster=data.get("cluster", 0),
+        )
+
+
+def get_pixel_size(z) -> float:
+    """Tell how many meters (in EPSG:3857) a pixel covers at the zoom level."""
+    return WORLD_SIZE / (TILE_PIXELS << z)
+
 
 class StreamingVectorLayer(BaseVectorLayerMixin):
     """Layer that yields chunked vector tiles.
@@ -18,91 +126,344 @@ class StreamingVectorLayer(BaseVectorLayerMixin):
     why we `yield` chunks.
     """
 
-    def __init__(self, id, model, queryset, geom_field, tile_fields):
+    def __init__(
+        self, id, model, queryset, geom_field, tile_fields, zoom_rules: Sequence[ZoomRule] = ()
+    ):
         self.id = id
         self.model = model
         self.queryset = queryset
         self.geom_field = geom_field
         self.tile_fields = tile_fields
+        self.zoom_rules = sorted(zoom_rules, key=lambda rule: rule.max_zoom)
+
+    def get_zoom_rule(self, z) -> ZoomRule | None:
+        """Tell how the features are generalized at the zoom level."""
+        return next((rule for rule in self.zoom_rules if z <= rule.max_zoom), None)
+
+    def get_queryset_limit(self, z=None):
+        """Get the feature limit of the zoom level, or the limit for all zoom levels."""
+        rule = self.get_zoom_rule(z) if z is not None else None
+        return rule.limit if rule and rule.limit else super().get_queryset_limit()
+
+    def generalize(self, features: QuerySet, geometry: Func, z) -> tuple[QuerySet, Func]:
+        """Apply the zoom rule, which leaves out small features and simplifies the geometry.
+        This happens in SQL, so the data is reduced before ST_AsMVT() encodes it.
+        """
+        rule = self.get_zoom_rule(z)
+        if rule is None:
+            return features, geometry
+
+        pixel_size = get_pixel_size(z)
+        if rule.min_area or rule.min_length:
+            features = features.alias(
+                _mvt_dimension=Dimension(self.geom_field),
+                _mvt_area=Area(geometry),
+                _mvt_length=Length(geometry),
+            )
+        if rule.min_area:
+            features = features.filter(
+                Q(_mvt_dimension__lt=2) | Q(_mvt_area__gte=rule.min_area * pixel_size**2)
+            )
+        if rule.min_length:
+            features = features.filter(
+                ~Q(_mvt_dimension=1) | Q(_mvt_length__gte=rule.min_length * pixel_size)
+            )
+        if rule.limit and not rule.cluster:
+            # For polygons the area is non-zero, for lines the length.
+            features = features.order_by((Area(geometry) + Length(geometry)).desc())
+        if rule.simplify:
+            geometry = Simplify(geometry, rule.simplify * pixel_size, True)
+
+        return features, geometry
+
+    def cluster(self, features: QuerySet, geometry: Func, z) -> tuple[QuerySet, Func]:
+        """Combine the features that are close to each other into a single point.
+        Features are grouped by snapping them to a grid, which is much cheaper than
+        measuring the distances between them. The largest clusters are kept first.
+        """
+        rule = self.get_zoom_rule(z)
+        grid_size = rule.cluster * get_pixel_size(z)
+        features = (
+            features.order_by()
+            .values(_mvt_cell=SnapToGrid(geometry, grid_size))
+            .annotate(count=Count("*"))
+            .order_by("-count")
+        )
+        return features, Centroid(Collect(geometry))
+
+    def get_projected_geometry(self, z, using: str) -> Func | None:
+        """Provide the precomputed Web Mercator geometry, when the table has it.
+        The pre-generalized column of the zoom rule is preferred.
+        """
+        geom_column = self.model._meta.get_field(self.geom_field).column
+        columns = get_projected_columns(self.model, geom_column, using=using)
+        rule = self.get_zoom_rule(z)
+        column = columns.get(rule.max_zoom if rule is not None else None) or columns.get(None)
+        if column is None:
+            return None
+
+        # The column name is read from the database catalog, and quoted.
+        quote_name = connections[using].ops.quote_name
+        return RawSQL(  # noqa: S611
+            f"{quote_name(self.model._meta.db_table)}.{quote_name(column)}",
+            (),
+            output_field=GeometryField(srid=TILE_SRID),
+        )
+
+    def select_features(self, features: QuerySet, envelope: Func, z) -> tuple[QuerySet, Func]:
+        """Keep the features that intersect the envelope,
+        and provide their (generalized) geometry in Web Mercator.
+        """
+        geometry = self.get_projected_geometry(z, using=features.db)
+        if geometry is not None:
+            # The table has a precomputed projection, so rows don't have to be reprojected.
+            features = features.alias(_mvt_geometry=geometry)
+            features = features.filter(_mvt_geometry__intersects=envelope)
+        else:
+            # GeoFuncMixin implicitly transforms to SRID of geom
+            features = features.filter(**{f"{self.geom_field}__intersects": envelope})
+            geometry = Transform(self.geom_field, 3857)
+        # leave out details that are not visible at this zoom level
+        return self.generalize(features, geometry, z)
 
     def get_tile(self, x, y, z) -> Generator[memoryview]:
+        query = self.get_tile_query(x, y, z)
+        if query is not None:
+            yield from stream_tile(query)
+
+    def get_tile_query(self, x, y, z) -> TileQuery | None:
+        """Build the SQL statement that renders this layer of the tile."""
         if not self.check_in_zoom_levels(z):
-            return
+            return None
         features = self.get_vector_tile_queryset(z, x, y)
         # get tile coordinates from x, y and z
         xmin, ymin, xmax, ymax = self.get_bounds(x, y, z)
-        # keep features intersecting tile
-        filters = {
-            # GeoFuncMixin implicitly transforms to SRID of geom
-            f"{self.geom_field}__intersects": MakeEnvelope(xmin, ymin, xmax, ymax, 3857)
-        }
-        features = features.filter(**filters)
+        features, geometry = self.select_features(
+            features, MakeEnvelope(xmin, ymin, xmax, ymax, 3857), z
+        )
+        rule = self.get_zoom_rule(z)
+        if rule is not None and rule.cluster:
+            features, geometry = self.cluster(features, geometry, z)
+            tile_fields = ("count",)
+        else:
+            tile_fields = tuple(self.get_tile_fields() or ())
         # annotate prepared geometry for MVT
         features = features.annotate(
             geom_prepared=AsMVTGeom(
-                Transform(self.geom_field, 3857),
+                geometry,
                 MakeEnvelope(xmin, ymin, xmax, ymax, 3857),
                 self.tile_extent,
                 self.tile_buffer,
                 self.clip_geom,
             )
         )
-        fields = (
-            self.get_tile_fields() + ("geom_prepared",)
-            if self.get_tile_fields()
-            else ("geom_prepared",)
-        )
         # limit feature number if limit provided
-        limit = self.get_queryset_limit()
+        limit = self.get_queryset_limit(z)
         if limit:
+            # Tell the client that features are left out, instead of dropping them silently.
+            # The window function counts all features before the limit is applied.
+            features = features.annotate(truncated=GreaterThan(Window(Count("*")), limit))
             features = features[:limit]
+            tile_fields += ("truncated",)
         # keep values to include in tile (extra included_fields + geometry)
-        features = features.values(*fields)
+        features = features.values(*tile_fields, "geom_prepared")
         # generate MVT
         sql, params = features.query.sql_with_params()
-        with connections[features.db].cursor() as cursor:
-            # This hairy query generates the MVT tile using ST_AsMVT, then breaks it up into rows
-            # that we can stream to the client. We do this because the tile is a potentially very
-            # large bytea in PostgreSQL, which psycopg would otherwise consume in its entirety
-            # before passing it on to us. Since psycopg also needs to keep the hex-encoded
-            # PostgreSQL wire format representation of the tile in memory while decoding it, it
-            # needs 3*n memory to decode an n-byte tile, and tiles can be up to hundreds of
-            # megabytes.
-            #
-            # To make matters worse, what psycopg returns is a memoryview, and Django accepts
-            # memoryviews just fine but casts them to bytes objects, meaning the entire tile gets
-            # copied again. That happens after the hex version has been decoded, but it still
-            # means a slow client can keep our memory use at 2*n for the duration of the request.
-            CHUNK_SIZE = 8192
-            cursor.execute(
-                f"""
-                WITH mvt AS (
-                    SELECT ST_AsMVT(_sub.*, %s, %s, %s) FROM ({sql}) as _sub
-                )
-                SELECT * FROM (
-                    /* This is SQL for range(1, len(x), CHUNK_SIZE), sort of. */
-                    WITH RECURSIVE chunk(i) AS (
-                            VALUES (1)
-                        UNION ALL
-                            SELECT chunk.i+{CHUNK_SIZE} FROM chunk, mvt
-                            WHERE i < octet_length(mvt.ST_AsMVT)
-                    ),
-                    sorted AS (SELECT * FROM chunk ORDER BY i)
-                    SELECT substring(mvt.ST_AsMVT FROM sorted.i FOR {CHUNK_SIZE}) FROM mvt, sorted
-                ) AS chunked_mvt WHERE octet_length(substring) > 0
-                """,  # noqa: S608
-                params=[
-                    self.get_id(),
-                    self.tile_extent,
-                    "geom_prepared",
-                    *params,
-                ],
-            )
-            for chunk in cursor:
-                yield chunk[0]
+        return TileQuery(
+            using=features.db,
+            sql=f"SELECT ST_AsMVT(_sub.*, %s, %s, %s) AS tile FROM ({sql}) AS _sub",  # noqa: S608
+            params=(self.get_id(), self.tile_extent, "geom_prepared", *params),
+        )
+
+    def can_render_metatile(self, z) -> bool:
+        """Tell whether the tiles of the zoom level can be rendered as part of a metatile.
+        Limits and clusters apply per tile, so those tiles are rendered one by one.
+        """
+        rule = self.get_zoom_rule(z)
+        return not self.get_queryset_limit(z) and not (rule is not None and rule.cluster)
+
+    def get_metatile_query(self, x0, y0, z, size) -> TileQuery | None:
+        """Build the SQL statement that renders this layer for a block of size×size tiles,
+        starting at the top-left tile (x0, y0). Each row has the ``x``, ``y`` and ``tile``.
+
+        The features of the whole block are selected once, and each tile
+        takes the features that intersect its envelope from that selection.
+        """
+        if not self.check_in_zoom_levels(z):
+            return None
+        features = self.get_vector_tile_queryset(z, x0, y0)
+        xmin, _, _, ymax = self.get_bounds(x0, y0, z)
+        _, ymin, xmax, _ = self.get_bounds(x0 + size - 1, y0 + size - 1, z)
+        features, geometry = self.select_features(
+            features, MakeEnvelope(xmin, ymin, xmax, ymax, 3857), z
+        )
+        features = features.values(*(self.get_tile_fields() or ()), _mvt_tile_geometry=geometry)
+        compiler = features.query.get_compiler(features.db)
+        sql, params = compiler.as_sql()
+
+        # The tiles have the same property names as ST_AsMVT() gives for a single tile,
+        # which are the column names or aliases of the selected fields.
+        quote_name = connections[features.db].ops.quote_name
+        columns = "".join(
+            f"features.{quote_name(alias or expression.target.column)}, "
+            for expression, _sql, alias in compiler.select
+            if alias != "_mvt_tile_geometry"
+        )
+        return TileQuery(
+            using=features.db,
+            sql=f"""
+                WITH features AS MATERIALIZED ({sql})
+                SELECT tiles.x, tiles.y, (
+                    SELECT ST_AsMVT(_sub.*, %s, %s, 'geom_prepared') FROM (
+                        SELECT {columns}ST_AsMVTGeom(
+                            features._mvt_tile_geometry, tiles.envelope, %s, %s, %s
+                        ) AS geom_prepared
+                        FROM features
+                        WHERE ST_Intersects(features._mvt_tile_geometry, tiles.envelope)
+                    ) AS _sub
+                ) AS tile
+                FROM (
+                    SELECT x, y, ST_TileEnvelope(%s, x, y) AS envelope
+                    FROM generate_series(%s, %s) AS x, generate_series(%s, %s) AS y
+                ) AS tiles
+            """,  # noqa: S608
+            params=(
+                *params,
+                self.get_id(),
+                self.tile_extent,
+                self.tile_extent,
+                self.tile_buffer,
+                self.clip_geom,
+                z,
+                x0,
+                x0 + size - 1,
+                y0,
+                y0 + size - 1,
+            ),
+        )
+
+
+@dataclass(frozen=True)
+class TileQuery:
+    """The SQL statement that renders (a layer of) a vector tile in the ``tile`` column."""
+
+    using: str
+    sql: str
+    params: tuple
+
+    @classmethod
+    def combine(cls, queries: Sequence[TileQuery]) -> TileQuery:
+        """Render multiple layers in a single statement.
+        The encoded layers of a vector tile can simply be concatenated.
+        """
+        if len(queries) == 1:
+            return queries[0]
+        sql = " || ".join(f"COALESCE(({query.sql}), ''::bytea)" for query in queries)
+        return cls(
+            using=queries[0].using,
+            sql=f"SELECT {sql} AS tile",
+            params=tuple(chain.from_iterable(query.params for query in queries)),
+        )
+
+
+def stream_tile(query: TileQuery) -> Generator[memoryview]:
+    """Execute the tile query, and yield the tile in chunks."""
+    # The tile is a potentially very large bytea in PostgreSQL (up to hundreds of megabytes).
+    # A regular query would make psycopg read the hex-encoded text representation in its
+    # entirety, and keep both that and the decoded tile in memory (3*n for an n-byte tile).
+    # Instead, PostgreSQL slices the tile, and sends the slices in the binary COPY format.
+    # Each slice arrives as a separate message, so our memory use stays bounded, and the
+    # memoryviews of psycopg are passed on to the client without copying them.
+    statement = f"""
+        COPY (
+            SELECT substring(mvt.tile FROM i FOR {TILE_CHUNK_SIZE})
+            FROM ({query.sql}) AS mvt,
+                 generate_series(1, octet_length(mvt.tile), {TILE_CHUNK_SIZE}) AS i
+            ORDER BY i
+        ) TO STDOUT (FORMAT binary)
+        """  # noqa: S608
+    with (
+        connections[query.using].cursor() as cursor,
+        cursor.copy(statement, query.params) as copy,
+    ):
+        yield from read_binary_copy(copy)
+
+
+def read_binary_copy(blocks: Iterable[Buffer]) -> Iterator[memoryview]:
+    """Yield the column data of a single-column ``COPY ... (FORMAT binary)`` stream.
+    The data is yielded as slices of the received blocks, so it's never copied.
+    """
+    pending = bytearray()  # a header that is split over multiple blocks
+    expect = _COPY_HEADER  # which header is read next.
+    skip = 0  # bytes of the header extension area to ignore.
+    data_left = 0  # bytes of the current field that are still to be yielded.
+    for block in blocks:
+        view = memoryview(block)
+        while view:
+            if skip or data_left:
+                size = min(len(view), skip or data_left)
+                if data_left:
+                    data_left -= size
+                    yield view[:size]
+                else:
+                    skip -= size
+                view = view[size:]
+                continue
+
+            # Read the fixed-size header of the file, tuple or field.
+            needed = expect.size - len(pending)
+            pending += view[:needed]
+            view = view[needed:]
+            if len(pending) < expect.size:
+                break  # continue in the next block.
+
+            values = expect.unpack(pending)
+            pending.clear()
+            if expect is _COPY_HEADER:
+                if values[0] != BINARY_COPY_SIGNATURE:
+                    raise ValueError("Invalid binary COPY data")
+                skip = values[2]
+                expect = _COPY_TUPLE
+            elif expect is _COPY_TUPLE:
+                if values[0] == -1:
+                    return  # end of the data.
+                expect = _COPY_FIELD
+            else:
+                data_left = max(values[0], 0)  # -1 is NULL
+                expect = _COPY_TUPLE
+
+
+@contextmanager
+def advisory_lock(using: str, name: str) -> Iterator[None]:
+    """Hold a PostgreSQL advisory lock. Other processes (and servers) that request
+    the same lock wait until it's released.
+    """
+    digest = hashlib.sha1(name.encode(), usedforsecurity=False).digest()
+    key = int.from_bytes(digest[:8], signed=True)
+    with connections[using].cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_lock(%s)", [key])
+        try:
+            yield
+        finally:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", [key])
+
+
+class BufferStreamingHttpResponse(StreamingHttpResponse):
+    """A streaming response that passes memoryviews to the WSGI server, without copying them.
+    This needs a WSGI server that accepts buffers (e.g. uWSGI with ``wsgi-accept-buffer``).
+    """
+
+    def make_bytes(self, value):
+        if isinstance(value, memoryview):
+            return value
+        return super().make_bytes(value)
 
 
 class StreamingMVTView(BaseVectorTileView, View):
+    #: The compression level per content-coding,
+    #: which overrides the ``STREAMING_COMPRESSION_LEVELS`` setting.
+    compression_levels: dict[str, int] = {}
+
     def get(self, request, z, x, y, *args, **kwargs):
         """
         Handle GET request to serve tile
@@ -118,26 +479,166 @@ class StreamingMVTView(BaseVectorTileView, View):
 
         :rtype StreamingHTTPResponse | HTTPResponse
         """
-        content, status = self.get_content_status(int(z), int(x), int(y))
-        if status == 200:
-            return StreamingHttpResponse(
+        self.content_encoding = None
+        self.tile_cache_status = None
+        z, x, y = int(z), int(x), int(y)
+        tile_key = self.get_tile_cache_key(z, x, y)
+        etag = get_tile_etag(tile_key) if tile_key is not None else None
+        if etag and (response := get_conditional_response(request, etag=etag)) is not None:
+            # The client already has this version of the tile, no need to render it.
+            self.patch_cache_headers(response, tile_key, etag)
+            return response
+
+        content, status = self.get_content_status(z, x, y, cache_key=tile_key)
+        if status == 200 and not isinstance(content, bytes):
+            response_class = (
+                BufferStreamingHttpResponse
+                if settings.WSGI_ACCEPT_BUFFER
+                else StreamingHttpResponse
+            )
+            response = response_class(
                 streaming_content=content, content_type=self.content_type, status=status
             )
-        return HttpResponse(content=content, content_type=self.content_type, status=status)
+            response.compression_levels = self.compression_levels
+        else:
+            response = HttpResponse(content=content, content_type=self.content_type, status=status)
+            if self.content_encoding:
+                response.headers["Content-Encoding"] = self.content_encoding
+
+        if self.tile_cache_status:
+            # Cached tiles are returned gzip-compressed when the client accepts that.
+            response.headers["X-Tile-Cache"] = self.tile_cache_status
+            patch_vary_headers(response, ("Accept-Encoding",))
+        if etag:
+            # Like the compression middleware, a compressed tile only has a weak ETag.
+            etag = f"W/{etag}" if self.content_encoding else etag
+            self.patch_cache_headers(response, tile_key, etag)
+        return response
+
+    def patch_cache_headers(self, response: HttpResponse, tile_key: TileKey, etag: str):
+        """Tell how long browsers and proxies may cache the tile.
+        When the URL contains the data version (see ``get_version_token()``),
+        the tile never changes and can be cached indefinitely.
+        """
+        response.headers["ETag"] = etag
+        if self.request.GET.get("v") == get_version_token(tile_key.data_version):
+            max_age = settings.MVT_VERSIONED_MAX_AGE
+        else:
+            max_age = settings.MVT_MAX_AGE
+
+        # The fields in the tile depend on the scopes of the user.
+        if "Authorization" in self.request.headers:
+            patch_cache_control(response, max_age=max_age, private=True)
+        else:
+            patch_cache_control(response, max_age=max_age, public=True)
+        patch_vary_headers(response, ("Authorization",))
 
     def get_layer_tiles(self, z, x, y) -> Generator[memoryview]:
         layers: list[StreamingVectorLayer] = self.get_layers()
-        if layers:
-            for layer in layers:
-                yield from layer.get_tile(x, y, z)
-        else:
+        if not layers:
             raise Exception("No layers defined")
 
-    def get_content_status(self, z, x, y):
+        # All layers of the same database are rendered in a single statement.
+        queries = filter(None, (layer.get_tile_query(x, y, z) for layer in layers))
+        for _using, group in groupby(queries, key=attrgetter("using")):
+            yield from stream_tile(TileQuery.combine(list(group)))
+
+    def get_tile_cache_key(self, z, x, y) -> TileKey | None:
+        """Tell how the tile is stored in the tile cache, which also provides its ETag.
+        By default, tiles are not cached. Subclasses can override this.
+        """
+        return None
+
+    def may_have_features(self, z, x, y, tile_key: TileKey | None) -> bool:
+        """Tell whether the tile could have features. When not, the tables aren't queried.
+        By default, all tiles are queried. Subclasses can override this.
+        """
+        return True
+
+    def get_content_status(self, z, x, y, cache_key: TileKey | None = None):
+        if not self.may_have_features(z, x, y, cache_key):
+            return (b"", 204)
+
+        tile_cache = get_tile_cache()
+        if tile_cache is None:
+            cache_key = None
+        if cache_key is not None:
+            data = tile_cache.get(cache_key)
+            self.tile_cache_status = "MISS" if data is None else "HIT"
+            if data is None and settings.MVT_METATILE_SIZE > 1:
+                data = self.render_metatile(z, x, y, cache_key, tile_cache)
+            if data is not None:
+                return self._get_cached_content(data)
+
         streaming_content = self.get_layer_tiles(z, x, y)
         try:
             chunk = next(streaming_content)
         except StopIteration:
+            if cache_key is not None:
+                tile_cache.set(cache_key, b"")
             return (b"", 204)
         streaming_content = chain((chunk,), streaming_content)
+        if cache_key is not None:
+            # Store the tile once the client has read all chunks.
+            streaming_content = tile_cache.write(cache_key, streaming_content)
         return (streaming_content, 200)
+
+    def render_metatile(self, z, x, y, cache_key: TileKey, tile_cache: TileCache) -> bytes | None:
+        """Render the block of tiles that this tile is part of, and store them in the cache.
+
+        Map viewers request neighbouring tiles at the same time, so the features of the whole
+        block are selected by a single query. Concurrent requests for the same block wait
+        until it's rendered, and then read their tile from the cache.
+
+        :returns: The gzip-compressed tile, or ``None`` when the layers can't be rendered
+            as a block at this zoom level.
+        """
+        size = min(settings.MVT_METATILE_SIZE, 1 << z)
+        layers: list[StreamingVectorLayer] = self.get_layers()
+        if not all(layer.can_render_metatile(z) for layer in layers):
+            return None
+
+        x0, y0 = x - x % size, y - y % size
+        queries = [
+            query for layer in layers if (query := layer.get_metatile_query(x0, y0, z, size))
+        ]
+        if not queries or len({query.using for query in queries}) > 1:
+            return None
+
+        # The layers of each tile are concatenated in their order.
+        sql = " UNION ALL ".join(
+            f"SELECT {i} AS layer, _layer{i}.* FROM ({query.sql}) AS _layer{i}"  # noqa: S608
+            for i, query in enumerate(queries)
+        )
+        using = queries[0].using
+        with advisory_lock(using, f"mvt-metatile:{cache_key.for_tile(z, x0, y0)}"):
+            if tile_cache.has(cache_key):
+                # Another request rendered the block while this one was waiting.
+                return tile_cache.get(cache_key)
+
+            tiles = dict.fromkeys(product(range(x0, x0 + size), range(y0, y0 + size)), b"")
+            with connections[using].cursor() as cursor:
+                cursor.execute(
+                    f"SELECT x, y, tile FROM ({sql}) AS _tiles ORDER BY layer",  # noqa: S608
+                    tuple(chain.from_iterable(query.params for query in queries)),
+                )
+                for tile_x, tile_y, tile in cursor:
+                    if tile:
+                        tiles[tile_x, tile_y] += tile
+
+            own_data = None
+            for (tile_x, tile_y), tile in tiles.items():
+                data = compress_tile(tile) if tile else b""
+                tile_cache.set(cache_key.for_tile(z, tile_x, tile_y), data)
+                if (tile_x, tile_y) == (x, y):
+                    own_data = data
+            return own_data
+
+    def _get_cached_content(self, data: bytes):
+        """Provide the gzip-compressed tile, uncompressed if the client doesn't accept gzip."""
+        if not data:
+            return (b"", 204)
+        if get_accepted_encoding(self.request, ["gzip"]):
+            self.content_encoding = "gzip"
+            return (data, 200)
+        return (zlib.decompress(data, 16 + zlib.MAX_WBITS), 200)
@@ -24,17 +24,20 @@ The models of that dataset become WFS feature types.
 .. _django-gisserver: https://github.com/Amsterdam/django-gisserver
 """
 
+import hashlib
 import logging
 import re
 from collections import UserList
+from dataclasses import dataclass
 
 from django.conf import settings
 from django.contrib.gis.db.models import GeometryField
 from django.core.exceptions import ImproperlyConfigured
 from django.db import models
-from django.http import Http404
+from django.http import Http404, HttpResponse
 from django.urls import reverse
 from django.utils import translation
+from django.utils.cache import get_conditional_response, patch_vary_headers
 from django.utils.functional import cached_property
 from gisserver.exceptions import InvalidParameterValue, PermissionDenied
 from gisserver.features import ComplexFeatureField, FeatureField, FeatureType, ServiceDescription
@@ -42,12 +45,13 @@ from gisserver.geometries import CRS
 from gisserver.parsers import wfs20
 from gisserver.views import WFSView
 from schematools.contrib.django.models import DynamicModel
+from schematools.contrib.django.signals import dynamic_models_removed
 from schematools.naming import to_snake_case, toCamelCase
 from schematools.types import DatasetTableSchema, RowLevelAuthorisation
 
 from dso_api.dynamic_api.constants import DEFAULT
 from dso_api.dynamic_api.datasets import get_active_datasets
-from dso_api.dynamic_api.permissions import CheckModelPermissionsMixin
+from dso_api.dynamic_api.permissions import CheckModelPermissionsMixin, get_profile_query_params
 from dso_api.dynamic_api.temporal import filter_temporal_slice
 from rest_framework_dso import crs
 
@@ -61,6 +65,84 @@ RE_SIMPLE_NAME = re.compile(
 )
 
 
+@dataclass(frozen=True)
+class FieldDefinition:
+    """The arguments to construct a feature field.
+
+    The feature fields are bound to their feature type, so they can't be shared
+    between requests. Their definitions are cached instead.
+    """
+
+    name: str
+    abstract: str | None = None
+    model_attribute: str | None = None
+    #: The fields of a complex (expanded) field.
+    fields: tuple[FieldDefinition, ...] | None = None
+
+    def create(self) -> FeatureField:
+        """Construct the feature field."""
+        if self.fields is not None:
+            return ComplexFeatureField(
+                self.name,
+                fields=[field.create() for field in self.fields],
+                abstract=self.abstract,
+            )
+        return FeatureField(
+            self.name, model_attribute=self.model_attribute, abstract=self.abstract
+        )
+
+
+#: The maximum number of feature field definitions that are kept in memory.
+FEATURE_FIELDS_CACHE_SIZE = 1000
+
+#: The field definitions of the feature types, by dataset, table, geometry field,
+#: the ?expand/?embed options and the scopes of the user (see _get_field_definitions()).
+_feature_fields_cache: dict[tuple, tuple[FieldDefinition, ...]] = {}
+
+
+#: The maximum number of rendered metadata documents that are kept in memory.
+METADATA_CACHE_SIZE = 500
+
+
+@dataclass(frozen=True)
+class MetadataDocument:
+    """A rendered GetCapabilities or DescribeFeatureType document."""
+
+    content: bytes
+    content_type: str
+    etag: str
+
+    @classmethod
+    def from_response(cls, response: HttpResponse) -> MetadataDocument:
+        """Read the document from the response of the operation."""
+        content = b"".join(response.streaming_content) if response.streaming else response.content
+        digest = hashlib.sha1(content, usedforsecurity=False).hexdigest()[:24]
+        return cls(content=content, content_type=response["Content-Type"], etag=f'"{digest}"')
+
+    def get_response(self, request) -> HttpResponse:
+        """Provide the response, or a "304 Not Modified" when the client has this version."""
+        response = get_conditional_response(request, etag=self.etag)
+        if response is None:
+            response = HttpResponse(self.content, content_type=self.content_type)
+        response.headers["ETag"] = self.etag
+        # The document only contains the fields that the user may see.
+        patch_vary_headers(response, ("Authorization",))
+        return response
+
+
+#: The rendered metadata documents, by dataset, scopes, language and request parameters.
+_metadata_cache: dict[tuple, MetadataDocument] = {}
+
+
+def clear_wfs_feature_cache():
+    _feature_fields_cache.clear()
+    _metadata_cache.clear()
+
+
+# When models are removed, clear the cache.
+dynamic_models_removed.connect(lambda **kwargs: clear_wfs_feature_cache())
+
+
 class AuthenticatedFeatureType(FeatureType):
     """Extended WFS feature type definition that also performs authentication.
     This class tells django-gisserver how to render a model as WFS Feature.
@@ -197,6 +279,41 @@ class DatasetWFSView(CheckModelPermissionsMixin, WFSView):
 
         self.check_model_permissions(accessed_models)
 
+    def call_operation(self, wfs_operation_cls):
+        """Serve the metadata documents from memory.
+
+        GIS clients request the GetCapabilities and DescribeFeatureType documents
+        over and over again, while these only change when the schemas are reloaded.
+        """
+        if self.request.method != "GET" or not isinstance(
+            self.ows_request, (wfs20.GetCapabilities, wfs20.DescribeFeatureType)
+        ):
+            return super().call_operation(wfs_operation_cls)
+
+        key = (
+            self.kwargs["dataset_name"],
+            self.kwargs["dataset_version"],
+            frozenset(getattr(self.request, "get_token_scopes", None) or ()),
+            translation.get_language(),
+            # The document contains the URL of the server.
+            self.server_url,
+            tuple(sorted((name.upper(), value) for name, value in self.request.GET.items())),
+        )
+        try:
+            document = _metadata_cache[key]
+        except KeyError:
+            response = super().call_operation(wfs_operation_cls)
+            if response.status_code != 200:
+                return response
+
+            document = MetadataDocument.from_response(response)
+            if len(_metadata_cache) >= METADATA_CACHE_SIZE:
+                # Remove the oldest document.
+                _metadata_cache.pop(next(iter(_metadata_cache), None), None)
+            _metadata_cache[key] = document
+
+        return document.get_response(self.request)
+
     def render_index(self, service: str | None = None):
         """End-user docs are in Dutch, make sure any template translations work."""
         with translation.override("nl"):
@@ -327,14 +444,50 @@ class DatasetWFSView(CheckModelPermissionsMixin, WFSView):
                 features.append(feature)
         return features
 
-    def get_feature_fields(  # noqa: C901
-        self, model, main_geometry_field_name
-    ) -> list[FeatureField]:
+    def get_feature_fields(self, model, main_geometry_field_name) -> list[FeatureField]:
         """Define which fields should be exposed with the model.
 
         Instead of opting for the "__all__" value of django-gisserver,
         provide an explicit list of fields so unauthorized fields are excluded.
         """
+        return [
+            definition.create()
+            for definition in self._get_field_definitions(model, main_geometry_field_name)
+        ]
+
+    def _get_field_definitions(
+        self, model, main_geometry_field_name
+    ) -> tuple[FieldDefinition, ...]:
+        """Provide the field definitions of the feature type.
+        The result only depends on the options and scopes of the request,
+        so it's cached for the next requests (GIS clients send many requests per map view).
+        """
+        key = (
+            self.kwargs["dataset_name"],
+            self.kwargs["dataset_version"],
+            model._meta.model_name,
+            main_geometry_field_name,
+            frozenset(self.expand_fields),
+            frozenset(self.embed_fields),
+            # The index page shows all fields, regardless of the scopes.
+            self.is_index_request(),
+            frozenset(getattr(self.request, "get_token_scopes", None) or ()),
+            # Profiles may grant access based on the query parameters.
+            get_profile_query_params(self.request, model.table_schema().dataset.id),
+        )
+        try:
+            return _feature_fields_cache[key]
+        except KeyError:
+            definitions = self._build_field_definitions(model, main_geometry_field_name)
+            if len(_feature_fields_cache) >= FEATURE_FIELDS_CACHE_SIZE:
+                # Remove the oldest entry.
+                _feature_fields_cache.pop(next(iter(_feature_fields_cache), None), None)
+            _feature_fields_cache[key] = definitions
+            return definitions
+
+    def _build_field_definitions(  # noqa: C901
+        self, model, main_geometry_field_name
+    ) -> tuple[FieldDefinition, ...]:
         fields = []
         other_geo_fields = []
         is_index_view = self.is_index_request()
@@ -356,7 +509,7 @@ class DatasetWFSView(CheckModelPermissionsMixin, WFSView):
                 if model_field.name in self.expand_fields:
                     # Include an expanded field definition to the list of fields
                     fields.append(
-                        ComplexFeatureField(
+                        FieldDefinition(
                             model_field.name,
                             fields=self._get_expanded_fields(model_field.related_model),
                             abstract=model_field.help_text,
@@ -377,7 +530,7 @@ class DatasetWFSView(CheckModelPermissionsMixin, WFSView):
             ):
                 if to_snake_case(model_field.name) in self.expand_fields:
                     fields.append(
-                        ComplexFeatureField(
+                        FieldDefinition(
                             model_field.name,
                             fields=self._get_expanded_fields(model_field.related_model),
                             abstract=getattr(
@@ -402,20 +555,20 @@ class DatasetWFSView(CheckModelPermissionsMixin, WFSView):
                 # is listed as first value in a feature. This makes sure QGis and friends
                 # render that particular field.
                 other_geo_fields.append(
-                    FeatureField(
+                    FieldDefinition(
                         model_field.name,
                         abstract=model_field.help_text,
                     )
                 )
             else:
                 fields.append(
-                    FeatureField(
+                    FieldDefinition(
                         field_name,
                         abstract=model_field.help_text,
                     )
                 )
 
-        return fields + other_geo_fields
+        return tuple(fields + other_geo_fields)
 
     def _get_requested_models(self) -> list[type[DynamicModel]]:
         """Tell which models are accessed by the request.
@@ -447,14 +600,14 @@ class DatasetWFSView(CheckModelPermissionsMixin, WFSView):
                 ) from None
             return models
 
-    def _get_expanded_fields(self, model) -> list[FeatureField]:
+    def _get_expanded_fields(self, model) -> tuple[FieldDefinition, ...]:
         """Define which fields to include in an expanded relation.
         This is a shorter list, as including a geometry has no use here.
         Relations are also avoided as these won't be expanded anyway.
         """
         user_scopes = self.request.user_scopes
-        return [
-            FeatureField(
+        return tuple(
+            FieldDefinition(
                 model_field.name,
                 abstract=model_field.help_text,
             )
@@ -462,13 +615,13 @@ class DatasetWFSView(CheckModelPermissionsMixin, WFSView):
             if not model_field.is_relation
             and not isinstance(model_field, GeometryField)
             and user_scopes.has_field_access(model.get_field_schema(model_field))
-        ]
+        )
 
-    def _get_embedded_fields(self, relation_name, model, pk_attr=None) -> list[FeatureField]:
+    def _get_embedded_fields(self, relation_name, model, pk_attr=None) -> list[FieldDefinition]:
         """Define which fields to embed as flattened fields."""
         user_scopes = self.request.user_scopes
         return [
-            FeatureField(
+            FieldDefinition(
                 name=f"{relation_name}.{model_field.name}",  # can differ if needed
                 model_attribute=(
                     f"{relation_name}.{model_field.name}"
@@ -1,6 +1,15 @@
+import zlib
+from collections.abc import Iterable, Iterator
+from compression import zstd
+from functools import partial
 from importlib.metadata import version
+from time import monotonic
 
-from django.http import HttpRequest
+import brotli
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
 from packaging.version import parse
 from schematools.contrib.django.models import Profile
 from schematools.permissions import UserScopes
@@ -8,6 +17,95 @@ from schematools.permissions.auth import RLA_SCOPE
 
 from dso_api.dbroles import DatabaseRoles
 
+# Content types that are compressed already, and won't shrink any further.
+COMPRESSED_CONTENT_TYPES = {
+    "application/gzip",
+    "application/vnd.apache.parquet",
+    "application/zip",
+    "application/zstd",
+}
+
+
+def _zstd_compressor(level: int):
+    compressor = zstd.ZstdCompressor(level=level)
+    return (
+        compressor.compress,
+        partial(compressor.flush, zstd.ZstdCompressor.FLUSH_BLOCK),
+        compressor.flush,
+    )
+
+
+def _brotli_compressor(level: int):
+    compressor = brotli.Compressor(quality=level)
+    return compressor.process, compressor.flush, compressor.finish
+
+
+def _gzip_compressor(level: int):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress, partial(compressor.flush, zlib.Z_SYNC_FLUSH), compressor.flush
+
+
+#: The supported content-codings, in order of preference.
+#: Each gives the (compress, flush, finish) functions of a new compressor.
+STREAMING_COMPRESSORS = {
+    "zstd": _zstd_compressor,
+    "br": _brotli_compressor,
+    "gzip": _gzip_compressor,
+}
+
+
+def compress_stream(
+    stream: Iterable[bytes],
+    encoding: str,
+    level: int,
+    flush_size: int,
+    flush_interval: float,
+) -> Iterator[bytes]:
+    """Compress the streaming content, without collecting the whole response in memory.
+
+    The compressor is flushed after the first chunk, and each time ``flush_size`` bytes
+    were added or ``flush_interval`` seconds have passed. Otherwise, the client won't
+    receive anything until the compressor decides its internal buffer is large enough.
+    """
+    compress, flush, finish = STREAMING_COMPRESSORS[encoding](level)
+    pending = 0
+    last_flush = None
+    try:
+        for chunk in stream:
+            data = compress(chunk)
+            pending += len(chunk)
+            now = monotonic()
+            if last_flush is None or pending >= flush_size or now - last_flush >= flush_interval:
+                data += flush()
+                pending = 0
+                last_flush = now
+
+            if data:
+                yield data
+    except Exception:
+        # Make sure the client still receives the error message written by the stream.
+        yield flush()
+        raise
+
+    yield finish()
+
+
+def get_accepted_encoding(request: HttpRequest, encodings: Iterable[str]) -> str | None:
+    """Find the preferred content-coding from the Accept-Encoding header.
+    On equal weights, the first of the given encodings is preferred.
+    """
+    qvalues = {}
+    for value in request.headers.get("Accept-Encoding", "").split(","):
+        coding, _, params = value.partition(";")
+        try:
+            qvalue = float(params.strip().removeprefix("q=")) if params else 1.0
+        except ValueError:
+            qvalue = 0.0
+        qvalues[coding.strip().lower()] = qvalue
+
+    accepted = [coding for coding in encodings if qvalues.get(coding, 0) > 0]
+    return max(accepted, key=qvalues.__getitem__, default=None)
+
 
 class AuthMiddleware:
     """
@@ -44,3 +142,46 @@ class AuthMiddleware:
         DatabaseRoles.set_end_user(account_id, issuer)
 
         return self._get_response(request)
+
+
+class StreamingCompressionMiddleware(GZipMiddleware):
+    """Compress streaming responses with the best encoding the client accepts (zstd, br, gzip).
+
+    Unlike the standard ``GZipMiddleware``, the compressor is flushed regularly,
+    so clients receive the first bytes early on. The compression level is taken from
+    the ``STREAMING_COMPRESSION_LEVELS`` setting, which can be overwritten by
+    the ``compression_levels`` attribute of the renderer (or the response itself).
+    Regular responses are still handled by the ``GZipMiddleware`` logic.
+    """
+
+    def process_response(self, request: HttpRequest, response: HttpResponse):
+        if not response.streaming or response.is_async:
+            return super().process_response(request, response)
+
+        content_type = response.get("Content-Type", "").partition(";")[0]
+        if response.has_header("Content-Encoding") or content_type in COMPRESSED_CONTENT_TYPES:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = get_accepted_encoding(request, STREAMING_COMPRESSORS)
+        if encoding is None:
+            return response
+
+        levels = settings.STREAMING_COMPRESSION_LEVELS | self._get_compression_levels(response)
+        response.streaming_content = compress_stream(
+            response.streaming_content,
+            encoding,
+            level=levels[encoding],
+            flush_size=settings.STREAMING_COMPRESSION_FLUSH_SIZE,
+            flush_interval=settings.STREAMING_COMPRESSION_FLUSH_INTERVAL,
+        )
+
+        # The ETag no longer matches the bytes, but the content is still the same.
+        if (etag := response.get("ETag")) and etag.startswith('"'):
+            response.headers["ETag"] = f"W/{etag}"
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    def _get_compression_levels(self, response: StreamingHttpResponse) -> dict:
+        renderer = getattr(response, "accepted_renderer", None)
+        return getattr(renderer or response, "compression_levels", None) or {}
@@ -5,6 +5,7 @@ from typing import Final
 
 import environ
 from corsheaders.defaults import default_headers
+from django.core.exceptions import ImproperlyConfigured
 from pythonjsonlogger import json
 
 env = environ.Env()
@@ -77,7 +78,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
-    "django.middleware.gzip.GZipMiddleware",
+    "dso_api.middleware.StreamingCompressionMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -102,6 +103,51 @@ if DEBUG:
     ]
     MIDDLEWARE.insert(1, "debug_toolbar.middleware.DebugToolbarMiddleware")
 
+# Compression of streaming responses (exports and vector tiles).
+# The levels can be overwritten per output format, using Renderer.compression_levels.
+STREAMING_COMPRESSION_LEVELS = {"zstd": 3, "br": 4, "gzip": 6}
+STREAMING_COMPRESSION_FLUSH_SIZE = env.int("STREAMING_COMPRESSION_FLUSH_SIZE", 256 * 1024)
+STREAMING_COMPRESSION_FLUSH_INTERVAL = env.float("STREAMING_COMPRESSION_FLUSH_INTERVAL", 1.0)
+
+# Let streaming responses pass memoryviews to the WSGI server, instead of copying them to bytes.
+# This requires the uWSGI "wsgi-accept-buffer" option (UWSGI_WSGI_ACCEPT_BUFFER=1).
+WSGI_ACCEPT_BUFFER = env.bool("WSGI_ACCEPT_BUFFER", False)
+
+# Persistent cache of the rendered vector tiles, shared by all worker processes.
+# The cache is disabled when no path is given.
+MVT_CACHE_PATH = env.str("MVT_CACHE_PATH", None)
+MVT_CACHE_MAX_SIZE = env.int("MVT_CACHE_MAX_SIZE", 2 * 1024**3)
+MVT_CACHE_MAX_TILE_SIZE = env.int("MVT_CACHE_MAX_TILE_SIZE", 8 * 1024**2)
+MVT_CACHE_TIMEOUT = env.int("MVT_CACHE_TIMEOUT", 24 * 3600)
+# Render blocks of N×N neighbouring tiles in a single query to fill the tile cache (1 = off).
+MVT_METATILE_SIZE = env.int("MVT_METATILE_SIZE", 1)
+if MVT_METATILE_SIZE < 1 or MVT_METATILE_SIZE & (MVT_METATILE_SIZE - 1):
+    # The blocks are aligned to the tile grid, which only fits sizes that are a power of two.
+    raise ImproperlyConfigured("MVT_METATILE_SIZE should be a power of two, e.g. 2, 4 or 8.")
+
+# How long browsers and CDNs may cache vector tiles and TileJSON documents (in seconds).
+# Tile URLs that contain the data version ("?v=..." in TileJSON) are cached much longer.
+MVT_MAX_AGE = env.int("MVT_MAX_AGE", 300)
+MVT_VERSIONED_MAX_AGE = env.int("MVT_VERSIONED_MAX_AGE", 365 * 24 * 3600)
+MVT_VERSIONED_URLS = env.bool("MVT_VERSIONED_URLS", False)
+
+# Generalization of the vector tiles per table, e.g. {"dataset.table": [{"maxZoom": 11, ...}]}.
+# This overrides the "zoom.rules" in the table schema.
+MVT_ZOOM_RULES = env.json("MVT_ZOOM_RULES", {})
+
+# Cache the API responses per table, e.g. {"gebieden.buurten": 300} (timeout in seconds).
+API_RESPONSE_CACHE = env.json("API_RESPONSE_CACHE", {})
+API_RESPONSE_CACHE_MAX_SIZE = env.int("API_RESPONSE_CACHE_MAX_SIZE", 1024**2)
+
+# How long browsers and the CDN may cache the responses of public tables (0 = not at all).
+API_PUBLIC_MAX_AGE = env.int("API_PUBLIC_MAX_AGE", 0)
+
+# Directory with the OpenAPI documents that "manage.py generate_openapi" wrote in advance.
+OPENAPI_DOCUMENTS_PATH = env.str("OPENAPI_DOCUMENTS_PATH", None)
+
+# Directory with the documentation pages that "manage.py generate_docs" wrote in advance.
+DOC_PAGES_PATH = env.str("DOC_PAGES_PATH", None)
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 ROOT_URLCONF = "dso_api.urls"
@@ -215,6 +261,22 @@ else:
 
 DATABASES["default"]["OPTIONS"]["application_name"] = "DSO-API"
 
+# A cache that all worker processes on this host share, without an external service.
+# This replaces the CACHES above when a path is given.
+SHARED_CACHE_PATH = env.str("SHARED_CACHE_PATH", None)
+if SHARED_CACHE_PATH:
+    CACHES = {
+        "default": {
+            "BACKEND": "dso_api.cache.SQLiteCache",
+            "LOCATION": SHARED_CACHE_PATH,
+            "TIMEOUT": env.int("SHARED_CACHE_TIMEOUT", 3600),
+            "OPTIONS": {
+                "MAX_SIZE": env.int("SHARED_CACHE_MAX_SIZE", 256 * 1024**2),
+                "MAX_ENTRIES": env.int("SHARED_CACHE_MAX_ENTRIES", 100_000),
+            },
+        }
+    }
+
 # These constants that are used for end-user context switching
 # are configured in our dp-infra repo
 USER_ROLE = "{user_email}_role.filtered"
@@ -421,6 +483,8 @@ SECURE_CROSS_ORIGIN_OPENER_POLICY = "unsafe-none"
 HEALTH_CHECKS = {
     "app": lambda request: True,
     "database": "django_healthchecks.contrib.check_database",
+    "tile_cache": "dso_api.dynamic_api.tilecache.check_tile_cache",
+    "shared_cache": "dso_api.cache.check_cache",
     # 'cache': 'django_healthchecks.contrib.check_cache_default',
     # 'ip': 'django_healthchecks.contrib.check_remote_addr',
 }
@@ -441,6 +505,11 @@ REST_FRAMEWORK = dict(
         "rest_framework_dso.renderers.HALJSONRenderer",
         "rest_framework_dso.renderers.CSVRenderer",
         "rest_framework_dso.renderers.GeoJSONRenderer",
+        "rest_framework_dso.renderers.NDJSONRenderer",
+        "rest_framework_dso.renderers.ArrowRenderer",
+        "rest_framework_dso.renderers.ParquetRenderer",
+        "rest_framework_dso.renderers.FlatGeobufRenderer",
+        "rest_framework_dso.renderers.GeoPackageRenderer",
         "rest_framework_dso.renderers.BrowsableAPIRenderer",
     ],
     EXCEPTION_HANDLER="rest_framework_dso.views.exception_handler",
@@ -0,0 +1,132 @@
+"""An SQLite database that worker processes share, with least-recently-used eviction.
+
+This is the storage of both the shared cache backend (:mod:`dso_api.cache`)
+and the vector tile cache (:mod:`dso_api.dynamic_api.tilecache`).
+The stored entries are kept in a single table, which has at least the columns::
+
+    key TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+
+The total size (and optionally the number of entries) is kept up to date by triggers
+in a ``stats`` table, so the eviction check doesn't need to scan the table.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from time import time
+
+logger = logging.getLogger(__name__)
+
+#: How often the access time of an entry is updated (in seconds).
+#: This avoids a database write for every cache hit.
+ACCESS_INTERVAL = 60
+#: How much space is freed when the store is full (as fraction of the maximum size).
+EVICT_FRACTION = 0.1
+
+
+class SQLiteStore:
+    """Access to the shared SQLite database.
+
+    The connections are kept per thread, and opened again in a forked process
+    (e.g. the uwsgi workers, or the worker pool of a management command).
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        schema: str,
+        table: str,
+        max_size: int,
+        max_entries: int | None = None,
+        expired: str | None = None,
+    ):
+        self.path = Path(path)
+        self.schema = schema
+        self.table = table
+        self.max_size = max_size
+        #: When given, the schema needs to count the 'entries' in the stats table too.
+        self.max_entries = max_entries
+        #: The condition for entries that can be removed first, given the current time.
+        self.expired = expired
+        self._local = threading.local()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Provide the SQLite connection of the current thread."""
+        # A forked worker process can't reuse the connection of its parent.
+        if getattr(self._local, "pid", None) != os.getpid():
+            self._local.connection = self._connect()
+            self._local.pid = os.getpid()
+        return self._local.connection
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        # Allow reads while another process writes.
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(self.schema)
+        return connection
+
+    def transaction(self) -> sqlite3.Connection:
+        """Start a write transaction, to use in a ``with`` block."""
+        # The connection is in autocommit mode, so the transaction is started explicitly.
+        # The "with" block of the connection commits or rolls back the transaction.
+        connection = self.connection
+        connection.execute("BEGIN IMMEDIATE")
+        return connection
+
+    def get_stats(self) -> dict[str, int]:
+        """Provide the counters of the stats table, combined for all processes."""
+        return dict(self.connection.execute("SELECT name, value FROM stats"))
+
+    def mark_accessed(self, key: str, accessed: float) -> None:
+        """Update the access time of an entry, unless it was updated recently."""
+        now = time()
+        if accessed < now - ACCESS_INTERVAL:
+            self.connection.execute(
+                f"UPDATE {self.table} SET accessed = ? WHERE key = ?",  # noqa: S608
+                (now, key),
+            )
+
+    def evict(self) -> None:
+        """Remove the expired and least recently used entries when the store is full."""
+        if not self._is_full(self.get_stats()):
+            return
+
+        if self.expired:
+            with self.transaction() as connection:
+                connection.execute(
+                    f"DELETE FROM {self.table} WHERE {self.expired}", (time(),)  # noqa: S608
+                )
+
+        stats = self.get_stats()
+        size_target = stats["size"] - self.max_size * (1 - EVICT_FRACTION)
+        entries_target = (
+            stats["entries"] - self.max_entries * (1 - EVICT_FRACTION) if self.max_entries else 0
+        )
+        if size_target <= 0 and entries_target <= 0:
+            return
+
+        keys = []
+        freed = 0
+        for key, size in self.connection.execute(
+            f"SELECT key, size FROM {self.table} ORDER BY accessed"  # noqa: S608
+        ):
+            keys.append((key,))
+            freed += size
+            if freed >= size_target and len(keys) >= entries_target:
+                break
+
+        logger.debug("Evicting %d entries (%d bytes) from %s", len(keys), freed, self.path)
+        with self.transaction() as connection:
+            connection.executemany(f"DELETE FROM {self.table} WHERE key = ?", keys)  # noqa: S608
+
+    def _is_full(self, stats: dict[str, int]) -> bool:
+        return stats["size"] > self.max_size or bool(
+            self.max_entries and stats["entries"] > self.max_entries
+        )
@@ -22,7 +22,7 @@ Additionally:
 
 * We support ``?_pageSize=...`` to change the REST page size, with ``?page_size=..`` as fallback.
 * We support ``?_format=..`` to request other output formats\
-  (e.g. ``json``, ``geojson`` or ``csv``).
+  (e.g. ``json``, ``geojson``, ``ndjson``, ``arrow``, ``parquet``, ``fgb``, ``gpkg`` or ``csv``).
 * We support ``?_csv_header=..`` to request alternative headers\
   (e.g. ``none``, ``titles``).
 * We support ``?_csv_separator=..`` to request a semicolon as delimiter, with a standard comma\
@@ -41,6 +41,11 @@ Mandatory settings to activate these classes by default:
             "rest_framework_dso.renderers.HALJSONRenderer",
             "rest_framework_dso.renderers.CSVRenderer",
             "rest_framework_dso.renderers.GeoJSONRenderer",
+            "rest_framework_dso.renderers.NDJSONRenderer",
+            "rest_framework_dso.renderers.ArrowRenderer",
+            "rest_framework_dso.renderers.ParquetRenderer",
+            "rest_framework_dso.renderers.FlatGeobufRenderer",
+            "rest_framework_dso.renderers.GeoPackageRenderer",
             "rest_framework_dso.renderers.BrowsableAPIRenderer",  # Optional
         ],
         DEFAULT_FILTER_BACKENDS=[
@@ -593,6 +593,9 @@ class DSOGeometryField(GeometryField):
         elif self._output_format == "csv":
             # Extended well-known text for CSV format.
             return value.ewkt
+        elif self._output_format in ("arrow", "parquet", "fgb", "gpkg"):
+            # Well-known binary for the columnar and GIS file formats.
+            return bytes(value.wkb)
         else:
             # Return GeoJSON for json/html/api formats
             return super().to_representation(value)
@@ -0,0 +1,647 @@
+"""Writers for the binary GIS file formats, which GIS tools (e.g. QGIS) open directly.
+
+* :class:`FlatGeobufWriter` writes FlatGeobuf, optionally with a packed Hilbert R-tree index.
+* :class:`GeoPackageWriter` writes a GeoPackage (an SQLite database).
+
+Both receive the features as ``(wkb, values)`` tuples, and produce the file as chunks of bytes.
+The geometries are read as WKB, which avoids accessing each coordinate through GEOS.
+Only the X/Y coordinates are written.
+"""
+
+import sqlite3
+import struct
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from enum import IntEnum
+from itertools import islice
+from math import ceil, inf
+from pathlib import Path
+from shutil import COPY_BUFSIZE
+from tempfile import TemporaryDirectory, TemporaryFile
+
+import flatbuffers
+import numpy
+import orjson
+
+FGB_MAGIC_BYTES = b"fgb\x03fgb\x00"
+FGB_NODE_ITEM = struct.Struct("<ddddQ")  # min_x, min_y, max_x, max_y, offset
+HILBERT_MAX = (1 << 16) - 1
+
+# The feature input, which is the geometry as WKB and the column values.
+Feature = tuple[bytes | None, list]
+
+
+class GeometryType(IntEnum):
+    """The geometry types, as defined by both WKB and FlatGeobuf."""
+
+    UNKNOWN = 0
+    POINT = 1
+    LINESTRING = 2
+    POLYGON = 3
+    MULTIPOINT = 4
+    MULTILINESTRING = 5
+    MULTIPOLYGON = 6
+    GEOMETRYCOLLECTION = 7
+
+
+class ColumnType(IntEnum):
+    """The column types of FlatGeobuf."""
+
+    BYTE = 0
+    UBYTE = 1
+    BOOL = 2
+    SHORT = 3
+    USHORT = 4
+    INT = 5
+    UINT = 6
+    LONG = 7
+    ULONG = 8
+    FLOAT = 9
+    DOUBLE = 10
+    STRING = 11
+    JSON = 12
+    DATETIME = 13
+    BINARY = 14
+
+
+# How the column types are declared in the GeoPackage.
+GPKG_COLUMN_TYPES = {
+    ColumnType.BOOL: "BOOLEAN",
+    ColumnType.LONG: "INTEGER",
+    ColumnType.DOUBLE: "DOUBLE",
+    ColumnType.DATETIME: "DATETIME",
+    ColumnType.BINARY: "BLOB",
+}
+
+
+@dataclass(frozen=True)
+class Column:
+    """A property column of the features."""
+
+    name: str
+    type: ColumnType = ColumnType.STRING
+    #: Overrides the GeoPackage column type (e.g. to declare a ``DATE``).
+    sql_type: str | None = None
+    title: str | None = None
+
+
+@dataclass
+class Geometry:
+    """The coordinates of a geometry, in the way FlatGeobuf stores them."""
+
+    type: GeometryType
+    #: The flattened X/Y coordinates.
+    xy: numpy.ndarray | None = None
+    #: The end index (in coordinate pairs) of each ring or line, if there are multiple.
+    ends: list[int] | None = None
+    #: The geometries of a multipolygon or geometry collection.
+    parts: list[Geometry] = field(default_factory=list)
+
+    def get_bounds(self) -> tuple[float, float, float, float] | None:
+        """Tell the bounding box, this is ``None`` for an empty geometry."""
+        if self.parts:
+            bounds = [b for part in self.parts if (b := part.get_bounds()) is not None]
+            if not bounds:
+                return None
+            return (
+                min(b[0] for b in bounds),
+                min(b[1] for b in bounds),
+                max(b[2] for b in bounds),
+                max(b[3] for b in bounds),
+            )
+        elif self.xy is None or not self.xy.size or numpy.isnan(self.xy).all():
+            return None
+        else:
+            pairs = self.xy.reshape(-1, 2)
+            min_x, min_y = numpy.nanmin(pairs, axis=0)
+            max_x, max_y = numpy.nanmax(pairs, axis=0)
+            return float(min_x), float(min_y), float(max_x), float(max_y)
+
+
+def read_wkb(wkb: bytes) -> Geometry:
+    """Parse the (ISO or extended) WKB format."""
+    return _read_wkb(memoryview(wkb), 0)[0]
+
+
+def _read_wkb(data: memoryview, pos: int) -> tuple[Geometry, int]:  # noqa: C901
+    byte_order = "<" if data[pos] else ">"
+    (code,) = struct.unpack_from(f"{byte_order}I", data, pos + 1)
+    pos += 5
+    if code & 0x20000000:  # EWKB with SRID
+        pos += 4
+
+    # Both the EWKB flags and the ISO numbering (e.g. 1001 = Point Z) are recognized.
+    iso_dims = (code & 0xFFFF) // 1000
+    has_z = bool(code & 0x80000000) or iso_dims in (1, 3)
+    has_m = bool(code & 0x40000000) or iso_dims in (2, 3)
+    dims = 2 + has_z + has_m
+    geometry_type = GeometryType((code & 0xFFFF) % 1000)
+
+    def read_coords(count) -> numpy.ndarray:
+        nonlocal pos
+        coords = numpy.frombuffer(data, f"{byte_order}f8", count * dims, pos)
+        pos += count * dims * 8
+        return coords.reshape(count, dims)[:, :2].ravel()
+
+    def read_count() -> int:
+        nonlocal pos
+        (count,) = struct.unpack_from(f"{byte_order}I", data, pos)
+        pos += 4
+        return count
+
+    if geometry_type == GeometryType.POINT:
+        return Geometry(geometry_type, xy=read_coords(1)), pos
+    elif geometry_type == GeometryType.LINESTRING:
+        return Geometry(geometry_type, xy=read_coords(read_count())), pos
+    elif geometry_type == GeometryType.POLYGON:
+        rings = [read_coords(read_count()) for _ in range(read_count())]
+        return _join_lines(geometry_type, rings), pos
+    elif geometry_type in (GeometryType.MULTIPOINT, GeometryType.MULTILINESTRING):
+        parts = []
+        for _ in range(read_count()):
+            part, pos = _read_wkb(data, pos)
+            parts.append(part.xy)
+        if geometry_type == GeometryType.MULTIPOINT:
+            return Geometry(geometry_type, xy=_concat(parts)), pos
+        return _join_lines(geometry_type, parts), pos
+    elif geometry_type in (GeometryType.MULTIPOLYGON, GeometryType.GEOMETRYCOLLECTION):
+        parts = []
+        for _ in range(read_count()):
+            part, pos = _read_wkb(data, pos)
+            parts.append(part)
+        return Geometry(geometry_type, parts=parts), pos
+    else:
+        raise ValueError(f"Unsupported WKB geometry type: {code}")
+
+
+def _join_lines(geometry_type: GeometryType, lines: list[numpy.ndarray]) -> Geometry:
+    ends = None
+    if len(lines) > 1:
+        ends = numpy.cumsum([len(line) // 2 for line in lines]).tolist()
+    return Geometry(geometry_type, xy=_concat(lines), ends=ends)
+
+
+def _concat(arrays: list[numpy.ndarray]) -> numpy.ndarray:
+    return numpy.concatenate(arrays) if arrays else numpy.empty(0, dtype="<f8")
+
+
+class FlatGeobufWriter:
+    """Write the features as FlatGeobuf.
+
+    Without a spatial index, each feature is written directly to the output stream.
+    The packed Hilbert R-tree has to be written before the features, and the features
+    need to be sorted in the order of the index. Hence, the features are collected
+    in a temporary file first when an index is requested.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        columns: list[Column],
+        geometry_type: GeometryType = GeometryType.UNKNOWN,
+        srid: int | None = None,
+        index_node_size: int = 16,
+    ):
+        self.name = name
+        self.columns = columns
+        self.geometry_type = geometry_type
+        self.srid = srid
+        self.index_node_size = index_node_size
+
+    def write(self, features: Iterable[Feature]) -> Iterator[bytes]:
+        """Generate the file contents."""
+        if self.index_node_size:
+            yield from self._write_indexed(features)
+        else:
+            # The feature count is unknown, which is written as 0.
+            yield FGB_MAGIC_BYTES + self.get_header(features_count=0)
+            for wkb, values in features:
+                yield self.get_feature(wkb, values)[0]
+
+    def _write_indexed(self, features: Iterable[Feature]) -> Iterator[bytes]:
+        with TemporaryFile() as spool:
+            # Write the features to disk, only the bounding boxes are kept in memory.
+            items = []
+            for wkb, values in features:
+                data, bounds = self.get_feature(wkb, values)
+                items.append((bounds, spool.tell(), len(data)))
+                spool.write(data)
+
+            extent = _get_extent([bounds for bounds, _, _ in items])
+            items.sort(key=lambda item: _hilbert_bounds(item[0], extent))
+
+            # The leaf nodes point to the new offsets of the (sorted) features.
+            leaves = []
+            offset = 0
+            for bounds, _, size in items:
+                leaves.append((*(bounds or (inf, inf, -inf, -inf)), offset))
+                offset += size
+
+            yield (
+                FGB_MAGIC_BYTES
+                + self.get_header(features_count=len(items), envelope=extent)
+                + _get_packed_rtree(leaves, self.index_node_size)
+            )
+
+            for _, position, size in items:
+                spool.seek(position)
+                yield spool.read(size)
+
+    def get_header(
+        self,
+        features_count: int,
+        envelope: tuple[float, float, float, float] | None = None,
+    ) -> bytes:
+        """Construct the size-prefixed header."""
+        builder = flatbuffers.Builder(1024)
+        name = builder.CreateString(self.name)
+        columns = [self._create_column(builder, column) for column in self.columns]
+        columns_vector = _create_offset_vector(builder, columns)
+        envelope_vector = (
+            builder.CreateNumpyVector(numpy.array(envelope, dtype="<f8"))
+            if envelope is not None and features_count
+            else None
+        )
+
+        crs = None
+        if self.srid is not None:
+            org = builder.CreateString("EPSG")
+            builder.StartObject(6)
+            builder.PrependUOffsetTRelativeSlot(0, org, 0)
+            builder.PrependInt32Slot(1, self.srid, 0)
+            crs = builder.EndObject()
+
+        builder.StartObject(14)
+        builder.PrependUOffsetTRelativeSlot(0, name, 0)
+        if envelope_vector is not None:
+            builder.PrependUOffsetTRelativeSlot(1, envelope_vector, 0)
+        builder.PrependUint8Slot(2, self.geometry_type, 0)
+        builder.PrependUOffsetTRelativeSlot(7, columns_vector, 0)
+        builder.PrependUint64Slot(8, features_count, 0)
+        # An index is only present when the features are counted.
+        builder.PrependUint16Slot(9, self.index_node_size if features_count else 0, 16)
+        if crs is not None:
+            builder.PrependUOffsetTRelativeSlot(10, crs, 0)
+        builder.FinishSizePrefixed(builder.EndObject())
+        return bytes(builder.Output())
+
+    def _create_column(self, builder: flatbuffers.Builder, column: Column) -> int:
+        name = builder.CreateString(column.name)
+        title = builder.CreateString(column.title) if column.title else None
+        builder.StartObject(11)
+        builder.PrependUOffsetTRelativeSlot(0, name, 0)
+        builder.PrependUint8Slot(1, column.type, 0)
+        if title is not None:
+            builder.PrependUOffsetTRelativeSlot(2, title, 0)
+        return builder.EndObject()
+
+    def get_feature(
+        self, wkb: bytes | None, values: list
+    ) -> tuple[bytes, tuple[float, float, float, float] | None]:
+        """Construct the size-prefixed feature, and tell its bounding box."""
+        builder = flatbuffers.Builder(1024)
+        bounds = geometry = None
+        if wkb is not None:
+            parsed = read_wkb(wkb)
+            if (bounds := parsed.get_bounds()) is not None:
+                geometry = _create_geometry(builder, parsed)
+
+        properties = builder.CreateByteVector(self._encode_properties(values))
+        builder.StartObject(3)
+        if geometry is not None:
+            builder.PrependUOffsetTRelativeSlot(0, geometry, 0)
+        builder.PrependUOffsetTRelativeSlot(1, properties, 0)
+        builder.FinishSizePrefixed(builder.EndObject())
+        return bytes(builder.Output()), bounds
+
+    def _encode_properties(self, values: list) -> bytes:  # noqa: C901
+        """Write the values in the binary FlatGeobuf properties format."""
+        buffer = bytearray()
+        for i, (column, value) in enumerate(zip(self.columns, values, strict=True)):
+            if value is None:
+                continue
+
+            buffer += struct.pack("<H", i)
+            if column.type == ColumnType.BOOL:
+                buffer += struct.pack("<?", value)
+            elif column.type == ColumnType.LONG:
+                buffer += struct.pack("<q", value)
+            elif column.type == ColumnType.DOUBLE:
+                buffer += struct.pack("<d", float(value))
+            else:
+                if column.type == ColumnType.BINARY:
+                    data = bytes(value)
+                elif column.type == ColumnType.JSON:
+                    data = orjson.dumps(value)
+                else:
+                    data = str(value).encode()
+                buffer += struct.pack("<I", len(data))
+                buffer += data
+
+        return bytes(buffer)
+
+
+def _create_geometry(builder: flatbuffers.Builder, geometry: Geometry) -> int:
+    parts = [_create_geometry(builder, part) for part in geometry.parts]
+    parts_vector = _create_offset_vector(builder, parts) if parts else None
+    ends_vector = (
+        builder.CreateNumpyVector(numpy.array(geometry.ends, dtype="<u4"))
+        if geometry.ends
+        else None
+    )
+    xy_vector = (
+        builder.CreateNumpyVector(geometry.xy.astype("<f8", copy=False))
+        if geometry.xy is not None
+        else None
+    )
+
+    builder.StartObject(8)
+    if ends_vector is not None:
+        builder.PrependUOffsetTRelativeSlot(0, ends_vector, 0)
+    if xy_vector is not None:
+        builder.PrependUOffsetTRelativeSlot(1, xy_vector, 0)
+    builder.PrependUint8Slot(6, geometry.type, 0)
+    if parts_vector is not None:
+        builder.PrependUOffsetTRelativeSlot(7, parts_vector, 0)
+    return builder.EndObject()
+
+
+def _create_offset_vector(builder: flatbuffers.Builder, offsets: list[int]) -> int:
+    builder.StartVector(4, len(offsets), 4)
+    for offset in reversed(offsets):
+        builder.PrependUOffsetTRelative(offset)
+    return builder.EndVector()
+
+
+def _get_extent(all_bounds: list) -> tuple[float, float, float, float] | None:
+    all_bounds = [bounds for bounds in all_bounds if bounds is not None]
+    if not all_bounds:
+        return None
+    return (
+        min(b[0] for b in all_bounds),
+        min(b[1] for b in all_bounds),
+        max(b[2] for b in all_bounds),
+        max(b[3] for b in all_bounds),
+    )
+
+
+def _get_packed_rtree(leaves: list[tuple], node_size: int) -> bytes:
+    """Construct the packed R-tree. The root node comes first, and the leaves come last.
+    Each parent node points to the index of its first child node.
+    """
+    if not leaves:
+        return b""
+
+    level_bounds = _get_level_bounds(len(leaves), node_size)
+    nodes = [None] * level_bounds[0][1]
+    nodes[level_bounds[0][0] :] = leaves
+    for (child_start, child_end), (parent_start, _) in zip(
+        level_bounds, level_bounds[1:], strict=False
+    ):
+        for pos, start in enumerate(range(child_start, child_end, node_size), parent_start):
+            children = nodes[start : min(start + node_size, child_end)]
+            nodes[pos] = (
+                min(child[0] for child in children),
+                min(child[1] for child in children),
+                max(child[2] for child in children),
+                max(child[3] for child in children),
+                start,
+            )
+
+    return b"".join(FGB_NODE_ITEM.pack(*node) for node in nodes)
+
+
+def _get_level_bounds(num_items: int, node_size: int) -> list[tuple[int, int]]:
+    """Tell the node positions of each tree level, starting with the leaves.
+    This follows the reference implementation, so readers calculate the same index size.
+    """
+    level_num_nodes = [num_items]
+    num_nodes = n = num_items
+    while True:
+        n = ceil(n / node_size)
+        num_nodes += n
+        level_num_nodes.append(n)
+        if n == 1:
+            break
+
+    level_bounds = []
+    end = num_nodes
+    for size in level_num_nodes:
+        level_bounds.append((end - size, end))
+        end -= size
+    return level_bounds
+
+
+def _hilbert_bounds(bounds, extent) -> int:
+    """Tell the position of the bounding box center on the Hilbert curve."""
+    if bounds is None:
+        return 0
+
+    min_x, min_y, max_x, max_y = extent
+    width = (max_x - min_x) or 1.0
+    height = (max_y - min_y) or 1.0
+    x = int(HILBERT_MAX * ((bounds[0] + bounds[2]) / 2 - min_x) / width)
+    y = int(HILBERT_MAX * ((bounds[1] + bounds[3]) / 2 - min_y) / height)
+    return _hilbert(x, y)
+
+
+def _hilbert(x: int, y: int) -> int:
+    """Calculate the Hilbert curve index of 16-bit coordinates.
+    This is the algorithm that FlatGeobuf (and flatbush) use.
+    """
+    a = x ^ y
+    b = 0xFFFF ^ a
+    c = 0xFFFF ^ (x | y)
+    d = x & (y ^ 0xFFFF)
+
+    A = a | (b >> 1)  # noqa: N806
+    B = (a >> 1) ^ a  # noqa: N806
+    C = ((c >> 1) ^ (b & (d >> 1))) ^ c  # noqa: N806
+    D = ((a & (c >> 1)) ^ (d >> 1)) ^ d  # noqa: N806
+
+    a, b, c, d = A, B, C, D
+    A = (a & (a >> 2)) ^ (b & (b >> 2))  # noqa: N806
+    B = (a & (b >> 2)) ^ (b & ((a ^ b) >> 2))  # noqa: N806
+    C ^= (a & (c >> 2)) ^ (b & (d >> 2))  # noqa: N806
+    D ^= (b & (c >> 2)) ^ ((a ^ b) & (d >> 2))  # noqa: N806
+
+    a, b, c, d = A, B, C, D
+    A = (a & (a >> 4)) ^ (b & (b >> 4))  # noqa: N806
+    B = (a & (b >> 4)) ^ (b & ((a ^ b) >> 4))  # noqa: N806
+    C ^= (a & (c >> 4)) ^ (b & (d >> 4))  # noqa: N806
+    D ^= (b & (c >> 4)) ^ ((a ^ b) & (d >> 4))  # noqa: N806
+
+    a, b, c, d = A, B, C, D
+    C ^= (a & (c >> 8)) ^ (b & (d >> 8))  # noqa: N806
+    D ^= (b & (c >> 8)) ^ ((a ^ b) & (d >> 8))  # noqa: N806
+
+    a = C ^ (C >> 1)
+    b = D ^ (D >> 1)
+
+    i0 = x ^ y
+    i1 = b | (0xFFFF ^ (i0 | a))
+    return (_interleave(i1) << 1) | _interleave(i0)
+
+
+def _interleave(value: int) -> int:
+    value = (value | (value << 8)) & 0x00FF00FF
+    value = (value | (value << 4)) & 0x0F0F0F0F
+    value = (value | (value << 2)) & 0x33333333
+    return (value | (value << 1)) & 0x55555555
+
+
+class GeoPackageWriter:
+    """Write the features as GeoPackage.
+
+    As this is an SQLite database, it can't be written as a stream.
+    The database is written to a temporary file first, which is streamed afterwards.
+    """
+
+    #: The number of rows to insert at once.
+    batch_size = 2000
+
+    def __init__(
+        self,
+        name: str,
+        columns: list[Column],
+        geometry_column: str = "geometry",
+        geometry_type: GeometryType = GeometryType.UNKNOWN,
+        srid: int | None = None,
+        srs_definition: str = "undefined",
+    ):
+        self.name = name
+        self.columns = columns
+        self.geometry_column = geometry_column
+        self.geometry_type = geometry_type
+        self.srid = srid
+        self.srs_definition = srs_definition
+
+    def write(
+        self, features: Iterable[Feature], chunk_size: int = COPY_BUFSIZE
+    ) -> Iterator[bytes]:
+        """Generate the file contents."""
+        with TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "export.gpkg"
+            with sqlite3.connect(path) as connection:
+                self._write_database(connection, iter(features))
+            connection.close()
+
+            with path.open("rb") as file:
+                while chunk := file.read(chunk_size):
+                    yield chunk
+
+    def _write_database(self, connection: sqlite3.Connection, features: Iterator[Feature]):
+        srs_id = self.srid if self.srid is not None else -1
+        connection.executescript(GPKG_SCHEMA)
+        if srs_id not in (-1, 0, 4326):
+            connection.execute(
+                "INSERT INTO gpkg_spatial_ref_sys VALUES (?, ?, 'EPSG', ?, ?, NULL)",
+                (f"EPSG:{srs_id}", srs_id, srs_id, self.srs_definition),
+            )
+
+        table = _quote(self.name)
+        column_defs = "".join(
+            f", {_quote(column.name)} {self._get_sql_type(column)}" for column in self.columns
+        )
+        geometry_name = GeometryType(self.geometry_type).name if self.geometry_type else "GEOMETRY"
+        connection.execute(
+            f"CREATE TABLE {table} (fid INTEGER PRIMARY KEY AUTOINCREMENT,"
+            f" {_quote(self.geometry_column)} {geometry_name}{column_defs})"
+        )
+        connection.execute(
+            "INSERT INTO gpkg_geometry_columns VALUES (?, ?, ?, ?, 0, 0)",
+            (self.name, self.geometry_column, geometry_name, srs_id),
+        )
+
+        placeholders = ", ".join("?" * (len(self.columns) + 1))
+        insert = f"INSERT INTO {table} VALUES (NULL, {placeholders})"  # noqa: S608
+        all_bounds = []
+        while batch := list(islice(features, self.batch_size)):
+            rows = []
+            for wkb, values in batch:
+                blob, bounds = self._get_geometry_blob(wkb, srs_id)
+                all_bounds.append(bounds)
+                rows.append((blob, *map(self._to_sql, self.columns, values, strict=True)))
+            connection.executemany(insert, rows)
+            all_bounds = [_get_extent(all_bounds)]
+
+        connection.execute(
+            "INSERT INTO gpkg_contents (table_name, data_type, identifier,"
+            " min_x, min_y, max_x, max_y, srs_id) VALUES (?, 'features', ?, ?, ?, ?, ?, ?)",
+            (self.name, self.name, *(_get_extent(all_bounds) or (None,) * 4), srs_id),
+        )
+
+    def _get_geometry_blob(
+        self, wkb: bytes | None, srs_id: int
+    ) -> tuple[bytes | None, tuple[float, float, float, float] | None]:
+        """Construct the GeoPackage binary format, which is a header followed by the WKB."""
+        if wkb is None:
+            return None, None
+
+        bounds = read_wkb(wkb).get_bounds()
+        flags = 0x01 if bounds is not None else 0x11  # little endian, no envelope, empty flag.
+        return b"GP\x00" + struct.pack("<Bi", flags, srs_id) + wkb, bounds
+
+    def _get_sql_type(self, column: Column) -> str:
+        return column.sql_type or GPKG_COLUMN_TYPES.get(column.type, "TEXT")
+
+    def _to_sql(self, column: Column, value):
+        if value is None or column.type in (ColumnType.BOOL, ColumnType.LONG):
+            return value
+        elif column.type == ColumnType.DOUBLE:
+            return float(value)
+        elif column.type == ColumnType.BINARY:
+            return bytes(value)
+        elif column.type == ColumnType.JSON:
+            return orjson.dumps(value).decode()
+        else:
+            return str(value)
+
+
+def _quote(name: str) -> str:
+    return '"{}"'.format(name.replace('"', '""'))
+
+
+# The required tables of a GeoPackage, including the mandatory spatial reference systems.
+GPKG_SCHEMA = """
+PRAGMA application_id = 1196444487;
+PRAGMA user_version = 10400;
+PRAGMA journal_mode = OFF;
+PRAGMA synchronous = OFF;
+CREATE TABLE gpkg_spatial_ref_sys (
+  srs_name TEXT NOT NULL,
+  srs_id INTEGER NOT NULL PRIMARY KEY,
+  organization TEXT NOT NULL,
+  organization_coordsys_id INTEGER NOT NULL,
+  definition TEXT NOT NULL,
+  description TEXT
+);
+CREATE TABLE gpkg_contents (
+  table_name TEXT NOT NULL PRIMARY KEY,
+  data_type TEXT NOT NULL,
+  identifier TEXT UNIQUE,
+  description TEXT DEFAULT '',
+  last_change DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now')),
+  min_x DOUBLE,
+  min_y DOUBLE,
+  max_x DOUBLE,
+  max_y DOUBLE,
+  srs_id INTEGER,
+  CONSTRAINT fk_gc_r_srs_id FOREIGN KEY (srs_id) REFERENCES gpkg_spatial_ref_sys(srs_id)
+);
+CREATE TABLE gpkg_geometry_columns (
+  table_name TEXT NOT NULL,
+  column_name TEXT NOT NULL,
+  geometry_type_name TEXT NOT NULL,
+  srs_id INTEGER NOT NULL,
+  z TINYINT NOT NULL,
+  m TINYINT NOT NULL,
+  CONSTRAINT pk_geom_cols PRIMARY KEY (table_name, column_name),
+  CONSTRAINT fk_gc_tn FOREIGN KEY (table_name) REFERENCES gpkg_contents(table_name),
+  CONSTRAINT fk_gc_srs FOREIGN KEY (srs_id) REFERENCES gpkg_spatial_ref_sys (srs_id)
+);
+INSERT INTO gpkg_spatial_ref_sys VALUES
+  ('Undefined cartesian SRS', -1, 'NONE', -1, 'undefined', NULL),
+  ('Undefined geographic SRS', 0, 'NONE', 0, 'undefined', NULL),
+  ('WGS 84 geodetic', 4326, 'EPSG', 4326, 'GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",6378137,298.257223563,AUTHORITY["EPSG","7030"]],AUTHORITY["EPSG","6326"]],PRIMEM["Greenwich",0,AUTHORITY["EPSG","8901"]],UNIT["degree",0.0174532925199433,AUTHORITY["EPSG","9122"]],AXIS["Latitude",NORTH],AXIS["Longitude",EAST],AUTHORITY["EPSG","4326"]]', NULL);
+"""  # noqa: E501
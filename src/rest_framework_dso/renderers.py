@@ -3,32 +3,86 @@
 This makes sure the response gets the desired ``application/hal+json``
 """
 
+import csv
 from datetime import datetime
-from io import BytesIO
+from io import BytesIO, RawIOBase
+from itertools import chain, islice
 from types import GeneratorType
 
 import orjson
+import pyarrow
+import pyarrow.ipc
+import pyarrow.parquet
 from django.conf import settings
+from django.contrib.gis.db.models.functions import AsGeoJSON, Transform
+from django.contrib.gis.gdal import SpatialReference
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, models
+from django.db.models.functions import Cast, Coalesce, Concat, NullIf
 from django.http import HttpRequest
 from django.urls import reverse
 from django.utils.timezone import get_current_timezone
-from rest_framework import renderers
+from rest_framework import renderers, serializers
 from rest_framework.relations import HyperlinkedRelatedField
-from rest_framework.serializers import ListSerializer, Serializer, SerializerMethodField
+from rest_framework.serializers import (
+    BaseSerializer,
+    ListSerializer,
+    Serializer,
+    SerializerMethodField,
+)
 from rest_framework.utils.breadcrumbs import get_breadcrumbs as drf_get_breadcrumbs
 from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+from rest_framework_csv.misc import Echo
 from rest_framework_csv.renderers import CSVStreamingRenderer
-from rest_framework_gis.fields import GeoJsonDict
+from rest_framework_gis.fields import GeoJsonDict, GeometryField
 
-from rest_framework_dso import pagination
+from rest_framework_dso import geofiles, pagination
 from rest_framework_dso.crs import CRS84, WGS84
 from rest_framework_dso.exceptions import HumanReadableException
 from rest_framework_dso.fields import GeoJSONIdentifierField
+from rest_framework_dso.iterators import DEFAULT_SQL_CHUNK_SIZE, ObservableQuerySet
 from rest_framework_dso.serializer_helpers import ReturnGenerator
+from rest_framework_dso.sql_export import (
+    INTEGER_TYPES,
+    JSONBuildObject,
+    SQLColumn,
+    ToISODate,
+    ToISODateTime,
+    ToJSON,
+    get_sql_columns,
+)
+from rest_framework_dso.utils import get_source_model_field
 
 BROWSABLE_MAX_PAGE_SIZE = 1000
 DEFAULT_CHUNK_SIZE = 4096
 
+# How the serializer field classes (including subclasses) are written in Arrow.
+# Fields that are not recognized are written as text.
+ARROW_TYPES = {
+    GeometryField: pyarrow.binary(),  # as WKB
+    serializers.BooleanField: pyarrow.bool_(),
+    serializers.IntegerField: pyarrow.int64(),
+    serializers.FloatField: pyarrow.float64(),
+    serializers.DateField: pyarrow.date32(),
+    serializers.TimeField: pyarrow.time64("us"),
+    serializers.CharField: pyarrow.string(),
+}
+
+# How the serializer field classes (including subclasses) are written in FlatGeobuf
+# and GeoPackage. Fields that are not recognized are written as text.
+GEOFILE_TYPES = {
+    GeometryField: {"type": geofiles.ColumnType.BINARY},  # as WKB
+    serializers.BooleanField: {"type": geofiles.ColumnType.BOOL},
+    serializers.IntegerField: {"type": geofiles.ColumnType.LONG},
+    serializers.FloatField: {"type": geofiles.ColumnType.DOUBLE},
+    serializers.DecimalField: {"type": geofiles.ColumnType.DOUBLE},
+    serializers.DateTimeField: {"type": geofiles.ColumnType.DATETIME},
+    serializers.DateField: {"type": geofiles.ColumnType.DATETIME, "sql_type": "DATE"},
+    serializers.ListField: {"type": geofiles.ColumnType.JSON},
+    serializers.DictField: {"type": geofiles.ColumnType.JSON},
+    serializers.JSONField: {"type": geofiles.ColumnType.JSON},
+}
+
 
 def get_data_serializer(data) -> Serializer | None:
     """Find the serializer associated with the incoming 'data'"""
@@ -56,12 +110,22 @@ class RendererMixin:
     default_crs = None
     paginator = None
 
+    #: The compression level per content-coding for streaming responses (e.g. ``{"gzip": 9}``),
+    #: which overrides the ``STREAMING_COMPRESSION_LEVELS`` setting.
+    compression_levels: dict[str, int] = {}
+
     chunk_size = DEFAULT_CHUNK_SIZE  # allow to overrule in unit tests
 
     def setup_pagination(self, paginator: pagination.DelegatedPageNumberPagination):
         """Used by DelegatedPageNumberPagination"""
         self.paginator = paginator
 
+    def can_export_queryset(self, queryset: models.QuerySet, serializer: Serializer) -> bool:
+        """Tell whether the renderer reads the queryset of a listing directly from the database.
+        In that case, the serializer won't execute the query beforehand.
+        """
+        return False
+
     def tune_serializer(self, serializer: Serializer):
         """Allow to fine-tune the serializer (e.g. remove unused fields).
         This hook is used so the 'fields' are properly set before the peek_iterable()
@@ -235,6 +299,51 @@ class HALJSONRenderer(RendererMixin, renderers.JSONRenderer):
             yield b"\n"
 
 
+class NDJSONRenderer(RendererMixin, renderers.JSONRenderer):
+    """Write newline-delimited JSON, with one record per line.
+
+    This allows bulk consumers to parse the data line by line,
+    as there is no envelope and no footer. Embedded objects are written as separate lines
+    after the main records, with an ``"_embed"`` key that tells the relation they belong to.
+    """
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    unlimited_page_size = True
+    compatible_paginator_classes = [pagination.DSOHTTPHeaderPageNumberPagination]
+    content_disposition = 'attachment; filename="{filename}.ndjson"'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render the data as streaming."""
+        if data is None:
+            return
+
+        yield from _chunked_output(self._render_ndjson(data), chunk_size=self.chunk_size)
+
+    def _render_ndjson(self, data):
+        if isinstance(data, ReturnDict) and isinstance(data.serializer, ListSerializer):
+            # A listing with embeds: {"results_field": [...], "relation": [...], ...}
+            # The first key holds the main objects, which are written unchanged.
+            sections = iter(data.items())
+            _, items = next(sections)
+            for item in items:
+                yield orjson.dumps(item) + b"\n"
+
+            # The embedded objects are only retrieved after the main objects are written.
+            for name, embedded_items in sections:
+                for item in embedded_items:
+                    yield orjson.dumps({"_embed": name, **item}) + b"\n"
+        elif isinstance(data, dict):
+            # Detail view, or error message
+            yield orjson.dumps(data) + b"\n"
+        else:
+            # List without embeds (e.g. a paginated list)
+            for item in data:
+                yield orjson.dumps(item) + b"\n"
+
+
 class CSVRenderer(RendererMixin, CSVStreamingRenderer):
     """Overwritten CSV renderer to provide proper headers.
 
@@ -341,41 +450,141 @@ class CSVRenderer(RendererMixin, CSVStreamingRenderer):
             # Original logic renders a "fieldname.0", "fieldname.1" columns.
             return super().flatten_list(value)
 
+    def can_export_queryset(self, queryset: models.QuerySet, serializer: Serializer) -> bool:
+        """Tell whether the queryset can be exported using PostgreSQL ``COPY``."""
+        return self._get_copy_columns(queryset, serializer) is not None
+
+    def _get_copy_columns(
+        self, queryset: models.QuerySet, serializer: Serializer
+    ) -> list[SQLColumn] | None:
+        """Find which columns PostgreSQL should render. This only works when all fields
+        can be rendered by the database with the exact same output as the serializer gives.
+        """
+        request = serializer.context.get("request")
+        separator = self._get_query_params(request)["separator"] or ","
+        if (
+            not isinstance(queryset, models.QuerySet)
+            or isinstance(queryset, ObservableQuerySet)  # paginated, the page reads the items
+            or queryset.query.distinct  # would add ordering fields as extra columns.
+            or len(separator.encode()) != 1
+            or separator in '"\r\n\\'
+        ):
+            return None
+
+        header, _ = self._get_csv_header(serializer, request)
+        columns = get_sql_columns(serializer, header)
+        if columns is None or any(column.kind == "geometry" for column in columns):
+            return None  # PostgreSQL writes a different WKT notation than GEOS does.
+        return columns
+
     def render(self, data, media_type=None, renderer_context=None):
-        csv_header = "id"
-        if (serializer := get_data_serializer(data)) is not None:
+        if (serializer := get_data_serializer(data)) is None:
+            # The layout is unknown (e.g. an error message), let the base class flatten the data.
+            output = super().render(data, media_type=media_type, renderer_context=renderer_context)
+        else:
             request = renderer_context.get("request")
             header, labels = self._get_csv_header(serializer, request)
 
             # Get query parameters
             query_params = self._get_query_params(request)
-            csv_header = query_params["header"]
-            csv_separator = query_params["separator"]
-
-            writer_opts = {}
-            # Overwrite delimiter
-            if csv_separator:
-                writer_opts = {"delimiter": csv_separator}
-
-            renderer_context = {
-                **(renderer_context or {}),
-                "header": header,
-                "labels": labels,
-                "writer_opts": writer_opts,
-            }
-
-        output = super().render(data, media_type=media_type, renderer_context=renderer_context)
+            with_header = query_params["header"] != "none"
+            separator = query_params["separator"] or ","
 
-        # CSVStreamingRenderer uses keys as headers by default so if no headers are passed,
-        # they are still present in the output. Here we manually remove the first row
-        if csv_header == "none":
-            next(output)
+            if isinstance(data, ReturnGenerator) and (
+                columns := self._get_copy_columns(data.serializer.instance, serializer)
+            ):
+                # Let PostgreSQL render the CSV, bypassing the serializer.
+                output = self._render_copy(
+                    data.serializer.instance, columns, labels, with_header, separator
+                )
+            else:
+                output = self._render_rows(data, header, labels, with_header, separator)
 
         # This method must have a "yield" statement so finalize_response() can
         # recognize this renderer returns a generator/stream, and patch the
         # response.streaming attribute accordingly.
         yield from _chunked_output(output, chunk_size=self.chunk_size)
 
+    def _render_rows(
+        self, data, header: list[str], labels: dict, with_header: bool, separator: str
+    ):
+        """Write the CSV rows using precompiled accessors for each column.
+
+        This gives the same output as the flattening of ``CSVStreamingRenderer``,
+        but avoids constructing a flattened dictionary for every record.
+        """
+        writer = csv.writer(Echo(), delimiter=separator)
+        if with_header:
+            yield writer.writerow([labels.get(name, name) for name in header]).encode()
+
+        accessors = [_get_csv_accessor(name) for name in header]
+        for record in [data] if isinstance(data, dict) else data:
+            yield writer.writerow([accessor(record) for accessor in accessors]).encode()
+
+    def _render_copy(
+        self,
+        queryset: models.QuerySet,
+        columns: list[SQLColumn],
+        labels: dict,
+        with_header: bool,
+        separator: str,
+    ):
+        """Stream the CSV data directly from PostgreSQL using ``COPY ... TO STDOUT``.
+
+        The header is still written by the Python csv module,
+        so it's identical to the header of the regular output.
+        """
+        if with_header:
+            writer = csv.writer(Echo(), delimiter=separator)
+            yield writer.writerow([labels.get(c.name, c.name) for c in columns]).encode()
+
+        single = len(columns) == 1
+        queryset = queryset.values(
+            **{f"_col{i}": self._get_copy_expression(c, single) for i, c in enumerate(columns)}
+        )
+        try:
+            sql, params = queryset.query.get_compiler(using=queryset.db).as_sql()
+        except EmptyResultSet:
+            return
+
+        statement = f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, DELIMITER %s)"
+        with (
+            connections[queryset.db].cursor() as cursor,
+            cursor.copy(statement, (*params, separator)) as copy,
+        ):
+            for row in copy:
+                # PostgreSQL sends each row as a separate block, and ends it with \n.
+                # The Python csv module writes \r\n as line terminator.
+                yield bytes(row[:-1]) + b"\r\n"
+
+    def _get_copy_expression(self, column: SQLColumn, single: bool):
+        """Tell how PostgreSQL should format the value, so it's identical to Python output."""
+        if column.kind == "string":
+            # PostgreSQL writes "" for empty strings, Python writes nothing.
+            expression = NullIf(Cast(column.lookup, models.TextField()), models.Value(""))
+        elif column.kind == "boolean":
+            expression = models.Case(
+                models.When(**{column.lookup: True}, then=models.Value("True")),
+                models.When(**{column.lookup: False}, then=models.Value("False")),
+                output_field=models.TextField(),
+            )
+        elif column.kind == "date":
+            expression = ToISODate(column.lookup)
+        elif column.kind == "datetime":
+            expression = ToISODateTime(column.lookup)
+        else:
+            expression = models.F(column.lookup)
+
+        if single:
+            # With a single column, Python writes "" for empty values
+            # (so the line isn't blank). PostgreSQL does the same for empty strings.
+            expression = Coalesce(
+                Cast(expression, models.TextField()),
+                models.Value(""),
+                output_field=models.TextField(),
+            )
+        return expression
+
     def render_exception(self, exception: Exception):
         """Inform clients that the stream was interrupted by an exception.
         The actual exception is still raised and logged.
@@ -404,6 +613,10 @@ class GeoJSONRenderer(RendererMixin, renderers.JSONRenderer):
     compatible_paginator_classes = [pagination.DelegatedPageNumberPagination]
     content_disposition = 'attachment; filename="{filename}.json"'
 
+    #: The number of decimals for the coordinates that the database generates,
+    #: which gives the same precision as the floats of the regular output.
+    geojson_precision = 15
+
     def tune_serializer(self, serializer: Serializer):
         """Remove unused fields from the serializer:"""
         request = serializer.context["request"]
@@ -422,6 +635,75 @@ class GeoJSONRenderer(RendererMixin, renderers.JSONRenderer):
             id_field.bind("__id__", serializer)
             serializer.fields["__id__"] = id_field
 
+    def can_export_queryset(self, queryset: models.QuerySet, serializer: Serializer) -> bool:
+        """Tell whether the database can generate the GeoJSON features."""
+        return self._get_feature_expression(queryset, serializer) is not None
+
+    def _get_feature_expression(
+        self, queryset: models.QuerySet, serializer: Serializer
+    ) -> models.Func | None:
+        """Construct the SQL expression that generates a GeoJSON feature for each record.
+        This only works when all fields can be rendered by the database with the same output
+        as the serializer gives. Otherwise, ``None`` is returned.
+        """
+        request = serializer.context.get("request")
+        accept_crs = getattr(request, "accept_crs", None)
+        id_field = serializer.fields.get("__id__")
+        if (
+            accept_crs is None
+            or not isinstance(queryset, models.QuerySet)
+            or isinstance(queryset, ObservableQuerySet)  # paginated, the page reads the items
+            or queryset.query.distinct  # would add ordering fields as extra columns.
+            or not isinstance(id_field, GeoJSONIdentifierField)
+        ):
+            return None
+
+        columns = get_sql_columns(
+            serializer, [name for name in serializer.fields if name != "__id__"]
+        )
+        if columns is None or len(columns) > 50:  # json_build_object() takes 100 arguments.
+            return None
+
+        # The geometry is written as "geometry", so it must be the only one.
+        # It should also be transformed, just like the serializer does.
+        geometries = [column for column in columns if column.kind == "geometry"]
+        exclude_crs_fields = getattr(serializer.Meta, "exclude_crs_fields", ())
+        if len(geometries) != 1 or geometries[0].name in exclude_crs_fields:
+            return None
+
+        return JSONBuildObject(
+            type=Cast(models.Value("Feature"), models.TextField()),
+            id=Concat(
+                models.Value(f"{id_field.model._meta.object_name}."),
+                Cast("pk", models.TextField()),
+                output_field=models.TextField(),
+            ),
+            geometry=ToJSON(
+                AsGeoJSON(
+                    Transform(geometries[0].lookup, accept_crs.srid),
+                    precision=self.geojson_precision,
+                )
+            ),
+            properties=JSONBuildObject(
+                **{
+                    column.name: self._get_property_expression(column)
+                    for column in columns
+                    if column is not geometries[0]
+                }
+            ),
+        )
+
+    def _get_property_expression(self, column: SQLColumn):
+        """Tell how PostgreSQL should format the value, so it's identical to Python output."""
+        if column.kind == "string":
+            return Cast(column.lookup, models.TextField())
+        elif column.kind == "date":
+            return ToISODate(column.lookup)
+        elif column.kind == "datetime":
+            return ToISODateTime(column.lookup)
+        else:
+            return models.F(column.lookup)
+
     def render(self, data, accepted_media_type=None, renderer_context=None):
         """
         Render `data` into JSON, returning a bytestring.
@@ -434,7 +716,21 @@ class GeoJSONRenderer(RendererMixin, renderers.JSONRenderer):
 
     def _render_geojson(self, data, request=None):
         # Detect what kind of data is actually provided:
-        if isinstance(data, dict):
+        if (
+            isinstance(data, ReturnDict)
+            and isinstance(data.serializer, ListSerializer)
+            and len(data) == 1
+            and (
+                expression := self._get_feature_expression(
+                    data.serializer.instance, data.serializer.child
+                )
+            )
+            is not None
+        ):
+            # Let PostgreSQL generate the features, bypassing the serializer.
+            yield from self._render_geojson_query(data.serializer.instance, expression, request)
+            return
+        elif isinstance(data, dict):
             if len(data) > 4:
                 # Must be a detail page.
                 yield self._render_geojson_detail(data, request=request)
@@ -494,17 +790,45 @@ class GeoJSONRenderer(RendererMixin, renderers.JSONRenderer):
 
         if first_generator is None:
             # No feature detected, nothing is yet written. Output empty response
-            yield b"%b\n" % orjson.dumps(
-                {
-                    **self._get_header(request),
-                    "features": [],
-                    **self._get_footer(),
-                }
-            )
+            yield self._get_empty_collection(request)
         else:
             # Write footer
-            footer = self._get_footer()
-            yield b"\n  ],\n%b\n" % orjson.dumps(footer)[1:]
+            yield self._get_closing_footer()
+
+    def _render_geojson_query(self, queryset: models.QuerySet, expression, request=None):
+        """Write the GeoJSON features that are generated by the database.
+        The features are fetched as text, so they are written without parsing.
+        """
+        features = (
+            queryset.prefetch_related(None)
+            .values_list(Cast(expression, models.TextField()), flat=True)
+            .iterator(chunk_size=DEFAULT_SQL_CHUNK_SIZE)
+        )
+
+        first_feature = next(features, None)
+        if first_feature is None:
+            yield self._get_empty_collection(request)
+            return
+
+        yield orjson.dumps(self._get_header(request))[:-1]
+        yield b',\n  "features": [\n    '
+        yield first_feature.encode()
+        yield from (b",\n    %b" % feature.encode() for feature in features)
+        yield self._get_closing_footer()
+
+    def _get_empty_collection(self, request) -> bytes:
+        return b"%b\n" % orjson.dumps(
+            {
+                **self._get_header(request),
+                "features": [],
+                **self._get_footer(),
+            }
+        )
+
+    def _get_closing_footer(self) -> bytes:
+        """Close the features list, and write the footer."""
+        footer = self._get_footer()
+        return b"\n  ],\n%b\n" % orjson.dumps(footer)[1:]
 
     def _get_header(self, request):
         return {
@@ -587,6 +911,444 @@ class GeoJSONRenderer(RendererMixin, renderers.JSONRenderer):
         )
 
 
+class ArrowRenderer(RendererMixin, renderers.BaseRenderer):
+    """Write the data as Apache Arrow IPC stream.
+
+    This columnar format can be loaded directly into dataframes (e.g. pandas, polars, DuckDB)
+    without parsing text. The records are written as one record batch per database chunk,
+    so memory usage stays bounded to a single batch. Geometries are written as WKB.
+    """
+
+    media_type = "application/vnd.apache.arrow.stream"
+    format = "arrow"
+    charset = None
+    render_style = "binary"
+
+    unlimited_page_size = True
+    supports_list_embeds = False
+    supports_detail_embeds = False
+    supports_m2m = False
+    compatible_paginator_classes = [pagination.DSOHTTPHeaderPageNumberPagination]
+    content_disposition = 'attachment; filename="{filename}.arrow"'
+
+    #: The number of records in a single batch, same as the chunks of the queryset iterator.
+    batch_size = DEFAULT_SQL_CHUNK_SIZE
+
+    def tune_serializer(self, serializer: Serializer):
+        """Remove the fields that can't be written as a column.
+        The remaining fields are adjusted to return native values instead of strings.
+        """
+        serializer.fields = _get_column_fields(serializer)
+        for field in serializer.fields.values():
+            self._tune_field(field)
+
+    def _tune_field(self, field: serializers.Field):
+        if isinstance(
+            field, (serializers.DateField, serializers.DateTimeField, serializers.TimeField)
+        ):
+            field.format = None  # return the date/time object instead of a string
+        elif isinstance(field, serializers.DecimalField) and self._get_decimal_type(field):
+            field.coerce_to_string = False
+        elif isinstance(field, serializers.ListField):
+            self._tune_field(field.child)
+
+    def render_exception(self, exception):
+        """Text can't be added to the binary stream.
+        The incomplete stream will be rejected by the client instead.
+        """
+        return b""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render the data as streaming."""
+        if data is None:
+            return
+
+        request = renderer_context.get("request") if renderer_context else None
+        yield from self._render_batches(data, request)
+
+    def _render_batches(self, data, request=None):
+        serializer = get_data_serializer(data)
+        records = iter([data] if isinstance(data, dict) else data)
+
+        # The first batch is read before the schema is constructed,
+        # as the serializer detects the CRS of the geometry data.
+        batch = list(islice(records, self.batch_size))
+        if serializer is None:
+            # e.g. an error message, detect the types from the data.
+            schema = pyarrow.Table.from_pylist(batch).schema
+            text_columns = ()
+        else:
+            schema, text_columns = self._get_schema(serializer, request)
+
+        sink = _OutputBuffer()
+        with self._get_writer(sink, schema) as writer:
+            while batch:
+                for record in batch:
+                    for name in text_columns:
+                        record[name] = _to_text(record.get(name))
+
+                writer.write_batch(pyarrow.RecordBatch.from_pylist(batch, schema=schema))
+                yield sink.drain()
+                batch = list(islice(records, self.batch_size))
+
+        # Write the remaining footer (an empty result still has the schema).
+        yield sink.drain()
+
+    def _get_writer(self, sink, schema: pyarrow.Schema):
+        return pyarrow.ipc.new_stream(sink, schema)
+
+    def _get_schema(self, serializer: Serializer, request=None) -> tuple[pyarrow.Schema, list]:
+        """Construct the Arrow schema from the serializer fields.
+        This also tells which fields need to be converted into text.
+        """
+        content_crs = getattr(request, "response_content_crs", None)
+        model = getattr(getattr(serializer, "Meta", None), "model", None)
+        fields = []
+        text_columns = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+
+            metadata = None
+            arrow_type = self._get_arrow_type(field, model)
+            if arrow_type is None:
+                arrow_type = pyarrow.string()
+                text_columns.append(name)
+            elif isinstance(field, GeometryField):
+                # Follow the GeoArrow conventions, so GIS tools recognize the geometry.
+                metadata = {"ARROW:extension:name": "geoarrow.wkb"}
+                if content_crs is not None:
+                    metadata["ARROW:extension:metadata"] = orjson.dumps({"crs": str(content_crs)})
+
+            fields.append(pyarrow.field(name, arrow_type, metadata=metadata))
+
+        return pyarrow.schema(fields), text_columns
+
+    def _get_arrow_type(self, field: serializers.Field, model) -> pyarrow.DataType | None:
+        """Tell which Arrow type the serializer field is written as.
+        This returns ``None`` when the value should be written as text.
+        """
+        if isinstance(field, serializers.ListField):
+            child_type = self._get_arrow_type(field.child, model)
+            return pyarrow.list_(child_type) if child_type is not None else None
+        elif isinstance(field, serializers.DecimalField):
+            return self._get_decimal_type(field)
+        elif isinstance(field, serializers.DateTimeField):
+            return pyarrow.timestamp("us", tz=settings.TIME_ZONE if settings.USE_TZ else None)
+        elif type(field) is serializers.ReadOnlyField:
+            # The value is returned as-is, so the model field tells the type.
+            return self._get_model_arrow_type(field, model)
+        else:
+            return next(
+                (ARROW_TYPES[cls] for cls in type(field).__mro__ if cls in ARROW_TYPES), None
+            )
+
+    def _get_model_arrow_type(
+        self, field: serializers.ReadOnlyField, model
+    ) -> pyarrow.DataType | None:
+        internal_type = _get_model_internal_type(field, model)
+        if internal_type in INTEGER_TYPES:
+            return pyarrow.int64()
+        elif internal_type == "BooleanField":
+            return pyarrow.bool_()
+        elif internal_type == "FloatField":
+            return pyarrow.float64()
+        else:
+            return None
+
+    def _get_decimal_type(self, field: serializers.DecimalField) -> pyarrow.DataType | None:
+        if field.max_digits is None or field.max_digits > 38 or field.decimal_places is None:
+            return None  # doesn't fit in a decimal128, write as text.
+        return pyarrow.decimal128(field.max_digits, field.decimal_places)
+
+
+class ParquetRenderer(ArrowRenderer):
+    """Write the data as Apache Parquet file.
+
+    Each record batch is written as separate row group, so the output can still be streamed.
+    """
+
+    media_type = "application/vnd.apache.parquet"
+    format = "parquet"
+    content_disposition = 'attachment; filename="{filename}.parquet"'
+
+    def _get_writer(self, sink, schema: pyarrow.Schema):
+        return pyarrow.parquet.ParquetWriter(sink, schema)
+
+
+class GeoFileRenderer(RendererMixin, renderers.BaseRenderer):
+    """Base class for the binary GIS file formats.
+
+    These formats have a single geometry column and typed property columns,
+    so GIS tools (e.g. QGIS) can open the export directly. The geometries are
+    received as WKB from the serializer, in the coordinate system of the Accept-Crs header.
+    """
+
+    charset = None
+    render_style = "binary"
+
+    unlimited_page_size = True
+    supports_list_embeds = False
+    supports_detail_embeds = False
+    supports_m2m = False
+    compatible_paginator_classes = [pagination.DSOHTTPHeaderPageNumberPagination]
+
+    def tune_serializer(self, serializer: Serializer):
+        """Remove the fields that can't be written as a column."""
+        serializer.fields = _get_column_fields(serializer)
+
+    def render_exception(self, exception):
+        """Text can't be added to the binary file.
+        The incomplete file will be rejected by the client instead.
+        """
+        return b""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render the data as streaming."""
+        if data is None:
+            return
+
+        renderer_context = renderer_context or {}
+        request = renderer_context.get("request")
+        layer_name = renderer_context.get("table_id", "features")
+        yield from _chunked_output(
+            self._render_features(data, layer_name, request), chunk_size=self.chunk_size
+        )
+
+    def _render_features(self, data, layer_name: str, request=None):
+        serializer = get_data_serializer(data)
+        records = iter([data] if isinstance(data, dict) else data)
+
+        # The first record is read before the header is written,
+        # as the serializer detects the CRS of the geometry data.
+        first = next(records, None)
+        if first is not None:
+            records = chain([first], records)
+
+        if serializer is None:
+            # e.g. an error message, write all values as text.
+            geometry_name = geometry_type = None
+            columns = [geofiles.Column(name) for name in first or ()]
+        else:
+            geometry_name, geometry_type = self._get_geometry(serializer)
+            columns = self._get_columns(serializer, geometry_name)
+
+        content_crs = getattr(request, "response_content_crs", None) or getattr(
+            request, "accept_crs", None
+        )
+        features = (
+            (
+                record.get(geometry_name) if geometry_name else None,
+                [record.get(column.name) for column in columns],
+            )
+            for record in records
+        )
+        writer = self.get_writer(
+            name=layer_name,
+            columns=columns,
+            geometry_name=geometry_name or "geometry",
+            geometry_type=geometry_type or geofiles.GeometryType.UNKNOWN,
+            srid=content_crs.srid if content_crs is not None else None,
+        )
+        yield from writer.write(features)
+
+    def get_writer(self, name, columns, geometry_name, geometry_type, srid):
+        """Construct the file writer."""
+        raise NotImplementedError()
+
+    def _get_geometry(self, serializer: Serializer) -> tuple[str | None, geofiles.GeometryType]:
+        """Find the main geometry field, and tell which geometry type it has."""
+        model = getattr(getattr(serializer, "Meta", None), "model", None)
+        for name, field in serializer.fields.items():
+            if isinstance(field, GeometryField):
+                model_field = get_source_model_field(model, field.source_attrs) if model else None
+                geom_type = getattr(model_field, "geom_type", None)
+                return name, geofiles.GeometryType.__members__.get(
+                    geom_type, geofiles.GeometryType.UNKNOWN
+                )
+
+        return None, geofiles.GeometryType.UNKNOWN
+
+    def _get_columns(self, serializer: Serializer, geometry_name: str | None) -> list:
+        """Construct the property columns from the serializer fields."""
+        model = getattr(getattr(serializer, "Meta", None), "model", None)
+        return [
+            geofiles.Column(name, **self._get_column_type(field, model))
+            for name, field in serializer.fields.items()
+            if name != geometry_name and not field.write_only
+        ]
+
+    def _get_column_type(self, field: serializers.Field, model) -> dict:
+        """Tell which column type the serializer field is written as."""
+        if type(field) is serializers.ReadOnlyField:
+            # The value is returned as-is, so the model field tells the type.
+            internal_type = _get_model_internal_type(field, model)
+            if internal_type in INTEGER_TYPES:
+                return {"type": geofiles.ColumnType.LONG}
+            elif internal_type == "BooleanField":
+                return {"type": geofiles.ColumnType.BOOL}
+            elif internal_type == "FloatField":
+                return {"type": geofiles.ColumnType.DOUBLE}
+            else:
+                return {}
+
+        return next(
+            (GEOFILE_TYPES[cls] for cls in type(field).__mro__ if cls in GEOFILE_TYPES), {}
+        )
+
+
+class FlatGeobufRenderer(GeoFileRenderer):
+    """Write the data as FlatGeobuf.
+
+    By default, a packed Hilbert R-tree is included, so GIS tools can read the features
+    of an area without scanning the whole file. As this index is written before the features,
+    those are collected in a temporary file first. When the index is disabled,
+    each feature is written directly to the output stream.
+    """
+
+    media_type = "application/flatgeobuf"
+    format = "fgb"
+    content_disposition = 'attachment; filename="{filename}.fgb"'
+
+    #: The number of items per node of the spatial index, 0 disables the index.
+    index_node_size = 16
+
+    def get_writer(self, name, columns, geometry_name, geometry_type, srid):
+        return geofiles.FlatGeobufWriter(
+            name=name,
+            columns=columns,
+            geometry_type=geometry_type,
+            srid=srid,
+            index_node_size=self.index_node_size,
+        )
+
+
+class GeoPackageRenderer(GeoFileRenderer):
+    """Write the data as GeoPackage.
+
+    As this is an SQLite database, the file is written to a temporary file first.
+    The output is only streamed once all records are written.
+    """
+
+    media_type = "application/geopackage+sqlite3"
+    format = "gpkg"
+    content_disposition = 'attachment; filename="{filename}.gpkg"'
+
+    def get_writer(self, name, columns, geometry_name, geometry_type, srid):
+        return geofiles.GeoPackageWriter(
+            name=name,
+            columns=columns,
+            geometry_column=geometry_name,
+            geometry_type=geometry_type,
+            srid=srid,
+            srs_definition=SpatialReference(srid).wkt if srid is not None else "undefined",
+        )
+
+
+class _OutputBuffer(RawIOBase):
+    """A file-like object for the Arrow writers, where the written data can be collected
+    piece by piece. This avoids keeping the whole file in memory.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        # The Parquet writer needs this to write the file offsets.
+        return self._position
+
+    def drain(self) -> bytes:
+        """Return the data that was written since the last call."""
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _get_column_fields(serializer: Serializer) -> dict[str, serializers.Field]:
+    """Tell which fields can be written as a column in the tabular formats."""
+    return {
+        name: field
+        for name, field in serializer.fields.items()
+        if name not in ("schema", "_links")
+        and not isinstance(field, (HyperlinkedRelatedField, SerializerMethodField, BaseSerializer))
+    }
+
+
+def _get_model_internal_type(field: serializers.ReadOnlyField, model) -> str | None:
+    """Tell the internal type of the model field that a ``ReadOnlyField`` returns as-is.
+    For foreign keys, this is the type of the referenced field.
+    """
+    model_field = get_source_model_field(model, field.source_attrs) if model else None
+    if model_field is None:
+        return None
+
+    while model_field.is_relation and model_field.concrete:
+        if field.source_attrs[-1] != model_field.attname:
+            return None  # Reads the related object, not the foreign key value.
+        model_field = model_field.target_field
+
+    return model_field.get_internal_type()
+
+
+def _get_csv_accessor(name: str):
+    """Compile how the value of a CSV column is read from a record.
+
+    This follows the flattening of ``CSVStreamingRenderer``: nested objects become dotted
+    columns (e.g. ``cluster.id``) and lists of objects become numbered columns.
+    """
+    if "." not in name:
+        return lambda record: _to_csv_value(record.get(name))
+
+    path = name.split(".")
+
+    def _get_value(record):
+        value = record
+        for key in path:
+            if isinstance(value, dict):
+                value = value.get(key)
+            elif _is_nested_list(value) and key.isdigit() and int(key) < len(value):
+                value = value[int(key)]
+            else:
+                return None
+        return _to_csv_value(value)
+
+    return _get_value
+
+
+def _to_csv_value(value):
+    if isinstance(value, dict):
+        return None  # only the dotted sub columns have a value.
+    elif isinstance(value, list):
+        # Render ArrayField data as single field. Other lists only have numbered sub columns.
+        return None if _is_nested_list(value) or not value else ",".join(map(str, value))
+    else:
+        return value
+
+
+def _is_nested_list(value) -> bool:
+    return isinstance(value, list) and bool(value) and isinstance(value[0], (list, dict))
+
+
+def _to_text(value) -> str | None:
+    """Write values (e.g. JSON data) as text for the Arrow output."""
+    if value is None or isinstance(value, str):
+        return value
+    elif isinstance(value, (dict, list)):
+        return orjson.dumps(value).decode()
+    else:
+        return str(value)
+
+
 def _chunked_output(stream, chunk_size=DEFAULT_CHUNK_SIZE, write_exception=None):
     """Output in larger chunks to avoid many small writes or back-forth calls
     between the WSGI server write code and the original generator function.
@@ -305,6 +305,12 @@ class DSOModelListSerializer(DSOListSerializer):
         queryset_iterator = self.get_queryset_iterator(data)
         items = (self.child.to_representation(item) for item in queryset_iterator)
 
+        request = self.context["request"]
+        if request.accepted_renderer.can_export_queryset(data, self.child):
+            # The renderer reads the queryset directly from the database (e.g. CSV COPY).
+            # Don't execute the query here, as that would run it twice.
+            return items
+
         # Make sure the first to_representation() is called early on. This makes sure
         # DSOModelSerializer.to_representation() can inspect the CRS, and define the
         # HTTP header for the Content-Crs setting. This will be too late when the streaming
@@ -340,6 +346,11 @@ class DSOModelListSerializer(DSOListSerializer):
 
         # The generator/peek logic avoids unnecessary memory usage (see details above).
         items = (self.child.to_representation(item) for item in queryset_iterator)
+        request = self.context["request"]
+        if not embedded_fields and request.accepted_renderer.can_export_queryset(data, self.child):
+            # The renderer reads the queryset directly from the database (e.g. GeoJSON features).
+            return {self.results_field: items}
+
         _, items = peek_iterable(items)
 
         # DSO always mandates a dict structure for JSON responses: {"objectname": [...]}
@@ -679,6 +690,13 @@ class DSOModelSerializer(DSOSerializer, DSOModelSerializerBase):
 
     _default_list_serializer_class = DSOModelListSerializer
 
+    def supports_sql_export(self) -> bool:
+        """Tell whether the database may render the fields of this serializer directly.
+        Subclasses should return ``False`` when :meth:`to_representation`
+        alters the values based on the request or object.
+        """
+        return True
+
     def _include_embedded(self):
         """Determines if the _embedded field must be generated."""
         return self.root is self or self.has_expand_scope_override()
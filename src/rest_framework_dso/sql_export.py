@@ -0,0 +1,214 @@
+"""Let the database render the serializer output.
+
+For large exports, it's much faster to let PostgreSQL format the values (e.g. using
+``COPY ... TO STDOUT``) instead of constructing model instances and running each value
+through the serializer fields. The logic here translates the serializer fields into ORM lookups,
+but only when the database can produce the exact same output as the serializer field would.
+When a field is not recognized, the caller should fall back to the regular serializer logic.
+"""
+
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import models
+from django.db.models.functions import Cast
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from rest_framework_dso.fields import DSOGeometryField
+from rest_framework_dso.serializers import DSOModelSerializer
+from rest_framework_dso.utils import get_source_model_field
+
+INTEGER_TYPES = {
+    "AutoField",
+    "BigAutoField",
+    "SmallAutoField",
+    "IntegerField",
+    "BigIntegerField",
+    "SmallIntegerField",
+    "PositiveIntegerField",
+    "PositiveBigIntegerField",
+    "PositiveSmallIntegerField",
+}
+STRING_TYPES = {"CharField", "TextField", "UUIDField"}
+GEOMETRY_TYPES = {
+    "GeometryField",
+    "PointField",
+    "LineStringField",
+    "PolygonField",
+    "MultiPointField",
+    "MultiLineStringField",
+    "MultiPolygonField",
+    "GeometryCollectionField",
+}
+
+# How the (exact) serializer field classes render the database field types.
+FIELD_KINDS = {
+    serializers.CharField: dict.fromkeys(STRING_TYPES | INTEGER_TYPES, "string"),  # str(value)
+    serializers.ReadOnlyField: {  # value as-is
+        **dict.fromkeys(STRING_TYPES, "string"),
+        **dict.fromkeys(INTEGER_TYPES, "integer"),
+        "BooleanField": "boolean",
+    },
+    serializers.IntegerField: dict.fromkeys(INTEGER_TYPES, "integer"),
+    serializers.BooleanField: {"BooleanField": "boolean"},
+    serializers.DateField: {"DateField": "date"},
+    serializers.DateTimeField: {"DateTimeField": "datetime"},
+    DSOGeometryField: dict.fromkeys(GEOMETRY_TYPES, "geometry"),  # output depends on the format
+}
+
+
+@dataclass(frozen=True)
+class SQLColumn:
+    """A serializer field that the database can render by itself."""
+
+    #: The (dotted) name of the field in the output.
+    name: str
+    #: The ORM lookup to read the value.
+    lookup: str
+    #: How the value is rendered: "string", "integer", "boolean", "date", "datetime"
+    #: or "geometry".
+    kind: str
+
+
+def get_sql_columns(
+    serializer: serializers.Serializer, names: list[str]
+) -> list[SQLColumn] | None:
+    """Translate the (dotted) field names of the serializer into database lookups.
+
+    This returns ``None`` when any of the fields can't be rendered by the database.
+    Dotted names (e.g. ``"cluster.id"``) are resolved through inline embedded serializers,
+    which must follow a foreign key.
+    """
+    if not names or not _supports_sql_export(serializer):
+        return None
+
+    columns = []
+    for name in names:
+        column = _get_sql_column(serializer, name)
+        if column is None:
+            return None
+        columns.append(column)
+
+    return columns
+
+
+def _get_sql_column(serializer: DSOModelSerializer, name: str) -> SQLColumn | None:
+    model = serializer.Meta.model
+    path = []
+    *parent_names, field_name = name.split(".")
+
+    # Walk through the embedded serializers, which must follow a foreign key.
+    for parent_name in parent_names:
+        field = serializer.fields.get(parent_name)
+        if not _supports_sql_export(field) or field.source == "*":
+            return None
+
+        model_field = get_source_model_field(model, field.source_attrs)
+        if (
+            model_field is None
+            or not model_field.concrete
+            or not (model_field.many_to_one or model_field.one_to_one)
+            or field.source_attrs[-1] != model_field.name
+        ):
+            return None
+
+        model = model_field.related_model
+        path.extend(field.source_attrs)
+        serializer = field
+
+    field = serializer.fields.get(field_name)
+    if (
+        field is None
+        or isinstance(field, serializers.BaseSerializer)
+        or field.source == "*"
+        or "to_representation" in field.__dict__  # value is altered (e.g. for permissions)
+    ):
+        return None
+
+    model_field = get_source_model_field(model, field.source_attrs)
+    if model_field is None:
+        return None  # e.g. a @property
+
+    kind = _get_kind(field, model_field, field.source_attrs[-1])
+    if kind is None:
+        return None
+
+    return SQLColumn(name=name, lookup="__".join([*path, *field.source_attrs]), kind=kind)
+
+
+def _supports_sql_export(serializer) -> bool:
+    return isinstance(serializer, DSOModelSerializer) and serializer.supports_sql_export()
+
+
+def _get_kind(field: serializers.Field, model_field: models.Field, attr: str) -> str | None:
+    """Tell how the serializer field renders the model field.
+    Only exact field classes are recognized, as subclasses may alter the output.
+    """
+    if model_field.is_relation:
+        if not model_field.concrete or attr != model_field.attname:
+            return None  # Reads the related object, not the foreign key value.
+        while model_field.is_relation:
+            model_field = model_field.target_field
+
+    kind = FIELD_KINDS.get(type(field), {}).get(model_field.get_internal_type())
+    if kind in ("date", "datetime") and (
+        # With USE_TZ=True, DRF converts the datetime to the current timezone.
+        not _uses_iso_format(field)
+        or (kind == "datetime" and settings.USE_TZ)
+    ):
+        return None
+
+    return kind
+
+
+def _uses_iso_format(field: serializers.Field) -> bool:
+    default_format = (
+        api_settings.DATETIME_FORMAT
+        if isinstance(field, serializers.DateTimeField)
+        else api_settings.DATE_FORMAT
+    )
+    output_format = getattr(field, "format", default_format)
+    return isinstance(output_format, str) and output_format.lower() == ISO_8601
+
+
+class ToISODateTime(models.Func):
+    """Format a timestamp in the same way as :meth:`datetime.isoformat` does.
+    This only works on column references, as the expression is repeated in the SQL.
+    """
+
+    template = (
+        "to_char(%(expressions)s, 'YYYY-MM-DD\"T\"HH24:MI:SS')"
+        " || CASE WHEN date_trunc('second', %(expressions)s) = %(expressions)s"
+        " THEN '' ELSE to_char(%(expressions)s, '.US') END"
+    )
+    output_field = models.TextField()
+
+
+class ToISODate(models.Func):
+    """Format a date in the same way as :meth:`date.isoformat` does."""
+
+    template = "to_char(%(expressions)s, 'YYYY-MM-DD')"
+    output_field = models.TextField()
+
+
+class JSONBuildObject(models.Func):
+    """Construct a JSON object. Unlike :class:`~django.db.models.functions.JSONObject`,
+    this uses ``json_build_object()`` so the ordering of the keys is preserved.
+    """
+
+    function = "json_build_object"
+    output_field = models.JSONField()
+
+    def __init__(self, **fields):
+        expressions = []
+        for key, value in fields.items():
+            expressions.extend((Cast(models.Value(key), models.TextField()), value))
+        super().__init__(*expressions)
+
+
+class ToJSON(models.Func):
+    """Embed a JSON string (e.g. from ``ST_AsGeoJSON()``) as-is in a JSON object."""
+
+    template = "(%(expressions)s)::json"
+    output_field = models.JSONField()
@@ -1,3 +1,5 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
 from django.utils.functional import LazyObject, empty
 from rest_framework import serializers
 
@@ -62,3 +64,30 @@ def get_serializer_relation_lookups(
             if isinstance(field, serializers.BaseSerializer):
                 lookups.update(get_serializer_relation_lookups(field, prefix=f"{lookup}__"))
     return lookups
+
+
+def get_source_model_field(
+    model: type[models.Model], source_attrs: list[str]
+) -> models.Field | None:
+    """Find the model field that a serializer field source points to.
+
+    For dotted sources (e.g. ``source="cluster.status"``), the foreign keys are followed.
+    This returns ``None`` when the source is not a model field (e.g. a ``@property``),
+    or when it's reached through a reverse or many-to-many relation.
+    """
+    *relation_attrs, attr = source_attrs
+    try:
+        for relation_attr in relation_attrs:
+            model_field = model._meta.get_field(relation_attr)
+            if (
+                not model_field.concrete
+                or not (model_field.many_to_one or model_field.one_to_one)
+                or relation_attr != model_field.name
+            ):
+                return None
+
+            model = model_field.related_model
+
+        return model._meta.get_field(attr)
+    except FieldDoesNotExist:
+        return None
@@ -0,0 +1,70 @@
+"""Tests for the shared cache backend."""
+
+import pytest
+
+from dso_api.cache import SQLiteCache
+
+
+@pytest.fixture
+def sqlite_cache(tmp_path) -> SQLiteCache:
+    return SQLiteCache(
+        str(tmp_path / "cache.sqlite3"),
+        {"TIMEOUT": 60, "OPTIONS": {"MAX_SIZE": 10_000, "MAX_ENTRIES": 20}},
+    )
+
+
+def test_sqlite_cache(sqlite_cache):
+    """Prove that the basic cache operations work."""
+    assert sqlite_cache.get("foo") is None
+    sqlite_cache.set("foo", {"bar": [1, 2]})
+    assert sqlite_cache.get("foo") == {"bar": [1, 2]}
+    assert sqlite_cache.has_key("foo")
+
+    assert not sqlite_cache.add("foo", "other")
+    assert sqlite_cache.add("new", "value")
+    assert sqlite_cache.get("new") == "value"
+
+    assert sqlite_cache.delete("foo")
+    assert sqlite_cache.get("foo", "default") == "default"
+
+    sqlite_cache.set("expired", "value", timeout=-1)
+    assert sqlite_cache.get("expired") is None
+    assert not sqlite_cache.touch("expired")
+    assert sqlite_cache.add("expired", "again")
+
+    sqlite_cache.clear()
+    assert sqlite_cache.get_stats()["entries"] == 0
+
+
+def test_sqlite_cache_shared(sqlite_cache, tmp_path):
+    """Prove that another process (with its own connection) sees the same values."""
+    sqlite_cache.set("foo", b"bar")
+    other = SQLiteCache(str(tmp_path / "cache.sqlite3"), {})
+    assert other.get("foo") == b"bar"
+
+
+def test_sqlite_cache_eviction(sqlite_cache):
+    """Prove that the least recently used entries are removed when the cache is full."""
+    for i in range(30):
+        sqlite_cache.set(f"key{i}", i)
+
+    stats = sqlite_cache.get_stats()
+    assert stats["entries"] <= 20
+    assert sqlite_cache.get("key0") is None
+    assert sqlite_cache.get("key29") == 29
+
+    # Values that are too large are not stored.
+    sqlite_cache.set("large", b"x" * 2000)
+    assert sqlite_cache.get("large") is None
+    assert sqlite_cache.get_stats()["size"] <= 10_000
+
+
+def test_sqlite_cache_fork(sqlite_cache, monkeypatch):
+    """Prove that a forked worker process doesn't reuse the connection of its parent."""
+    sqlite_cache.set("foo", b"bar")
+    connection = sqlite_cache.store.connection
+    assert sqlite_cache.store.connection is connection
+
+    monkeypatch.setattr("dso_api.sqlitestore.os.getpid", lambda: -1)
+    assert sqlite_cache.store.connection is not connection
+    assert sqlite_cache.get("foo") == b"bar"
@@ -2,8 +2,17 @@
 
 import pytest
 from bs4 import BeautifulSoup
+from django.core.management import call_command
 from django.urls import reverse
 
+from dso_api.dynamic_api.documents import clear_documents, doc_pages
+
+
+@pytest.fixture(autouse=True)
+def clear_document_cache():
+    """The pages are generated from different datasets in each test."""
+    clear_documents()
+
 
 @pytest.mark.django_db
 def test_search(api_client):
@@ -40,7 +49,7 @@ def test_overview(api_client, filled_router, fietspaaltjes_dataset):
     response = api_client.get(overview)
     assert response.status_code == 200
 
-    content = response.rendered_content
+    content = response.content.decode()
     assert '<li><a href="generic/rest/filtering.html">Filtering</a></li>' in content
     assert '<a href="/v1/wfs/fietspaaltjes">WFS</a>' in content
     assert '<a href="/v1/mvt/fietspaaltjes">MVT</a>' in content
@@ -57,7 +66,7 @@ def test_dataset(api_client, filled_router, gebieden_dataset):
 
     response = api_client.get(gebieden_doc)
     assert response.status_code == 200
-    content = response.rendered_content
+    content = response.content.decode()
 
     # Check for self-link to wijken.
     assert """<a id="wijken" class="anchor">""" in content
@@ -90,7 +99,7 @@ def test_subresources_available_in_docs(api_client, gebieden_subresources_datase
     )
     response = api_client.get(url)
     assert response.status_code == 200
-    soup = BeautifulSoup(response.rendered_content, "html.parser")
+    soup = BeautifulSoup(response.content.decode(), "html.parser")
 
     # Both stadsdelen and wijken should have a subresources tabel
     assert len(soup.find_all(string="Onderliggende tabellen")) == 2
@@ -133,7 +142,7 @@ def test_table_for_export_links(api_client, filled_router, gebieden_dataset):
 
     response = api_client.get(gebieden_doc)
     assert response.status_code == 200
-    content = response.rendered_content
+    content = response.content.decode()
     # Extensions for exported format followed by ".zip"
     # are signalling links to the generated exports.
     assert "bulk-data/geopackage/gebieden_v1_bouwblokken_openbaar.gpkg.zip" in content
@@ -159,6 +168,40 @@ def test_dataset_casing(api_client, filled_router, hoofdroutes_dataset):
 
     response = api_client.get(hoofdroutes_doc)
     assert response.status_code == 200
-    content = response.rendered_content
+    content = response.content.decode()
 
     assert """<a id="routesGevaarlijkeStoffen" class="anchor">""" in content
+
+
+@pytest.mark.django_db
+def test_doc_page_cache(api_client, filled_router, gebieden_dataset):
+    """Prove that the page is rendered once, and supports conditional requests."""
+    gebieden_doc = reverse("dynamic_api:docs-dataset", kwargs={"dataset_name": "gebieden"})
+    response = api_client.get(gebieden_doc)
+    assert response.status_code == 200
+    assert response["content-type"] == "text/html; charset=utf-8"
+    assert len(doc_pages) == 1
+
+    response2 = api_client.get(gebieden_doc)
+    assert response2.content == response.content
+    assert len(doc_pages) == 1
+
+    response3 = api_client.get(gebieden_doc, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response3.status_code == 304
+
+
+@pytest.mark.django_db
+def test_generate_docs(api_client, filled_router, gebieden_dataset, settings, tmp_path):
+    """Prove that the pages are written in advance, and read back from disk."""
+    settings.DOC_PAGES_PATH = str(tmp_path)
+    call_command("generate_docs")
+    names = {file.name.split(".")[0] for file in tmp_path.iterdir()}
+    assert {"v1_docs_index", "v1_docs_searchindex", "v1_docs_datasets_gebieden"} <= names
+
+    # The next process reads the pages from disk.
+    clear_documents()
+    gebieden_doc = reverse("dynamic_api:docs-dataset", kwargs={"dataset_name": "gebieden"})
+    response = api_client.get(gebieden_doc)
+    assert response.status_code == 200
+    (file,) = tmp_path.glob("v1_docs_datasets_gebieden.*.html")
+    assert file.read_bytes() == response.content
@@ -1,13 +1,30 @@
+import gzip
 import logging
 
 import openapi_spec_validator
+import orjson
 import pytest
+import yaml
+from django.core.management import call_command
 from django.urls import NoReverseMatch, reverse
 
 from dso_api.dynamic_api import openapi
+from dso_api.dynamic_api.documents import clear_documents, openapi_documents
 from tests.utils import read_response
 
 
+@pytest.fixture(autouse=True)
+def clear_document_cache():
+    """The documents are generated from different datasets in each test."""
+    clear_documents()
+
+
+def read_openapi(response) -> dict:
+    """Parse the JSON or YAML document."""
+    content = read_response(response)
+    return yaml.safe_load(content) if "yaml" in response["content-type"] else orjson.loads(content)
+
+
 @pytest.mark.django_db
 def test_get_patterns(afval_dataset, fietspaaltjes_dataset, filled_router):
     """Prove that the get_dataset_patterns() generates only patterns of a particular view."""
@@ -80,7 +97,7 @@ def test_openapi_formats(api_client, afval_dataset, fietspaaltjes_dataset, fille
         "/fietspaaltjes/fietspaaltjes/{id}",
     ]
     for path in expected_paths:
-        assert path in response.data["paths"]
+        assert path in read_openapi(response)["paths"]
 
 
 @pytest.mark.parametrize("ext", ["json", "yaml"])
@@ -102,7 +119,7 @@ def test_openapi_dataset_formats(api_client, afval_dataset, filled_router, ext):
         "/containers/{id}",
     ]
     for path in expected_paths:
-        assert path in response.data["paths"]
+        assert path in read_openapi(response)["paths"]
 
 
 @pytest.mark.django_db
@@ -115,9 +132,9 @@ def test_openapi_dataset(api_client, afval_dataset, fietspaaltjes_dataset, fille
     assert url == "/v1/afvalwegingen"
 
     response = api_client.get(url)
-    assert response.status_code == 200, response.data
+    assert response.status_code == 200, response.content
     assert response["content-type"] == "application/vnd.oai.openapi+json"
-    schema = response.data
+    schema = read_openapi(response)
 
     openapi_spec_validator.validate(schema)
 
@@ -240,7 +257,7 @@ def test_openapi_dataset(api_client, afval_dataset, fietspaaltjes_dataset, fille
         "description": "Select the export format",
         "schema": {
             "type": "string",
-            "enum": ["json", "csv", "geojson"],
+            "enum": ["json", "csv", "geojson", "ndjson", "arrow", "parquet", "fgb", "gpkg"],
         },
     }
     assert "_sort" in afval_parameters, all_keys
@@ -323,7 +340,7 @@ def test_openapi_json_subresources(api_client, gebieden_subresources_dataset, fi
     )
     response = api_client.get(url)
     assert response.status_code == 200
-    schema = response.data
+    schema = read_openapi(response)
 
     # Prove that only afvalwegingen are part of this OpenAPI page:
     paths = sorted(schema["paths"].keys())
@@ -356,7 +373,7 @@ def test_openapi_json_v1(api_client, afval_dataset, fietspaaltjes_dataset, fille
     assert url == "/v1/afvalwegingen/v1"
 
     response = api_client.get(url)
-    assert response.status_code == 200, response.data
+    assert response.status_code == 200, response.content
 
 
 @pytest.mark.django_db
@@ -381,9 +398,9 @@ def test_openapi_parkeren_json(api_client, parkeervakken_dataset, filled_router,
     assert url == "/v1/parkeervakken"
 
     response = api_client.get(url)
-    assert response.status_code == 200, response.data
+    assert response.status_code == 200, response.content
     assert response["content-type"] == "application/vnd.oai.openapi+json"
-    schema = response.data
+    schema = read_openapi(response)
 
     # Prove that various filters are properly exposed.
     parkeervak_parameters = {
@@ -405,3 +422,41 @@ def test_openapi_parkeren_json(api_client, parkeervakken_dataset, filled_router,
         "style": "form",
         "explode": False,
     }
+
+
+@pytest.mark.django_db
+def test_openapi_document_cache(api_client, afval_dataset, filled_router):
+    """Prove that the document is generated once, and served with an ETag and compression."""
+    url = reverse("dynamic_api:openapi", kwargs={"dataset_name": "afvalwegingen"})
+    response = api_client.get(url)
+    assert response.status_code == 200
+    etag = response["ETag"]
+    content = response.content
+    assert len(openapi_documents) == 1
+
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+
+    response = api_client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+    assert response.status_code == 200
+    assert response["Content-Encoding"] == "gzip"
+    assert response["ETag"] == f"W/{etag}"
+    assert gzip.decompress(response.content) == content
+    assert len(openapi_documents) == 1
+
+
+@pytest.mark.django_db
+def test_generate_openapi(api_client, afval_dataset, filled_router, settings, tmp_path):
+    """Prove that the documents can be written in advance, and are read from disk."""
+    settings.OPENAPI_DOCUMENTS_PATH = tmp_path
+    call_command("generate_openapi")
+    names = {file.name.split(".")[0] for file in tmp_path.iterdir()}
+    assert {"openapi", "afvalwegingen@default_v1_afvalwegingen_"} < names
+
+    # The next process reads the documents from disk.
+    clear_documents()
+    url = reverse("dynamic_api:openapi-json", kwargs={"dataset_name": "afvalwegingen"})
+    response = api_client.get(url)
+    assert response.status_code == 200
+    (file,) = tmp_path.glob("afvalwegingen@default_v1_afvalwegingen_.*.json")
+    assert file.read_bytes() == response.content
@@ -0,0 +1,51 @@
+import gzip
+from io import BytesIO
+from tempfile import NamedTemporaryFile
+
+import mapbox_vector_tile
+import pytest
+from django.contrib.gis.gdal import DataSource
+
+from dso_api.dynamic_api import pmtiles
+
+
+@pytest.mark.parametrize(
+    ["zxy", "tile_id"],
+    [
+        ((0, 0, 0), 0),
+        ((1, 0, 0), 1),
+        ((1, 0, 1), 2),
+        ((1, 1, 1), 3),
+        ((1, 1, 0), 4),
+        ((12, 3423, 1763), 19078479),
+    ],
+)
+def test_zxy_to_tile_id(zxy, tile_id):
+    """Prove that tiles are numbered along the Hilbert curve, as the PMTiles spec describes."""
+    assert pmtiles.zxy_to_tile_id(*zxy) == tile_id
+
+
+def test_write_pmtiles():
+    """Prove that the PMTiles archive can be read by GDAL."""
+    tile = mapbox_vector_tile.encode(
+        [{"name": "containers", "features": [{"geometry": "POINT (10 10)", "properties": {}}]}]
+    )
+    tile_ids = [pmtiles.zxy_to_tile_id(14, x, 5384) for x in range(8410, 8420)]
+    output = BytesIO()
+    pmtiles.write_pmtiles(
+        output,
+        [(tile_id, gzip.compress(tile)) for tile_id in sorted(tile_ids)],
+        metadata={"vector_layers": [{"id": "containers", "fields": {}}]},
+        min_zoom=14,
+        max_zoom=14,
+        bounds=[4.72876, 52.2782, 5.07916, 52.4311],
+        center=[4.8925627, 52.3731139, 14],
+    )
+
+    data = output.getvalue()
+    assert data.startswith(b"PMTiles\x03")
+    with NamedTemporaryFile(suffix=".pmtiles") as file:
+        file.write(data)
+        file.flush()
+        layer = DataSource(file.name)["containers"]
+        assert len(layer) == 10
@@ -2,6 +2,21 @@ import pytest
 from schematools.contrib.django import models
 from schematools.types import ProfileSchema
 
+from dso_api.dynamic_api.tileindex import clear_tile_index_cache
+from dso_api.dynamic_api.views.wfs import clear_wfs_feature_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_tile_index():
+    """The data version of tables can repeat between tests, as their transactions roll back."""
+    clear_tile_index_cache()
+
+
+@pytest.fixture(autouse=True)
+def clear_wfs_features():
+    """The profiles that grant access to fields differ between tests."""
+    clear_wfs_feature_cache()
+
 
 @pytest.fixture
 def basic_parkeervak(parkeervakken_parkeervak_model):
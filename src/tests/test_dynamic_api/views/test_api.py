@@ -1,11 +1,14 @@
+import logging
+
 import pytest
+from django.core.management import call_command
 from django.db import connection
 from django.urls import NoReverseMatch, reverse
 from rest_framework.status import HTTP_200_OK
 from schematools.contrib.django.db import create_tables
 
 from rest_framework_dso.crs import CRS, RD_NEW
-from tests.utils import read_response_json
+from tests.utils import read_response, read_response_json
 
 
 @pytest.mark.django_db
@@ -244,3 +247,127 @@ def test_nested_object_field_response(
     assert data["_embedded"]["panden"][0]["statusCode"] == 7
     assert data["_embedded"]["panden"][0]["statusOmschrijving"] == "Sloopvergunning verleend"
     assert data["_embedded"]["panden"][0]["bagProces"] == {"code": 1}
+
+
+@pytest.mark.django_db
+def test_response_cache(
+    api_client, afval_container_model, afval_container, filled_router, settings
+):
+    """Prove that responses are cached for the configured tables, until the data changes."""
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    settings.API_RESPONSE_CACHE = {"afvalwegingen.containers": 60}
+    url = reverse("dynamic_api:afvalwegingen-containers-list")
+    response = api_client.get(url, data={"eigenaarNaam": "Dataservices"})
+    data = read_response_json(response)
+    assert response.status_code == 200, data
+    assert len(data["_embedded"]["containers"]) == 1
+
+    # The same query is served from the cache, which has no REST Framework data.
+    response = api_client.get(url, data={"eigenaarNaam": "Dataservices"})
+    assert not hasattr(response, "data")
+    assert read_response_json(response) == data
+    assert response["Content-Type"] == "application/hal+json"
+
+    # Changing the table data gives a new response.
+    afval_container_model.objects.create(
+        id=2, serienummer="foobar-456", eigenaar_naam="Dataservices"
+    )
+    response = api_client.get(url, data={"eigenaarNaam": "Dataservices"})
+    assert hasattr(response, "data")
+    assert len(read_response_json(response)["_embedded"]["containers"]) == 2
+
+
+@pytest.mark.django_db
+def test_response_cache_permissions(
+    api_client, fetch_auth_token, afval_cluster, filled_router, settings, monkeypatch, caplog
+):
+    """Prove that cached responses are only served after the permission checks,
+    and that these requests are still written to the audit log.
+    """
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    settings.API_RESPONSE_CACHE = {"afvalwegingen.clusters": 60}
+    # All requests use the same cache entry, so it would be served to anyone.
+    monkeypatch.setattr(
+        "dso_api.dynamic_api.views.api.get_response_cache_key", lambda request, model: "clusters"
+    )
+    monkeypatch.setattr(logging.getLogger("dso_api.audit"), "handlers", [caplog.handler])
+    caplog.set_level(logging.INFO, logger="dso_api.audit")
+
+    url = reverse("dynamic_api:afvalwegingen-clusters-list")
+    token = fetch_auth_token(["BAG/R"])
+    response = api_client.get(url, HTTP_AUTHORIZATION=f"Bearer {token}")
+    assert response.status_code == 200
+    assert hasattr(response, "data")
+
+    caplog.clear()
+    response = api_client.get(url, HTTP_AUTHORIZATION=f"Bearer {token}")
+    assert response.status_code == 200
+    assert not hasattr(response, "data")
+    assert "access granted" in caplog.text
+
+    caplog.clear()
+    response = api_client.get(url)
+    assert response.status_code == 403
+    assert "access denied" in caplog.text
+
+
+@pytest.mark.django_db
+def test_response_cache_host(api_client, afval_container, filled_router, settings):
+    """Prove that the responses are cached per host, as the links are absolute URLs."""
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    settings.API_RESPONSE_CACHE = {"afvalwegingen.containers": 60}
+    settings.ALLOWED_HOSTS = ["testserver", "other.example.com"]
+    url = reverse("dynamic_api:afvalwegingen-containers-list")
+    response = api_client.get(url)
+    assert response.status_code == 200
+    assert "http://testserver/" in read_response(response)
+
+    response = api_client.get(url, HTTP_HOST="other.example.com", secure=True)
+    assert response.status_code == 200
+    assert hasattr(response, "data")
+    content = read_response(response)
+    assert "https://other.example.com/" in content
+    assert "http://testserver/" not in content
+
+
+@pytest.mark.django_db
+def test_cdn_cache_headers(api_client, afval_container, filled_router, settings):
+    """Prove that anonymous responses of public tables can be cached by the CDN."""
+    settings.API_PUBLIC_MAX_AGE = 3600
+    url = reverse("dynamic_api:afvalwegingen-containers-list")
+    response = api_client.get(url)
+    assert response.status_code == 200
+    assert response["Cache-Control"] == "max-age=3600, public"
+    assert response["Surrogate-Key"] == "afvalwegingen afvalwegingen/containers"
+    assert {"Accept", "Accept-Crs", "Authorization"} <= {
+        header.strip() for header in response["Vary"].split(",")
+    }
+
+    # Filters in headers are not seen by the CDN.
+    response = api_client.get(url, HTTP_DSO_SERIENUMMER="foobar-123")
+    assert "no-store" in response["Cache-Control"]
+    assert not response.has_header("Surrogate-Key")
+
+
+@pytest.mark.django_db
+def test_cdn_cache_headers_auth(
+    api_client, fetch_auth_token, afval_dataset, filled_router, settings
+):
+    """Prove that responses for authorized users are never cached."""
+    settings.API_PUBLIC_MAX_AGE = 3600
+    url = reverse("dynamic_api:afvalwegingen-clusters-list")
+    token = fetch_auth_token(["BAG/R"])
+    response = api_client.get(url, HTTP_AUTHORIZATION=f"Bearer {token}")
+    assert response.status_code == 200
+    assert "no-store" in response["Cache-Control"]
+    assert not response.has_header("Surrogate-Key")
+
+
+@pytest.mark.django_db
+def test_cdn_purge_keys(afval_dataset, capsys):
+    """Prove that the surrogate keys of the imported tables are listed."""
+    call_command("cdn_purge_keys", "afvalwegingen", "containers", "clusters")
+    assert capsys.readouterr().out.split() == [
+        "afvalwegingen/containers",
+        "afvalwegingen/clusters",
+    ]
@@ -1,12 +1,22 @@
 import inspect
 import json
+import struct
+from datetime import date, datetime
+from functools import partial
+from io import BytesIO
+from tempfile import NamedTemporaryFile
 from typing import Any
 
 import orjson
+import pyarrow.ipc
+import pyarrow.parquet
 import pytest
+from django.contrib.gis.gdal import DataSource
 from django.urls import reverse
 from rest_framework.response import Response
 
+from rest_framework_dso.crs import CRS84
+from rest_framework_dso.renderers import CSVRenderer, GeoJSONRenderer
 from rest_framework_dso.response import StreamingResponse
 from tests.conftest import DAM_SQUARE_POINT
 from tests.utils import patch_table_auth, read_response, read_response_json
@@ -23,6 +33,47 @@ def as_is(data):
     return data
 
 
+def ndjson_loads(data):
+    return [orjson.loads(line) for line in data.splitlines()]
+
+
+def arrow_loads(data):
+    return pyarrow.ipc.open_stream(data).read_all().to_pylist()
+
+
+def parquet_loads(data):
+    return pyarrow.parquet.read_table(BytesIO(data)).to_pylist()
+
+
+def gis_file_loads(data, suffix):
+    """Read the features of a GIS file using GDAL."""
+    with NamedTemporaryFile(suffix=suffix) as file:
+        file.write(data)
+        file.flush()
+        return [
+            {**{field.name: field.value for field in feature}, "geometry": feature.geom.wkt}
+            for feature in DataSource(file.name)[0]
+        ]
+
+
+# The container point in RD coordinates, as little-endian well-known binary.
+CONTAINER_WKB = struct.pack("<BIdd", 1, 1, 121389.0, 487369.0)
+CONTAINER_RECORD = {
+    "id": 1,
+    "clusterId": "c1",
+    "serienummer": "foobar-123",
+    "eigenaarNaam": "Dataservices",
+    "datumCreatie": date(2021, 1, 3),
+    "datumLeegmaken": datetime.fromisoformat("2021-01-03T12:13:14"),
+    "geometry": CONTAINER_WKB,
+}
+CONTAINER_FEATURE = {
+    **CONTAINER_RECORD,
+    "datumLeegmaken": datetime.fromisoformat("2021-01-03T12:13:14"),
+    "geometry": "POINT (121389 487369)",
+}
+
+
 @pytest.mark.django_db
 class TestFormats:
     """Prove that common rendering formats work as expected"""
@@ -76,6 +127,49 @@ class TestFormats:
                 "_links": [],
             },
         ),
+        "ndjson": (
+            ndjson_loads,
+            "application/x-ndjson; charset=utf-8",
+            [
+                {
+                    "_links": {
+                        "cluster": {
+                            "href": "http://testserver/v1/afvalwegingen/clusters/c1?_format=ndjson",
+                            "id": "c1",
+                            "title": "c1",
+                        },
+                        "schema": (
+                            "https://schemas.data.amsterdam.nl/datasets/afvalwegingen/containers/v1"
+                        ),
+                        "self": {
+                            "href": "http://testserver/v1/afvalwegingen/containers/1?_format=ndjson",
+                            "id": 1,
+                            "title": "1",
+                        },
+                    },
+                    "id": 1,
+                    "clusterId": "c1",
+                    "serienummer": "foobar-123",
+                    "eigenaarNaam": "Dataservices",
+                    "datumCreatie": "2021-01-03",
+                    "datumLeegmaken": "2021-01-03T12:13:14",
+                    "geometry": {"coordinates": [121389.0, 487369.0], "type": "Point"},
+                }
+            ],
+        ),
+        "arrow": (arrow_loads, "application/vnd.apache.arrow.stream", [CONTAINER_RECORD]),
+        "parquet": (parquet_loads, "application/vnd.apache.parquet", [CONTAINER_RECORD]),
+        "fgb": (
+            partial(gis_file_loads, suffix=".fgb"),
+            "application/flatgeobuf",
+            # FlatGeobuf has no separate date type.
+            [{**CONTAINER_FEATURE, "datumCreatie": datetime.fromisoformat("2021-01-03")}],
+        ),
+        "gpkg": (
+            partial(gis_file_loads, suffix=".gpkg"),
+            "application/geopackage+sqlite3",
+            [CONTAINER_FEATURE],
+        ),
     }
 
     @pytest.mark.parametrize("format", sorted(UNPAGINATED_FORMATS.keys()))
@@ -311,6 +405,15 @@ class TestFormats:
                 "_links": [],
             },
         ),
+        "ndjson": (ndjson_loads, "application/x-ndjson; charset=utf-8", []),
+        "arrow": (arrow_loads, "application/vnd.apache.arrow.stream", []),
+        "parquet": (parquet_loads, "application/vnd.apache.parquet", []),
+        "fgb": (partial(gis_file_loads, suffix=".fgb"), "application/flatgeobuf", []),
+        "gpkg": (
+            partial(gis_file_loads, suffix=".gpkg"),
+            "application/geopackage+sqlite3",
+            [],
+        ),
     }
 
     @pytest.mark.parametrize("format", sorted(EMPTY_FORMATS.keys()))
@@ -508,6 +611,85 @@ class TestFormats:
 
         assert data == ("03630950000000,1,,,2021-02-28,,\r\n")
 
+    @pytest.mark.parametrize(
+        ["params", "expected"],
+        [
+            (
+                {},
+                (
+                    "identificatie,volgnummer,registratiedatum,naam,beginGeldigheid\r\n"
+                    "03630950000000,1,,,2021-02-28\r\n"
+                ),
+            ),
+            (
+                {"_csv_header": "titles", "_csv_separator": ";"},
+                (
+                    "Identificatie;Volgnummer;Registratiedatum;Naam;Begingeldigheid\r\n"
+                    "03630950000000;1;;;2021-02-28\r\n"
+                ),
+            ),
+            ({"_csv_header": "none"}, "03630950000000,1,,,2021-02-28\r\n"),
+            ({"_fields": "naam"}, 'naam\r\n""\r\n'),
+        ],
+    )
+    def test_csv_copy_export(
+        self, api_client, monkeypatch, ggwgebieden_data, filled_router, params, expected
+    ):
+        """Prove that the PostgreSQL COPY export gives the same output as the serializer."""
+        copy_calls = []
+        render_copy = CSVRenderer._render_copy
+
+        def _render_copy(self, *args, **kwargs):
+            copy_calls.append(args)
+            return render_copy(self, *args, **kwargs)
+
+        monkeypatch.setattr(CSVRenderer, "_render_copy", _render_copy)
+
+        url = reverse("dynamic_api:gebieden-ggwgebieden-list")
+        response = api_client.get(
+            url,
+            {
+                "_format": "csv",
+                "_fields": "identificatie,volgnummer,registratiedatum,naam,beginGeldigheid",
+                **params,
+            },
+        )
+        assert response.status_code == 200, response.getvalue()
+        data = read_response(response)
+
+        assert data == expected
+        assert len(copy_calls) == 1
+
+    @pytest.mark.parametrize(
+        ["params", "expected_queries"],
+        [
+            ({}, 1),
+            ({"_pageSize": 4}, 0),  # paginated, uses the serializer.
+        ],
+    )
+    def test_geojson_database_features(
+        self, api_client, monkeypatch, afval_container, filled_router, params, expected_queries
+    ):
+        """Prove that the GeoJSON features generated by PostgreSQL match the serializer output."""
+        query_calls = []
+        render_geojson_query = GeoJSONRenderer._render_geojson_query
+
+        def _render_geojson_query(self, *args, **kwargs):
+            query_calls.append(args)
+            return render_geojson_query(self, *args, **kwargs)
+
+        monkeypatch.setattr(GeoJSONRenderer, "_render_geojson_query", _render_geojson_query)
+
+        url = reverse("dynamic_api:afvalwegingen-containers-list")
+        response = api_client.get(url, {"_format": "geojson", **params})
+        assert response.status_code == 200, response.getvalue()
+        data = read_response_json(response)
+
+        assert data["features"] == self.UNPAGINATED_FORMATS["geojson"][2]["features"]
+        assert data["crs"] == {"properties": {"name": str(CRS84)}, "type": "name"}
+        assert response["Content-Crs"] == str(CRS84)
+        assert len(query_calls) == expected_queries
+
     def test_csv_array_fields(self, api_client, api_rf, fietspaaltjes_data):
         url = reverse("dynamic_api:fietspaaltjes-fietspaaltjes-list")
         api_client.raise_request_exception = False
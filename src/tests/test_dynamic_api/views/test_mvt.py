@@ -1,12 +1,37 @@
+import gzip
+import re
+import struct
 from datetime import date, datetime
+from io import StringIO
+from pathlib import Path
 
 import mapbox_vector_tile
 import pytest
 from django.contrib.gis.geos import Point
+from django.core.management import call_command
 from django.http.response import HttpResponse, HttpResponseBase, StreamingHttpResponse
 from django.utils.timezone import get_current_timezone
 
+from dso_api.dynamic_api import tileindex
 from dso_api.dynamic_api.filters.values import AMSTERDAM_BOUNDS, DAM_SQUARE
+from dso_api.dynamic_api.tilecache import (
+    check_tile_cache,
+    get_table_version,
+    has_version_table,
+)
+from dso_api.dynamic_api.tilegeometry import get_projected_columns
+from dso_api.dynamic_api.tileindex import clear_tile_index_cache
+from dso_api.dynamic_api.views.mvt import (
+    _layer_fields_cache,
+    clear_mvt_layer_cache,
+    get_geometry_tile_index,
+)
+from dso_api.dynamic_api.views.mvt_base import (
+    BINARY_COPY_SIGNATURE,
+    TileQuery,
+    read_binary_copy,
+    stream_tile,
+)
 
 CONTENT_TYPE = "application/vnd.mapbox-vector-tile"
 
@@ -140,9 +165,10 @@ def test_mvt_tilejson(api_client, afval_container, filled_router):
     assert response.status_code == 200
 
     tilejson = response.json()
+    # The bounds are the extent of the data, which is a single point here.
+    assert tilejson.pop("bounds") == pytest.approx(DAM_SQUARE[:2] * 2, abs=1e-3)
     assert tilejson == {
         "attribution": '(c) Gemeente <a href="https://amsterdam.nl">Amsterdam</a>',
-        "bounds": AMSTERDAM_BOUNDS,
         "center": DAM_SQUARE,
         "description": "unit testing version of afvalwegingen",
         "fillzoom": None,
@@ -195,9 +221,10 @@ def test_mvt_tilejson_v1(api_client, afval_container, filled_router):
     assert response.status_code == 200
 
     tilejson = response.json()
+    # The bounds are the extent of the data, which is a single point here.
+    assert tilejson.pop("bounds") == pytest.approx(DAM_SQUARE[:2] * 2, abs=1e-3)
     assert tilejson == {
         "attribution": '(c) Gemeente <a href="https://amsterdam.nl">Amsterdam</a>',
-        "bounds": AMSTERDAM_BOUNDS,
         "center": DAM_SQUARE,
         "description": "unit testing version of afvalwegingen",
         "fillzoom": None,
@@ -418,6 +445,40 @@ def test_mvt_content_v1(
     assert response.content == b""
 
 
+@pytest.mark.django_db
+def test_mvt_dataset_content(
+    api_client, afval_dataset, filled_router, afval_container_model, afval_cluster
+):
+    """Prove that the dataset tile combines all geo tables, with a layer per table."""
+    afval_container_model.objects.create(
+        id=1, cluster=afval_cluster, geometry=Point(123207.6558130105, 486624.6399002579)
+    )
+
+    # See test_mvt_content for how to compute the coordinates.
+    response = api_client.get("/v1/mvt/afvalwegingen/14/8415/5384.pbf")
+    assert response.status_code == 200
+    assert response["Content-Type"] == CONTENT_TYPE
+
+    # Empty layers are not included in the tile.
+    vt = decode_mvt(response)
+    assert list(vt) == ["containers"]
+    assert vt["containers"]["features"] == [
+        {
+            "geometry": {"type": "Point", "coordinates": [3825, 1344]},
+            "properties": {"id": 1},
+            "id": 0,
+            "type": "Feature",
+        }
+    ]
+
+    response = api_client.get("/v1/mvt/afvalwegingen/v1/14/8415/5384.pbf")
+    assert response.status_code == 200
+    assert decode_mvt(response) == vt
+
+    response = api_client.get("/v1/mvt/afvalwegingen/14/0/0.pbf")
+    assert response.status_code == 204
+
+
 @pytest.mark.django_db
 def test_mvt_content_zoom(api_client, gebieden_dataset, buurten_model, filled_router):
     """Prove that the MVT view produces vector tiles with properties at the right zoom
@@ -494,6 +555,167 @@ def test_mvt_content_zoom(api_client, gebieden_dataset, buurten_model, filled_ro
     }
 
 
+@pytest.mark.django_db
+def test_mvt_zoom_rules(api_client, all_geometries_data, filled_router, settings):
+    """Prove that small features are left out at lower zoom levels."""
+    settings.MVT_ZOOM_RULES = {
+        "alle_geometrien.alle_geometrien": [
+            {"maxZoom": 12, "simplify": 1, "minArea": 100, "minLength": 20},
+        ]
+    }
+
+    # At zoom 12, the small polygon (3) and line (2) are left out. Points are always kept.
+    response = api_client.get("/v1/mvt/alle_geometrien/alle_geometrien/12/2103/1346.pbf")
+    assert response.status_code == 200
+    features = decode_mvt(response)["default"]["features"]
+    assert sorted(feature["properties"]["id"] for feature in features) == [1, 4, 5, 6]
+
+    # The rule doesn't apply at zoom 13.
+    response = api_client.get("/v1/mvt/alle_geometrien/alle_geometrien/13/4207/2692.pbf")
+    assert response.status_code == 200
+    features = decode_mvt(response)["default"]["features"]
+    assert sorted(feature["properties"]["id"] for feature in features) == [1, 2, 3, 4, 5, 6]
+
+
+@pytest.mark.django_db
+def test_mvt_cluster_and_limit(
+    api_client, afval_dataset, filled_router, afval_container_model, afval_cluster, settings
+):
+    """Prove that dense points can be clustered, and a feature limit is reported."""
+    for i in range(3):
+        afval_container_model.objects.create(
+            id=i + 1,
+            cluster=afval_cluster,
+            geometry=Point(123207.6558130105 + i, 486624.6399002579 + i),
+        )
+    settings.MVT_ZOOM_RULES = {
+        "afvalwegingen.containers": [
+            {"maxZoom": 14, "cluster": 64},
+            {"maxZoom": 17, "limit": 2},
+        ]
+    }
+
+    # See test_mvt_content for how to compute the coordinates.
+    response = api_client.get("/v1/mvt/afvalwegingen/containers/14/8415/5384.pbf")
+    assert response.status_code == 200
+    features = decode_mvt(response)["default"]["features"]
+    assert [feature["properties"] for feature in features] == [{"count": 3}]
+
+    # The limit marks the features, so the client knows the tile is incomplete.
+    response = api_client.get("/v1/mvt/afvalwegingen/containers/17/67327/43077.pbf")
+    assert response.status_code == 200
+    features = decode_mvt(response)["default"]["features"]
+    assert len(features) == 2
+    assert all(feature["properties"]["truncated"] for feature in features)
+
+
+@pytest.mark.django_db
+def test_mvt_projected_geometries(
+    api_client, afval_dataset, filled_router, afval_container_model, afval_cluster, settings
+):
+    """Prove that the precomputed Web Mercator columns are used when they exist."""
+    afval_container_model.objects.create(
+        id=1, cluster=afval_cluster, geometry=Point(123207.6558130105, 486624.6399002579)
+    )
+    settings.MVT_ZOOM_RULES = {"afvalwegingen.containers": [{"maxZoom": 14, "simplify": 1}]}
+    call_command("prepare_tile_geometries", "afvalwegingen", "--table=containers")
+    assert get_projected_columns(afval_container_model, "geometry") == {
+        None: "geometry_3857",
+        14: "geometry_3857_z14",
+    }
+
+    # See test_mvt_content for how to compute the coordinates.
+    for url, coordinates in [
+        ("/v1/mvt/afvalwegingen/containers/17/67327/43077.pbf", [1928, 2558]),
+        ("/v1/mvt/afvalwegingen/containers/14/8415/5384.pbf", [3825, 1344]),
+    ]:
+        response = api_client.get(url)
+        assert response.status_code == 200
+        features = decode_mvt(response)["default"]["features"]
+        assert features[0]["geometry"]["coordinates"] == coordinates
+
+    call_command("prepare_tile_geometries", "afvalwegingen", "--drop")
+    assert get_projected_columns(afval_container_model, "geometry") == {}
+
+
+@pytest.mark.django_db
+def test_mvt_tile_index(
+    api_client,
+    afval_dataset,
+    filled_router,
+    afval_container_model,
+    afval_cluster,
+    django_assert_num_queries,
+):
+    """Prove that tiles outside the area with features are not queried."""
+    afval_container_model.objects.create(
+        id=1, cluster=afval_cluster, geometry=Point(123207.6558130105, 486624.6399002579)
+    )
+
+    # See test_mvt_content for how to compute the coordinates.
+    tile_index = get_geometry_tile_index([afval_container_model])
+    assert tile_index.tiles == {(8415, 5384)}
+    assert tile_index.may_have_features(17, 67327, 43077)
+    assert tile_index.may_have_features(10, 525, 336)
+    assert not tile_index.may_have_features(14, 8416, 5384)
+    assert not tile_index.may_have_features(10, 526, 336)
+
+    response = api_client.get("/v1/mvt/afvalwegingen/containers/14/8415/5384.pbf")
+    assert response.status_code == 200
+
+    # Only the data version is read, to tell whether the index is still valid.
+    with django_assert_num_queries(1):
+        response = api_client.get("/v1/mvt/afvalwegingen/containers/14/8416/5384.pbf")
+    assert response.status_code == 204
+
+    # While another request builds the index, the tiles are queried without waiting for it.
+    clear_tile_index_cache()
+    tileindex._building.add(tileindex._get_index_key([(afval_container_model, "geometry")], ""))
+    assert get_geometry_tile_index([afval_container_model]) is None
+    response = api_client.get("/v1/mvt/afvalwegingen/containers/14/8415/5384.pbf")
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_mvt_tilejson_empty_bounds(api_client, afval_dataset, filled_router):
+    """Prove that TileJSON falls back to the bounds of Amsterdam when there is no data."""
+    response = api_client.get("/v1/mvt/afvalwegingen/tilejson.json")
+    assert response.status_code == 200
+    assert response.json()["bounds"] == AMSTERDAM_BOUNDS
+
+
+@pytest.mark.django_db
+def test_mvt_layer_fields_cache(
+    api_client, afval_dataset, filled_router, afval_container_model, afval_cluster
+):
+    """Prove that the layer fields are resolved once per model, zoom range and scopes."""
+    clear_mvt_layer_cache()
+    afval_container_model.objects.create(
+        id=1, cluster=afval_cluster, geometry=Point(123207.6558130105, 486624.6399002579)
+    )
+
+    # See test_mvt_content for how to compute the coordinates.
+    for url in (
+        "/v1/mvt/afvalwegingen/containers/17/67327/43077.pbf",
+        "/v1/mvt/afvalwegingen/containers/14/8415/5384.pbf",
+        "/v1/mvt/afvalwegingen/containers/14/8415/5384.pbf",
+        # Query parameters that no profile uses don't add entries.
+        "/v1/mvt/afvalwegingen/containers/14/8415/5384.pbf?a1=1",
+        "/v1/mvt/afvalwegingen/containers/14/8415/5384.pbf?a2=1",
+    ):
+        response = api_client.get(url)
+        assert response.status_code == 200
+
+    assert sorted(sorted(fields) for fields, _ in _layer_fields_cache.values()) == [
+        ["clusterId", "datumCreatie", "datumLeegmaken", "eigenaarNaam", "id", "serienummer"],
+        ["id"],
+    ]
+
+    # Reloading the models clears the cache.
+    filled_router.reload()
+    assert not _layer_fields_cache
+
+
 @pytest.mark.django_db
 def test_mvt_forbidden(api_client, geometry_auth_thing, fetch_auth_token, filled_router):
     """Prove that an unauthorized geometry field gives 403 Forbidden"""
@@ -550,6 +772,274 @@ def test_mvt_model_auth(api_client, geometry_auth_model, fetch_auth_token, fille
     assert decode_mvt(response) == content
 
 
+@pytest.mark.django_db
+def test_mvt_tile_cache(
+    api_client,
+    afval_dataset,
+    filled_router,
+    afval_container_model,
+    afval_cluster,
+    settings,
+    tmp_path,
+):
+    """Prove that tiles are cached, and the cache is invalidated when the table data changes."""
+    settings.MVT_CACHE_PATH = tmp_path / "tiles.sqlite"
+    afval_container_model.objects.create(
+        id=1, cluster=afval_cluster, geometry=Point(123207.6558130105, 486624.6399002579)
+    )
+
+    # See test_mvt_content for how to compute the coordinates.
+    url = "/v1/mvt/afvalwegingen/containers/14/8415/5384.pbf"
+    response = api_client.get(url)
+    assert response.status_code == 200
+    assert response["X-Tile-Cache"] == "MISS"
+    content = decode_mvt(response)
+    assert len(content["default"]["features"]) == 1
+
+    response = api_client.get(url)
+    assert response.status_code == 200
+    assert response["X-Tile-Cache"] == "HIT"
+    assert decode_mvt(response) == content
+
+    # The cached tile is stored gzip-compressed, and returned as-is when the client accepts it.
+    response = api_client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+    assert response["X-Tile-Cache"] == "HIT"
+    assert response["Content-Encoding"] == "gzip"
+    assert mapbox_vector_tile.decode(gzip.decompress(response.content)) == content
+
+    # Empty tiles are also cached.
+    for cache_status in ("MISS", "HIT"):
+        response = api_client.get("/v1/mvt/afvalwegingen/containers/14/0/0.pbf")
+        assert response.status_code == 204
+        assert response["X-Tile-Cache"] == cache_status
+
+    # Changing the table data invalidates the cached tiles.
+    afval_container_model.objects.create(
+        id=2, cluster=afval_cluster, geometry=Point(123208.6558130105, 486625.6399002579)
+    )
+    response = api_client.get(url)
+    assert response["X-Tile-Cache"] == "MISS"
+    assert len(decode_mvt(response)["default"]["features"]) == 2
+
+    stats = check_tile_cache()
+    assert stats["enabled"]
+    assert (stats["hits"], stats["misses"], stats["tiles"]) == (4, 3, 1)
+
+
+@pytest.mark.django_db
+def test_seed_tiles(
+    api_client,
+    afval_dataset,
+    filled_router,
+    afval_container_model,
+    afval_cluster,
+    settings,
+    tmp_path,
+):
+    """Prove that the seeded tiles are served from the tile cache."""
+    settings.MVT_CACHE_PATH = tmp_path / "tiles.sqlite"
+    afval_container_model.objects.create(
+        id=1, cluster=afval_cluster, geometry=Point(123207.6558130105, 486624.6399002579)
+    )
+
+    stdout = StringIO()
+    call_command(
+        "seed_tiles",
+        "afvalwegingen",
+        "--table=containers",
+        "--min-zoom=14",
+        "--max-zoom=15",
+        "--processes=1",
+        stdout=stdout,
+    )
+    assert "Tiles rendered: 2," in stdout.getvalue()
+
+    # See test_mvt_content for how to compute the coordinates.
+    for url in (
+        "/v1/mvt/afvalwegingen/containers/14/8415/5384.pbf",
+        "/v1/mvt/afvalwegingen/containers/15/16831/10769.pbf",
+    ):
+        response = api_client.get(url)
+        assert response.status_code == 200
+        assert response["X-Tile-Cache"] == "HIT"
+        assert len(decode_mvt(response)["default"]["features"]) == 1
+
+
+@pytest.mark.django_db
+def test_mvt_metatile(
+    api_client,
+    afval_dataset,
+    filled_router,
+    afval_container_model,
+    afval_cluster,
+    settings,
+    tmp_path,
+):
+    """Prove that a block of tiles is rendered at once, and stored in the tile cache."""
+    afval_container_model.objects.create(
+        id=1, cluster=afval_cluster, geometry=Point(123207.6558130105, 486624.6399002579)
+    )
+    url = "/v1/mvt/afvalwegingen/containers/14/8415/5384.pbf"
+    content = decode_mvt(api_client.get(url))
+
+    settings.MVT_CACHE_PATH = tmp_path / "tiles.sqlite"
+    settings.MVT_METATILE_SIZE = 4
+    response = api_client.get(url)
+    assert response.status_code == 200
+    assert response["X-Tile-Cache"] == "MISS"
+    assert decode_mvt(response) == content
+
+    # All tiles of the 4x4 block are cached, including the empty ones.
+    assert check_tile_cache()["tiles"] == 16
+    response = api_client.get(url)
+    assert response["X-Tile-Cache"] == "HIT"
+    assert decode_mvt(response) == content
+
+
+@pytest.mark.django_db
+def test_mvt_tile_cache_scopes(
+    api_client, geometry_auth_model, fetch_auth_token, filled_router, settings, tmp_path
+):
+    """Prove that tiles are cached separately for users that may see different fields."""
+    settings.MVT_CACHE_PATH = tmp_path / "tiles.sqlite"
+    geometry_auth_model.objects.create(
+        id=1,
+        metadata="secret",
+        geometry_with_auth=Point(123207.6558130105, 486624.6399002579),
+    )
+
+    url = "/v1/mvt/geometry_auth/things/17/67327/43077.pbf"
+    for scopes, cache_status, properties in [
+        (["TEST/GEO", "TEST/META"], "MISS", {"id": 1, "metadata": "secret"}),
+        (["TEST/GEO"], "MISS", {"id": 1}),
+        (["TEST/GEO", "TEST/META"], "HIT", {"id": 1, "metadata": "secret"}),
+        (["TEST/GEO"], "HIT", {"id": 1}),
+    ]:
+        token = fetch_auth_token(scopes)
+        response = api_client.get(url, HTTP_AUTHORIZATION=f"Bearer {token}")
+        assert response.status_code == 200
+        assert response["X-Tile-Cache"] == cache_status
+        assert decode_mvt(response)["default"]["features"][0]["properties"] == properties
+
+
+@pytest.mark.django_db
+def test_mvt_etag(api_client, afval_dataset, filled_router, afval_container_model, afval_cluster):
+    """Prove that an unchanged tile is not rendered again for a client that has it."""
+    afval_container_model.objects.create(
+        id=1, cluster=afval_cluster, geometry=Point(123207.6558130105, 486624.6399002579)
+    )
+
+    # See test_mvt_content for how to compute the coordinates.
+    url = "/v1/mvt/afvalwegingen/containers/14/8415/5384.pbf"
+    response = api_client.get(url)
+    assert response.status_code == 200
+    assert response["Cache-Control"] == "max-age=300, public"
+    etag = response["ETag"]
+
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response["ETag"] == etag
+
+    # Changing the table data changes the ETag.
+    afval_container_model.objects.create(
+        id=2, cluster=afval_cluster, geometry=Point(123208.6558130105, 486625.6399002579)
+    )
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+
+@pytest.mark.django_db
+def test_table_version_trigger(afval_dataset, filled_router, afval_container_model, afval_cluster):
+    """Prove that the version trigger counts the writes, which replicas also see."""
+    afval_container_model.objects.create(id=1, cluster=afval_cluster, serienummer="foo")
+    try:
+        call_command(
+            "track_table_versions", "afvalwegingen", "--table=containers", stdout=StringIO()
+        )
+        version = get_table_version(afval_container_model)
+        assert len(version.split(":")) == 3  # oid, filenode and size, no writes counted yet.
+
+        # An update in place doesn't change the table size, but the counter.
+        afval_container_model.objects.filter(id=1).update(serienummer="bar")
+        assert get_table_version(afval_container_model).split(":")[3] == "1"
+    finally:
+        # The table of the counters is removed when the transaction of the test rolls back.
+        has_version_table.cache_clear()
+
+
+@pytest.mark.django_db
+def test_mvt_tilejson_versioned_urls(api_client, afval_container, filled_router, settings):
+    """Prove that the tile URLs in TileJSON can contain the data version."""
+    settings.MVT_VERSIONED_URLS = True
+    response = api_client.get("/v1/mvt/afvalwegingen/tilejson.json")
+    assert response.status_code == 200
+    assert response["Cache-Control"] == "max-age=300, public"
+    tile_url = response.json()["tiles"][1]
+    assert tile_url.startswith(
+        "http://testserver/v1/mvt/afvalwegingen/containers/{z}/{x}/{y}.pbf?v="
+    )
+
+    # The TileJSON document itself can be revalidated.
+    response = api_client.get(
+        "/v1/mvt/afvalwegingen/tilejson.json", HTTP_IF_NONE_MATCH=response["ETag"]
+    )
+    assert response.status_code == 304
+
+    # Tiles that are requested with the current data version can be cached indefinitely.
+    url = tile_url.format(z=14, x=8415, y=5384)
+    response = api_client.get(url)
+    assert response["Cache-Control"] == "max-age=31536000, public"
+
+
+def test_read_binary_copy():
+    """Prove that the column data is read from the binary COPY format, however it's split."""
+    data = (
+        BINARY_COPY_SIGNATURE
+        + struct.pack("!ii", 0, 2)
+        + b"xx"  # header extension
+        + struct.pack("!hi", 1, 5)
+        + b"hello"
+        + struct.pack("!hi", 1, -1)  # NULL
+        + struct.pack("!hi", 1, 6)
+        + b" world"
+        + struct.pack("!h", -1)
+    )
+    for size in (1, 3, 7, len(data)):
+        blocks = [data[i : i + size] for i in range(0, len(data), size)]
+        chunks = list(read_binary_copy(blocks))
+        assert all(isinstance(chunk, memoryview) for chunk in chunks)
+        assert b"".join(chunks) == b"hello world"
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(not Path("/proc/self/status").exists(), reason="needs /proc")
+def test_stream_tile_memory():
+    """Benchmark that a large tile is streamed with bounded memory.
+    The tile is 64MB; reading it with a regular query takes 2-3 times that in RSS.
+    """
+
+    def get_rss() -> int:
+        status = Path("/proc/self/status").read_text()
+        return int(re.search(r"^VmRSS:\s+(\d+) kB", status, re.M).group(1)) * 1024
+
+    tile_size = 64 * 1024**2
+    query = TileQuery(
+        using="default",
+        sql="SELECT convert_to(repeat('x', %s), 'UTF8') AS tile",
+        params=(tile_size,),
+    )
+
+    size = 0
+    start_rss = peak_rss = get_rss()
+    for chunk in stream_tile(query):
+        size += len(chunk)
+        peak_rss = max(peak_rss, get_rss())
+
+    assert size == tile_size
+    assert peak_rss - start_rss < tile_size // 4
+
+
 def decode_mvt(response: HttpResponseBase) -> bytes:
     if isinstance(response, HttpResponse):
         content = response.content
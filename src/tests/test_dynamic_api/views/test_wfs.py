@@ -5,6 +5,11 @@ import pytest
 from django.urls import reverse
 from schematools.contrib.django.db import create_tables
 
+from dso_api.dynamic_api.views.wfs import (
+    _feature_fields_cache,
+    _metadata_cache,
+    clear_wfs_feature_cache,
+)
 from tests.utils import (
     read_response,
     read_response_xml,
@@ -140,6 +145,30 @@ class TestDatasetWFSView:
         response = api_client.get(wfs_url)
         assert response.status_code == 200, response.content
 
+    @pytest.mark.parametrize(
+        "query", ["REQUEST=GetCapabilities", "REQUEST=DescribeFeatureType&TYPENAMES=containers"]
+    )
+    def test_wfs_metadata_cache(self, api_client, afval_dataset, filled_router, query):
+        """Prove that the metadata documents are rendered once, and have an ETag."""
+        wfs_url = f"/v1/wfs/afvalwegingen?SERVICE=WFS&VERSION=2.0.0&{query}"
+        response = api_client.get(wfs_url)
+        assert response.status_code == 200, response.content
+        assert len(_metadata_cache) == 1
+        etag = response["ETag"]
+        content = read_response(response)
+
+        response = api_client.get(wfs_url)
+        assert response.status_code == 200
+        assert response["ETag"] == etag
+        assert read_response(response) == content
+        assert len(_metadata_cache) == 1
+
+        response = api_client.get(wfs_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+
+        clear_wfs_feature_cache()
+        assert not _metadata_cache
+
     def test_wfs_view_with_relations(
         self, api_client, gebieden_dataset, stadsdelen_data, wijken_data, buurten_data
     ):
@@ -313,11 +342,13 @@ class TestDatasetWFSView:
 @pytest.mark.django_db
 class TestDatasetWFSViewAuth:
     @staticmethod
-    def request(client, fetch_auth_token, dataset: str, scopes: list[str]) -> str:
+    def request(
+        client, fetch_auth_token, dataset: str, scopes: list[str], extra_params: str = ""
+    ) -> str:
         url = (
             f"/v1/wfs/{dataset}"
             "?SERVICE=WFS&VERSION=2.0.0&REQUEST=GetFeature&TYPENAMES=things"
-            "&OUTPUTFORMAT=application/gml+xml"
+            f"&OUTPUTFORMAT=application/gml+xml{extra_params}"
         )
         token = fetch_auth_token(scopes)
         return client.get(url, HTTP_AUTHORIZATION=f"Bearer {token}")
@@ -376,6 +407,32 @@ class TestDatasetWFSViewAuth:
             "geometry_with_auth": {"Point": {"pos": "121389 487369"}},
         }
 
+    def test_wfs_field_definitions_cache(
+        self, api_client, geometry_auth_thing, fetch_auth_token, filled_router
+    ):
+        """Prove that the fields are cached per set of scopes, and reused by the next request."""
+        for scopes in (["TEST/GEO"], ["TEST/GEO", "TEST/META"], ["TEST/GEO"]):
+            response = self.request(api_client, fetch_auth_token, "geometry_auth", scopes)
+            assert response.status_code == 200
+            assert ("metadata" in self.parse_response(response)) == ("TEST/META" in scopes)
+
+        # Query parameters that no profile uses don't add entries.
+        for extra_params in ("&a1=1", "&a2=1"):
+            response = self.request(
+                api_client, fetch_auth_token, "geometry_auth", ["TEST/GEO"], extra_params
+            )
+            assert response.status_code == 200
+
+        assert sorted(
+            sorted(field.name for field in fields) for fields in _feature_fields_cache.values()
+        ) == [
+            ["geometry_with_auth", "id"],
+            ["geometry_with_auth", "id", "metadata"],
+        ]
+
+        clear_wfs_feature_cache()
+        assert not _feature_fields_cache
+
     @pytest.mark.parametrize("scopes", [[], ["TEST/META"]])
     def test_wfs_field_auth_invalid(
         self, api_client, geometry_auth_thing, fetch_auth_token, filled_router, scopes
@@ -0,0 +1,64 @@
+import gzip
+import zlib
+from compression import zstd
+
+import brotli
+import pytest
+from django.urls import reverse
+
+from dso_api.middleware import compress_stream
+
+DECOMPRESSORS = {
+    "zstd": zstd.decompress,
+    "br": brotli.decompress,
+    "gzip": gzip.decompress,
+}
+
+# Decompressors that accept incomplete data.
+STREAM_DECOMPRESSORS = {
+    "zstd": lambda: zstd.ZstdDecompressor().decompress,
+    "br": lambda: brotli.Decompressor().process,
+    "gzip": lambda: zlib.decompressobj(16 + zlib.MAX_WBITS).decompress,
+}
+
+
+@pytest.mark.parametrize("encoding", list(DECOMPRESSORS))
+def test_compress_stream(encoding):
+    """Prove that the stream is flushed, so clients receive data before the stream ends."""
+    chunks = [b"foo,bar\r\n", b"1,2\r\n" * 1000, b"3,4\r\n"]
+    output = compress_stream(iter(chunks), encoding, level=3, flush_size=1024, flush_interval=60)
+
+    # The first chunk is flushed directly, so it can be decompressed on its own.
+    first = next(output)
+    decompress = STREAM_DECOMPRESSORS[encoding]()
+    assert decompress(first) == b"foo,bar\r\n"
+
+    data = first + b"".join(output)
+    assert DECOMPRESSORS[encoding](data) == b"".join(chunks)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ["accept_encoding", "expected"],
+    [
+        ("gzip, deflate, br, zstd", "zstd"),
+        ("gzip;q=1.0, br;q=0.5", "gzip"),
+        ("br", "br"),
+        ("identity", None),
+    ],
+)
+def test_streaming_compression(
+    api_client, afval_container, filled_router, accept_encoding, expected
+):
+    """Prove that streaming exports are compressed with the preferred encoding."""
+    url = reverse("dynamic_api:afvalwegingen-containers-list")
+    response = api_client.get(url, {"_format": "csv"}, HTTP_ACCEPT_ENCODING=accept_encoding)
+    assert response.status_code == 200
+    assert response.streaming
+    assert response["Vary"].endswith("Accept-Encoding")
+    assert response.get("Content-Encoding") == expected
+
+    data = b"".join(response.streaming_content)
+    if expected:
+        data = DECOMPRESSORS[expected](data)
+    assert data.startswith(b"id,clusterId,serienummer,")
@@ -0,0 +1,74 @@
+from tempfile import NamedTemporaryFile
+
+import pytest
+from django.contrib.gis.gdal import DataSource, SpatialReference
+from django.contrib.gis.geos import GEOSGeometry, Point
+
+from rest_framework_dso import geofiles
+
+COLUMNS = [geofiles.Column("name"), geofiles.Column("number", geofiles.ColumnType.LONG)]
+
+
+def read_layer(data: bytes, suffix: str, bbox=None) -> list:
+    """Read the features with GDAL, optionally using the spatial index."""
+    with NamedTemporaryFile(suffix=suffix) as file:
+        file.write(data)
+        file.flush()
+        layer = DataSource(file.name)[0]
+        if bbox is not None:
+            layer.spatial_filter = bbox
+        return [
+            (feature.get("name"), feature.get("number"), feature.geom.wkt) for feature in layer
+        ]
+
+
+def test_read_wkb():
+    """Prove that the WKB parsing produces the FlatGeobuf geometry structure."""
+    polygon = GEOSGeometry(
+        "MULTIPOLYGON (((0 0, 10 0, 10 10, 0 0), (1 1, 2 1, 2 2, 1 1)),"
+        " ((20 20, 21 20, 21 21, 20 20)))"
+    )
+    geometry = geofiles.read_wkb(bytes(polygon.wkb))
+    assert geometry.type == geofiles.GeometryType.MULTIPOLYGON
+    assert [part.type for part in geometry.parts] == [geofiles.GeometryType.POLYGON] * 2
+    assert geometry.parts[0].ends == [4, 8]
+    assert geometry.parts[1].ends is None
+    assert geometry.parts[1].xy.tolist() == [20, 20, 21, 20, 21, 21, 20, 20]
+    assert geometry.get_bounds() == (0, 0, 21, 21)
+
+
+@pytest.mark.parametrize("index_node_size", [0, 16])
+def test_flatgeobuf(index_node_size):
+    """Prove that the FlatGeobuf file can be read, and the spatial index can be used."""
+    writer = geofiles.FlatGeobufWriter(
+        "points",
+        COLUMNS,
+        geometry_type=geofiles.GeometryType.POINT,
+        srid=28992,
+        index_node_size=index_node_size,
+    )
+    features = [(bytes(Point(i, i).wkb), [f"p{i}", i]) for i in range(100)]
+    data = b"".join(writer.write(features))
+
+    assert data.startswith(geofiles.FGB_MAGIC_BYTES)
+    assert len(read_layer(data, ".fgb")) == 100
+    assert sorted(read_layer(data, ".fgb", bbox=(9.5, 9.5, 11.5, 11.5))) == [
+        ("p10", 10, "POINT (10 10)"),
+        ("p11", 11, "POINT (11 11)"),
+    ]
+
+
+def test_geopackage():
+    """Prove that the GeoPackage can be read, including empty values."""
+    writer = geofiles.GeoPackageWriter(
+        "points", COLUMNS, srid=28992, srs_definition=SpatialReference(28992).wkt
+    )
+    data = b"".join(writer.write([(bytes(Point(1, 2).wkb), ["p1", 1]), (None, [None, None])]))
+
+    with NamedTemporaryFile(suffix=".gpkg") as file:
+        file.write(data)
+        file.flush()
+        layer = DataSource(file.name)[0]
+        assert layer.srs.srid == 28992
+        assert [feature.get("name") for feature in layer] == ["p1", None]
+        assert layer.extent.tuple == (1, 2, 1, 2)
@@ -1,8 +1,21 @@
 import inspect
+from io import BytesIO
 
+import pyarrow.ipc
+import pyarrow.parquet
 import pytest
+from rest_framework import serializers
+from rest_framework.serializers import ListSerializer, Serializer
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
 
-from rest_framework_dso.renderers import CSVRenderer, GeoJSONRenderer, HALJSONRenderer
+from rest_framework_dso.renderers import (
+    ArrowRenderer,
+    CSVRenderer,
+    GeoJSONRenderer,
+    HALJSONRenderer,
+    NDJSONRenderer,
+    ParquetRenderer,
+)
 from rest_framework_dso.response import StreamingResponse
 
 
@@ -26,6 +39,82 @@ class TestRenderer:
         data = b"".join(output)
         assert data == b"foo,bar\r\n1,2\r\n3,4\r\n"
 
+    def test_csv_serializer_rendering(self):
+        """Prove that the columns of the serializer are written, including nested objects.
+        Array fields are written as a single column.
+        """
+
+        class ClusterSerializer(Serializer):
+            id = serializers.CharField()
+
+        class ContainerSerializer(Serializer):
+            name = serializers.CharField()
+            tags = serializers.ListField()
+            cluster = ClusterSerializer()
+
+        renderer = CSVRenderer()
+        output = renderer.render(
+            data=ReturnList(
+                [
+                    {"name": "a", "tags": ["x", "y"], "cluster": {"id": "c1"}},
+                    {"name": "b", "tags": [], "cluster": None},
+                ],
+                serializer=ListSerializer(child=ContainerSerializer()),
+            ),
+            renderer_context={"request": None},
+        )
+
+        data = b"".join(output)
+        assert data == b'name,tags,cluster.id\r\na,"x,y",c1\r\nb,,\r\n'
+
+    def test_ndjson_rendering(self):
+        """Prove that NDJSON writes each record and embedded object on a separate line."""
+        renderer = NDJSONRenderer()
+        output = renderer.render(
+            data=ReturnDict(
+                {
+                    "movies": ({"name": name} for name in ("foo123", "test")),
+                    "category": [{"name": "bar"}],
+                },
+                serializer=ListSerializer(child=Serializer()),
+            )
+        )
+
+        # Instead of directly rendering, the renderer should produce an generator
+        assert inspect.isgenerator(output)
+
+        data = b"".join(output)
+        assert data == (
+            b'{"name":"foo123"}\n{"name":"test"}\n{"_embed":"category","name":"bar"}\n'
+        )
+
+    def test_arrow_rendering(self):
+        """Prove that the Arrow stream is written as one record batch per chunk."""
+        renderer = ArrowRenderer()
+        renderer.batch_size = 2
+        output = renderer.render(data=({"foo": i, "bar": str(i)} for i in range(5)))
+
+        # Instead of directly rendering, the renderer should produce an generator
+        assert inspect.isgenerator(output)
+
+        reader = pyarrow.ipc.open_stream(b"".join(output))
+        batches = list(reader)
+        assert [batch.num_rows for batch in batches] == [2, 2, 1]
+        assert reader.schema.types == [pyarrow.int64(), pyarrow.string()]
+        assert pyarrow.Table.from_batches(batches).to_pylist() == [
+            {"foo": i, "bar": str(i)} for i in range(5)
+        ]
+
+    def test_parquet_rendering(self):
+        """Prove that the Parquet file is written as one row group per chunk."""
+        renderer = ParquetRenderer()
+        renderer.batch_size = 2
+        output = renderer.render(data=({"foo": i} for i in range(3)))
+
+        parquet_file = pyarrow.parquet.ParquetFile(BytesIO(b"".join(output)))
+        assert parquet_file.num_row_groups == 2
+        assert parquet_file.read().to_pylist() == [{"foo": 0}, {"foo": 1}, {"foo": 2}]
+
     RENDERERS = {
         "csv": (
             CSVRenderer,
@@ -35,6 +124,10 @@ class TestRenderer:
             HALJSONRenderer,
             [b'[\n  {"foo":"1","bar":"2"}', b"/* Aborted by RuntimeError during rendering! */\n"],
         ),
+        "ndjson": (
+            NDJSONRenderer,
+            [b'{"foo":"1","bar":"2"}\n', b"/* Aborted by RuntimeError during rendering! */\n"],
+        ),
         "geojson": (
             GeoJSONRenderer,
             [